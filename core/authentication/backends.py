@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from core.authentication.hashing import PasswordHashTimeout, hash_password, verify_password
+
+
+class HashExecutorModelBackend(ModelBackend):
+    """ModelBackend that verifies passwords on the hash executor."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Run the hasher once to reduce the timing difference between
+            # an existing and a nonexistent user (#20760).
+            try:
+                hash_password(password)
+            except PasswordHashTimeout:
+                pass
+            return None
+        try:
+            is_correct = verify_password(user, password)
+        except PasswordHashTimeout:
+            # Saturated hash executor: fail this login rather than the request
+            return None
+        if is_correct and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher, check_password, get_hasher, identify_hasher, make_password,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashTimeout(Exception):
+    """The hash executor did not finish a password within PASSWORD_HASH_TIMEOUT."""
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher whose cost comes from settings.PASSWORD_HASH_ITERATIONS.
+    It keeps the pbkdf2_sha256 algorithm name, so existing hashes verify
+    unchanged and are rewritten at the new cost on the next login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
+
+class HashMetrics:
+    """Process-wide counters for password hashing time and executor timeouts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._stats = {}
+
+    def _stats_for(self, operation):
+        return self._stats.setdefault(
+            operation, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'timeouts': 0}
+        )
+
+    def record(self, operation, seconds):
+        with self._lock:
+            stats = self._stats_for(operation)
+            stats['count'] += 1
+            stats['total_seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+    def record_timeout(self, operation):
+        with self._lock:
+            self._stats_for(operation)['timeouts'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                operation: dict(stats, avg_seconds=stats['total_seconds'] / stats['count'] if stats['count'] else 0.0)
+                for operation, stats in self._stats.items()
+            }
+
+
+hash_metrics = HashMetrics()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _init_process_worker():
+    import django
+    django.setup()
+
+
+def get_hash_executor():
+    """
+    Shared executor for password hashing, or None to hash inline.
+    PASSWORD_HASH_EXECUTOR is 'thread', 'process' or None.
+    """
+    global _executor
+    kind = getattr(settings, 'PASSWORD_HASH_EXECUTOR', None)
+    if not kind:
+        return None
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = getattr(settings, 'PASSWORD_HASH_WORKERS', 4)
+                if kind == 'process':
+                    _executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_process_worker)
+                else:
+                    _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    return _executor
+
+
+def _run(operation, func, *args):
+    started = time.perf_counter()
+    executor = get_hash_executor()
+    if executor is None:
+        result = func(*args)
+    else:
+        timeout = getattr(settings, 'PASSWORD_HASH_TIMEOUT', 30)
+        future = executor.submit(func, *args)
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Drop it if it is still queued; nobody is waiting for it any more
+            future.cancel()
+            hash_metrics.record_timeout(operation)
+            logger.warning("Password %s waited more than %ss for the hash executor", operation, timeout)
+            raise PasswordHashTimeout(f"Password {operation} did not finish within {timeout}s")
+    elapsed = time.perf_counter() - started
+    hash_metrics.record(operation, elapsed)
+    logger.debug("Password %s took %.1f ms", operation, elapsed * 1000)
+    return result
+
+
+def hash_password(raw_password):
+    """
+    make_password() on the hash executor. None gives an unusable password.
+    Raises PasswordHashTimeout when the executor is saturated.
+    """
+    return _run('hash', make_password, raw_password)
+
+
+def _needs_rehash(encoded):
+    preferred = get_hasher('default')
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def verify_password(user, raw_password):
+    """
+    Check raw_password against user's stored hash on the hash executor.
+    A correct password stored with an outdated hasher or cost is re-hashed
+    and saved on the calling thread. Raises PasswordHashTimeout when the
+    executor is saturated.
+    """
+    if raw_password is None:
+        return False
+    encoded = user.password
+    is_correct = _run('check', check_password, raw_password, encoded)
+    if is_correct and _needs_rehash(encoded):
+        user.password = hash_password(raw_password)
+        user.save(update_fields=['password'])
+        logger.info("Upgraded password hash for user %s", user.pk)
+    return is_correct
+
+
+def get_hash_metrics():
+    return hash_metrics.snapshot()
@@ -0,0 +1,150 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+# Attribute on the underlying HttpRequest holding {authentication class: (user, token)}
+REQUEST_AUTH_ATTR = '_jwt_auth_results'
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified tokens keyed by their jti claim.
+    Entries live until the token's own expiry; a hit also requires the raw
+    token to match byte for byte, so a forged token reusing a jti never
+    skips signature verification.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, jti, raw_token):
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry is None:
+                return None
+            cached_raw, validated_token, user, expires_at = entry
+            if cached_raw != raw_token or expires_at <= time.time():
+                del self._entries[jti]
+                return None
+            self._entries.move_to_end(jti)
+            return validated_token, user
+
+    def set(self, jti, raw_token, validated_token, user):
+        expires_at = validated_token.payload.get('exp', 0)
+        with self._lock:
+            existing = self._entries.get(jti)
+            if user is None and existing is not None and existing[0] == raw_token:
+                user = existing[2]
+            self._entries[jti] = (raw_token, validated_token, user, expires_at)
+            self._entries.move_to_end(jti)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for jti, entry in list(self._entries.items()):
+                if entry[2] is not None and entry[2].pk == user_id:
+                    del self._entries[jti]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+verified_token_cache = VerifiedTokenCache(getattr(settings, 'JWT_VERIFIED_TOKEN_CACHE_SIZE', 0))
+
+
+def _clone_user(user):
+    """Shallow copy with its own model state so requests never share related caches."""
+    clone = copy.copy(user)
+    clone._state = copy.copy(user._state)
+    clone._state.fields_cache = {}
+    clone.__dict__.pop('_membership_map', None)
+    return clone
+
+
+def _peek_jti(raw_token):
+    """Read the jti claim without verifying; only used as a cache key."""
+    try:
+        payload = jwt.decode(raw_token, options={'verify_signature': False})
+    except jwt.PyJWTError:
+        return None
+    return payload.get(api_settings.JTI_CLAIM)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that decodes and hydrates a request's token only once.
+
+    The (user, token) pair is stored on the underlying HttpRequest per
+    authentication class, so the tenant middleware and DRF's authentication
+    in the view share a single decode and a single User query, while a
+    subclass that builds a different user never gets the middleware's.
+    When JWT_VERIFIED_TOKEN_CACHE_SIZE is set, verified tokens are
+    additionally kept in a process-wide LRU keyed by jti, letting hot
+    clients skip HMAC verification and the user query.
+    The LRU is off by default: user saves only clear the entries of the
+    process that made them, so elsewhere a deactivated user or changed
+    password keeps authenticating until the token expires.
+    """
+
+    def authenticate(self, request):
+        http_request = getattr(request, '_request', request)
+        results = http_request.__dict__.setdefault(REQUEST_AUTH_ATTR, {})
+        if type(self) in results:
+            return results[type(self)]
+
+        # Failures raise before anything is stored, so DRF reports them as usual
+        result = results[type(self)] = self._authenticate(request)
+        return result
+
+    def _authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        jti = _peek_jti(raw_token) if verified_token_cache.max_size else None
+        if jti is not None:
+            hit = verified_token_cache.get(jti, raw_token)
+            if hit is not None:
+                validated_token, cached_user = hit
+                return self.user_from_cache(validated_token, cached_user), validated_token
+
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_user(validated_token)
+        if jti is not None:
+            verified_token_cache.set(jti, raw_token, validated_token, self.user_for_cache(user))
+        return user, validated_token
+
+    def user_for_cache(self, user):
+        """Copy of user to keep in the LRU, or None to cache only the token."""
+        return _clone_user(user)
+
+    def user_from_cache(self, validated_token, cached_user):
+        if cached_user is None:
+            return self.get_user(validated_token)
+        return _clone_user(cached_user)
+
+
+def _discard_cached_user(sender, instance, **kwargs):
+    # A changed user (is_active, password, role) must not be served from the LRU
+    verified_token_cache.discard_user(instance.pk)
+
+
+post_save.connect(_discard_cached_user, sender=get_user_model(), dispatch_uid='jwt_cache_discard_user_save')
+post_delete.connect(_discard_cached_user, sender=get_user_model(), dispatch_uid='jwt_cache_discard_user_delete')
@@ -5,6 +5,7 @@ from django_tenants.utils import get_tenant
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import Token
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from core.authentication.hashing import PasswordHashTimeout, verify_password
 User = get_user_model()
 
 def jwt_user_authentication_rule(user):
@@ -44,8 +45,13 @@ class TenantAwareAuthBackend(ModelBackend):
         except User.DoesNotExist:
             return None
         
-        # Validate password
-        if user.check_password(password):
+        # Validate password (on the hash executor, upgrading outdated hashes)
+        try:
+            is_correct = verify_password(user, password)
+        except PasswordHashTimeout:
+            # Saturated hash executor: fail this login rather than the request
+            return None
+        if is_correct:
             tenant = get_tenant()
             
             # Platform admins can access any tenant
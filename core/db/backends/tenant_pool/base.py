@@ -0,0 +1,117 @@
+"""
+django_tenants PostgreSQL backend with a process-wide connection pool.
+
+Closing a connection (end of request, CONN_MAX_AGE expiry) hands the raw
+connection back to the pool instead of disconnecting. The pool remembers
+the search_path each connection was left with, and cursors only issue
+`SET search_path` when the tenant actually differs from it.
+
+    DATABASES['default'] = {
+        'ENGINE': 'core.db.backends.tenant_pool',
+        ...
+        'POOL': {'MAX_SIZE': 20, 'TIMEOUT': 10, 'MAX_IDLE_AGE': 300},
+    }
+"""
+import psycopg2
+import psycopg2.extras
+from psycopg2 import extensions
+
+import django.db.utils
+from django.core.exceptions import ImproperlyConfigured
+from django_tenants.postgresql_backend.base import DatabaseWrapper as TenantDatabaseWrapper
+
+from core.db.pool import get_pool
+
+
+class DatabaseWrapper(TenantDatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        # search_path currently in effect on the physical connection
+        self._pool_search_path = None
+        self._search_path_uncommitted = False
+        super().__init__(*args, **kwargs)
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, psycopg2.connect, self.settings_dict.get('POOL', {}))
+
+    def pool_stats(self):
+        return self.pool.snapshot()
+
+    def get_new_connection(self, conn_params):
+        connection, self._pool_search_path = self.pool.acquire(conn_params)
+        self._search_path_uncommitted = False
+
+        # Same session setup as the stock backend; cheap on reused connections
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection, search_path = self.connection, self._pool_search_path
+        self._pool_search_path = None
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # close() keeps a reference to the connection in this case,
+                # so it must not be handed to another thread.
+                self.pool.discard(connection)
+            else:
+                self.pool.release(connection, search_path)
+
+    def _commit(self):
+        super()._commit()
+        self._search_path_uncommitted = False
+
+    def _rollback(self):
+        super()._rollback()
+        if self._search_path_uncommitted:
+            self._pool_search_path = None
+        self._search_path_uncommitted = False
+
+    def _savepoint_rollback(self, sid):
+        super()._savepoint_rollback(sid)
+        if self._search_path_uncommitted:
+            self._pool_search_path = None
+
+    def _cursor(self, name=None):
+        # Skip django_tenants' _cursor, which sets the search_path on every cursor
+        base_cursor = super(TenantDatabaseWrapper, self)._cursor
+        cursor = base_cursor(name=name) if name else base_cursor()
+
+        if not self.schema_name:
+            raise ImproperlyConfigured("Database schema not set. Did you forget "
+                                       "to call set_schema() or set_tenant()?")
+        search_paths = tuple(self._get_cursor_search_paths())
+        if search_paths == self._pool_search_path:
+            self.search_path_set_schemas = list(search_paths)
+            self.pool.record_search_path(switched=False)
+            return cursor
+
+        # Named cursors can only be used once
+        cursor_for_search_path = self.connection.cursor() if name else cursor
+        try:
+            formatted_search_paths = ['\'{}\''.format(s) for s in search_paths]
+            cursor_for_search_path.execute('SET search_path = {0}'.format(','.join(formatted_search_paths)))
+        except (django.db.utils.DatabaseError, psycopg2.InternalError):
+            self.search_path_set_schemas = None
+            self._pool_search_path = None
+        else:
+            self.search_path_set_schemas = list(search_paths)
+            self._pool_search_path = search_paths
+            # A SET inside a transaction is undone if that transaction rolls back
+            self._search_path_uncommitted = (
+                self.connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE
+            )
+            self.pool.record_search_path(switched=True)
+        if name:
+            cursor_for_search_path.close()
+        return cursor
@@ -0,0 +1,206 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the pool's TIMEOUT."""
+
+
+class PoolStats:
+    """Counters for one pool. Updated under the pool's lock."""
+
+    FIELDS = (
+        'hits', 'misses', 'waits', 'timeouts', 'discarded',
+        'search_path_switches', 'search_path_skips',
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+        self.wait_seconds = 0.0
+
+    def as_dict(self):
+        stats = {field: getattr(self, field) for field in self.FIELDS}
+        stats['wait_seconds'] = round(self.wait_seconds, 6)
+        return stats
+
+
+class TenantConnectionPool:
+    """
+    Bounded pool of raw psycopg2 connections for one database alias.
+
+    Idle connections remember the search_path they were left with, so a
+    request for the same tenant can skip `SET search_path` entirely.
+    MAX_SIZE caps open connections (idle + checked out); MAX_IDLE_AGE
+    recycles connections that sat unused for too long.
+    """
+
+    def __init__(self, connect, max_size=20, timeout=10, max_idle_age=300):
+        if max_size < 1:
+            raise ImproperlyConfigured("POOL['MAX_SIZE'] must be at least 1")
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle_age = max_idle_age
+        self._idle = deque()
+        self._size = 0
+        self._condition = threading.Condition()
+        self.stats = PoolStats()
+        self.pid = os.getpid()
+
+    def _reset(self, conn):
+        """
+        Leave conn idle and outside any transaction. Returns 'idle',
+        'rolled_back' or None when the connection is unusable.
+        """
+        from psycopg2 import extensions
+
+        if conn.closed:
+            return None
+        status = conn.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_IDLE:
+            return 'idle'
+        if status in (extensions.TRANSACTION_STATUS_INTRANS, extensions.TRANSACTION_STATUS_INERROR):
+            try:
+                conn.rollback()
+            except Exception:
+                return None
+            return 'rolled_back'
+        return None
+
+    def _discard(self, conn):
+        self._size -= 1
+        self.stats.discarded += 1
+        self._condition.notify()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self, conn_params):
+        """
+        Return (connection, search_path). search_path is the tuple last set
+        on the connection, or None when it is unknown (new connection).
+        """
+        deadline = None
+        with self._condition:
+            while True:
+                while self._idle:
+                    conn, search_path, released_at = self._idle.pop()
+                    if time.monotonic() - released_at > self.max_idle_age:
+                        self._discard(conn)
+                        continue
+                    self.stats.hits += 1
+                    return conn, search_path
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    self.stats.misses += 1
+                    break
+
+                if deadline is None:
+                    deadline = time.monotonic() + self.timeout
+                    self.stats.waits += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats.timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {self.timeout}s "
+                        f"(max size {self.max_size})"
+                    )
+                started = time.monotonic()
+                self._condition.wait(remaining)
+                self.stats.wait_seconds += time.monotonic() - started
+
+        try:
+            return self._connect(**conn_params), None
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, conn, search_path):
+        """Return conn to the pool, or close it if it is unusable."""
+        state = self._reset(conn)
+        with self._condition:
+            if state is None:
+                self._discard(conn)
+                return
+            if state == 'rolled_back':
+                # The rollback may have reverted a SET issued in that transaction
+                search_path = None
+            self._idle.append((conn, search_path, time.monotonic()))
+            self._condition.notify()
+
+    def discard(self, conn):
+        with self._condition:
+            self._discard(conn)
+
+    def record_search_path(self, switched):
+        with self._condition:
+            if switched:
+                self.stats.search_path_switches += 1
+            else:
+                self.stats.search_path_skips += 1
+
+    def close_idle(self):
+        with self._condition:
+            while self._idle:
+                conn, _, _ = self._idle.pop()
+                self._discard(conn)
+
+    def snapshot(self):
+        with self._condition:
+            stats = self.stats.as_dict()
+            stats.update({
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+            })
+            return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, connect, options):
+    # A forked worker must never reuse sockets opened by its parent
+    pool = _pools.get(alias)
+    if pool is None or pool.pid != os.getpid():
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None or pool.pid != os.getpid():
+                pool = _pools[alias] = TenantConnectionPool(
+                    connect,
+                    max_size=options.get('MAX_SIZE', 20),
+                    timeout=options.get('TIMEOUT', 10),
+                    max_idle_age=options.get('MAX_IDLE_AGE', 300),
+                )
+    return pool
+
+
+def get_pool_stats(alias=None):
+    """Stats for one alias, or {alias: stats} for every pool in this process."""
+    if alias is not None:
+        pool = _pools.get(alias)
+        return pool.snapshot() if pool else None
+    return {name: pool.snapshot() for name, pool in list(_pools.items())}
+
+
+def reset_pool_stats():
+    for pool in list(_pools.values()):
+        with pool._condition:
+            pool.stats.reset()
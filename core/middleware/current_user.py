@@ -42,5 +42,8 @@ def get_current_user():
     return getattr(_thread_locals, 'user', None)
 
 def get_current_tenant():
-    """Retrieve current tenant from thread locals"""
+    """Retrieve current tenant from thread locals, resolving it on first use"""
+    resolver = _thread_locals.__dict__.pop('tenant_resolver', None)
+    if resolver is not None:
+        _thread_locals.tenant = resolver()
     return getattr(_thread_locals, 'tenant', None)
\ No newline at end of file
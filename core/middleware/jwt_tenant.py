@@ -1,6 +1,6 @@
 from django.utils.deprecation import MiddlewareMixin
 from django_tenants.utils import get_tenant_model
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from core.authentication.jwt_cache import CachedJWTAuthentication
 from django.utils.functional import SimpleLazyObject
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
@@ -9,18 +9,16 @@ class JWTTenantMiddleware(MiddlewareMixin):
     """
     Middleware that processes JWT tokens for tenant-aware authentication.
     """
-    
+    jwt_auth = CachedJWTAuthentication()
+
     def process_request(self, request):
         # Skip processing if this isn't an API request
         if not request.path.startswith('/api/'):
             return None
             
-        # Initialize JWT authentication
-        jwt_auth = JWTAuthentication()
-        
-        # Try to authenticate with JWT
+        # Try to authenticate with JWT (the result is reused by DRF authentication)
         try:
-            auth_result = jwt_auth.authenticate(request)
+            auth_result = self.jwt_auth.authenticate(request)
             if auth_result is not None:
                 user, token = auth_result
                 
@@ -0,0 +1,121 @@
+import functools
+import logging
+import re
+
+from django.core.exceptions import PermissionDenied
+from django.utils.functional import SimpleLazyObject
+from django_tenants.utils import get_public_schema_name, get_tenant_model
+
+from core.authentication.jwt_cache import CachedJWTAuthentication
+from core.middleware.current_user import _thread_locals
+
+logger = logging.getLogger(__name__)
+
+
+class TenantContextMiddleware:
+    """
+    Single tenant-context pass replacing JWTTenantMiddleware,
+    CurrentMerchantUserMiddleware, MerchantAdminMiddleware,
+    MerchantIsolationMiddleware and AdminAccessMiddleware.
+
+    The JWT is decoded once, the tenant and the user's membership are
+    resolved once, and the path-prefix rules are compiled into a single
+    regex at startup so each request does one match instead of a chain
+    of startswith() checks.
+    """
+
+    # (prefix, handler name) pairs, evaluated in order
+    PATH_RULES = (
+        ('/api/', 'api'),
+        ('/admin/', 'admin'),
+        ('/platform/', 'platform'),
+    )
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.jwt_auth = CachedJWTAuthentication()
+        self.public_schema = get_public_schema_name()
+        self.path_pattern = re.compile('|'.join(
+            f'(?P<{name}>^{re.escape(prefix)})' for prefix, name in self.PATH_RULES
+        ))
+
+    def __call__(self, request):
+        match = self.path_pattern.match(request.path)
+        area = match.lastgroup if match else None
+
+        if area == 'api':
+            self._authenticate_jwt(request)
+        elif area == 'admin':
+            self._check_admin_access(request)
+        elif area == 'platform':
+            self._check_platform_access(request)
+
+        request.tenant_membership = SimpleLazyObject(lambda: self._resolve_membership(request))
+
+        _thread_locals.user = getattr(request, 'user', None)
+        # Resolved by the first get_current_tenant() call, so requests that never ask don't query
+        _thread_locals.tenant_resolver = functools.partial(self._resolve_current_tenant, request)
+        try:
+            return self.get_response(request)
+        finally:
+            del _thread_locals.user
+            _thread_locals.__dict__.pop('tenant', None)
+            _thread_locals.__dict__.pop('tenant_resolver', None)
+
+    def _authenticate_jwt(self, request):
+        """
+        Decode the bearer token once and expose its payload on the request.
+        DRF's CachedJWTAuthentication picks up the same result in the view.
+        """
+        try:
+            auth_result = self.jwt_auth.authenticate(request)
+        except Exception:
+            # If JWT authentication fails, continue without setting user
+            return
+        if auth_result is None:
+            return
+
+        user, token = auth_result
+        request.user = user
+        if token:
+            request.token_payload = token.payload
+            if 'schema_name' in token.payload:
+                request.tenant_from_jwt = token.payload['schema_name']
+
+    def _check_admin_access(self, request):
+        tenant = getattr(request, 'tenant', None)
+        if tenant is None:
+            logger.error("No tenant found in request")
+            raise PermissionDenied("Tenant admin requires tenant context")
+
+        if tenant.schema_name == self.public_schema:
+            logger.warning("Public schema attempted to access merchant admin")
+            raise PermissionDenied("Merchant admin is only accessible from merchant schemas")
+
+    def _check_platform_access(self, request):
+        tenant = getattr(request, 'tenant', None)
+        if tenant is not None and tenant.schema_name != self.public_schema:
+            logger.warning(f"Merchant {tenant.name} attempted to access platform admin")
+            raise PermissionDenied("Platform admin is only accessible from public schema")
+
+    def _resolve_membership(self, request):
+        """Active TenantMembership of the current user in request.tenant, if any."""
+        user = getattr(request, 'user', None)
+        tenant = getattr(request, 'tenant', None)
+        if user is None or tenant is None or not user.is_authenticated:
+            return None
+        return user.memberships.filter(tenant_id=tenant.id, is_active=True).first()
+
+    def _resolve_current_tenant(self, request):
+        """Tenant named by the X-Tenant-ID header or the JWT claim; None if absent or unknown."""
+        payload = getattr(request, 'token_payload', None) or {}
+        tenant_schema = request.headers.get('X-Tenant-ID') or payload.get('tenant_schema')
+        if not tenant_schema:
+            return None
+
+        # Reuse the tenant resolved from the hostname instead of querying it again
+        tenant = getattr(request, 'tenant', None)
+        if tenant is not None and tenant.schema_name == tenant_schema:
+            return tenant
+
+        return get_tenant_model().objects.filter(schema_name=tenant_schema).first()
@@ -0,0 +1,72 @@
+import copy
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django_tenants.middleware.main import TenantMainMiddleware
+
+logger = logging.getLogger(__name__)
+
+_tenant_cache = {}
+_tenant_cache_lock = threading.Lock()
+
+
+def get_tenant_cache_ttl():
+    """Seconds a resolved hostname stays cached (0 disables the cache)."""
+    return getattr(settings, 'TENANT_CACHE_TTL', 60)
+
+
+def get_cached_tenant(hostname):
+    """Return a copy of the cached tenant for hostname, or None on a miss."""
+    entry = _tenant_cache.get(hostname)
+    if entry is None:
+        return None
+    tenant, expires_at = entry
+    if expires_at < time.monotonic():
+        with _tenant_cache_lock:
+            _tenant_cache.pop(hostname, None)
+        return None
+    # Callers mutate the tenant (e.g. domain_url), so never hand out the shared instance
+    return copy.copy(tenant)
+
+
+def set_cached_tenant(hostname, tenant):
+    ttl = get_tenant_cache_ttl()
+    if ttl <= 0:
+        return
+    with _tenant_cache_lock:
+        _tenant_cache[hostname] = (copy.copy(tenant), time.monotonic() + ttl)
+
+
+def invalidate_tenant_cache(hostname=None, tenant_id=None):
+    """
+    Drop cached hostname lookups.
+    With no arguments the whole cache is cleared.
+    """
+    with _tenant_cache_lock:
+        if hostname is None and tenant_id is None:
+            _tenant_cache.clear()
+            return
+        for key, (tenant, _) in list(_tenant_cache.items()):
+            if key == hostname or (tenant_id is not None and tenant.pk == tenant_id):
+                del _tenant_cache[key]
+    logger.debug("Invalidated tenant cache (hostname=%s, tenant_id=%s)", hostname, tenant_id)
+
+
+class CachedTenantMainMiddleware(TenantMainMiddleware):
+    """
+    TenantMainMiddleware that keeps hostname -> tenant lookups in process memory.
+    A cache hit skips the Domain/Merchant query on the public schema entirely.
+    Entries expire after TENANT_CACHE_TTL seconds and are invalidated explicitly
+    when a Merchant or Domain changes.
+    """
+
+    def get_tenant(self, domain_model, hostname):
+        tenant = get_cached_tenant(hostname)
+        if tenant is not None:
+            return tenant
+
+        tenant = super().get_tenant(domain_model, hostname)
+        set_cached_tenant(hostname, tenant)
+        return tenant
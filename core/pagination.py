@@ -0,0 +1,30 @@
+"""
+Keyset (cursor) pagination for large collections.
+
+PageNumberPagination runs a COUNT(*) per page and an OFFSET that scans
+every skipped row, so deep pages get slower as a table grows. Keyset
+pagination seeks from the last row of the previous page instead
+(`WHERE created_at < %s ORDER BY created_at DESC LIMIT n`), which is a
+single index range scan at any depth. DRF's CursorPagination seeks on the
+first ordering field only; rows sharing its value with the page boundary
+are skipped with a small OFFSET, so later fields just make the order
+stable and only the first needs an index. The trade-off is that clients get
+next/previous links rather than page numbers and a total count.
+
+Only order on indexed, immutable columns. Pick a class per viewset:
+
+    class MerchantViewSet(viewsets.ModelViewSet):
+        pagination_class = CreatedAtKeysetPagination
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class CreatedAtKeysetPagination(KeysetPagination):
+    # id breaks ties between rows created in the same instant
+    ordering = ('-created_at', '-id')
@@ -1,5 +1,17 @@
 from rest_framework import permissions
 
+
+def get_token_claim(request, claim):
+    """
+    Read a claim from the request's JWT without touching the User row.
+    Returns None for non-JWT authentication (session, DRF tokens).
+    """
+    token = getattr(request, 'auth', None)
+    if token is None or not hasattr(token, 'payload'):
+        return None
+    return token.payload.get(claim)
+
+
 class IsPlatformAdmin(permissions.BasePermission):
     """
     Permission check for platform administrators only.
@@ -31,20 +43,33 @@ class IsCustomer(permissions.BasePermission):
 class IsTenantMember(permissions.BasePermission):
     """
     Permission check for users belonging to the current tenant.
+
+    Trusts the token's tenant_schema claim: a membership revoked after the
+    token was issued keeps passing until the token expires. Views that must
+    see revocations at once should check request.tenant_membership instead.
     """
     def has_permission(self, request, view):
         from django_tenants.utils import get_current_schema_name
         current_schema = get_current_schema_name()
-        
+
+        if not request.user.is_authenticated:
+            return False
+
+        # Prefer the tenant_schema claim so claims-only users stay query-free
+        user_schema = get_token_claim(request, 'tenant_schema')
+        if user_schema is None:
+            user_schema = getattr(request.user, 'schema_name', None)
+
         # Check if user's schema matches current schema or is a platform admin
-        return (
-            request.user.is_authenticated and 
-            (request.user.schema_name == current_schema or request.user.role == 'public_admin')
-        )
+        return user_schema == current_schema or request.user.role == 'public_admin'
 
 class IsStoreStaff(permissions.BasePermission):
     """
     Permission check for staff of a specific store.
+
+    Trusts the token's role and store_id claims, so a store manager
+    reassigned after the token was issued keeps access to the old store
+    until the token expires.
     """
     def has_permission(self, request, view):
         # Basic authentication check
@@ -62,7 +87,11 @@ class IsStoreStaff(permissions.BasePermission):
         if not store_id:
             return False
             
-        return (
-            request.user.role == 'store_manager' and
-            request.user.store and request.user.store.id == int(store_id)
-        )
\ No newline at end of file
+        if request.user.role != 'store_manager':
+            return False
+
+        user_store_id = get_token_claim(request, 'store_id')
+        if user_store_id is None:
+            store = getattr(request.user, 'store', None)
+            user_store_id = store.id if store else None
+        return user_store_id is not None and int(user_store_id) == int(store_id)
\ No newline at end of file
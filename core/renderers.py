@@ -0,0 +1,67 @@
+"""
+JSON rendering backed by orjson when it is installed.
+
+Falls back to the standard library encoder otherwise, so orjson stays an
+optional speed-up rather than a hard dependency. Both paths go through
+DRF's JSONEncoder for the types they don't encode natively (Decimal,
+datetimes, lazy strings), so the output matches the stock JSONRenderer.
+
+Values wrapped in JSONFragment are already-encoded JSON and are spliced
+into the output as-is; see core.serializers.RenderCacheMixin.
+"""
+import json
+import re
+import secrets
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# Random per process, so a string in user data can never be mistaken for a placeholder
+_FRAGMENT_TOKEN = f'__json_fragment_{secrets.token_hex(8)}_'
+_FRAGMENT_RE = re.compile(rb'"' + re.escape(_FRAGMENT_TOKEN.encode()) + rb'(\d+)"')
+
+
+class JSONFragment(bytes):
+    """Already-encoded JSON value."""
+
+
+def encode_json(data, indent=None):
+    """Encode data to UTF-8 JSON bytes, inlining any JSONFragment values."""
+    fragments = []
+    fallback = encoders.JSONEncoder().default
+
+    def default(obj):
+        if isinstance(obj, JSONFragment):
+            fragments.append(obj)
+            return f'{_FRAGMENT_TOKEN}{len(fragments) - 1}'
+        return fallback(obj)
+
+    if orjson is not None and not indent:
+        body = orjson.dumps(
+            data, default=default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+    else:
+        body = json.dumps(
+            data, default=default, indent=indent, ensure_ascii=False,
+            allow_nan=False, separators=(',', ':') if not indent else None,
+        ).encode('utf-8')
+
+    if fragments:
+        body = _FRAGMENT_RE.sub(lambda match: fragments[int(match.group(1))], body)
+    # Like JSONRenderer: U+2028/U+2029 are valid JSON but break JavaScript string literals
+    return body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        return encode_json(data, indent=self.get_indent(accepted_media_type, renderer_context))
@@ -0,0 +1,195 @@
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.core.cache import cache
+from django.db import connection
+from rest_framework import serializers
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from .renderers import FastJSONRenderer, JSONFragment, encode_json
+
+
+def get_render_cache_timeout():
+    return getattr(settings, 'RENDER_CACHE_TIMEOUT', 600)
+
+
+class RenderCacheMixin:
+    """
+    Cache each instance's encoded representation, keyed by serializer,
+    schema, model, pk and get_render_cache_version(). Hits skip field serialization
+    entirely and are spliced into the response by FastJSONRenderer.
+
+    Only active when the request negotiated FastJSONRenderer, so code that
+    reads serializer.data directly always gets plain dicts. Output must
+    depend on the instance alone (no request-built URLs).
+    """
+
+    def get_render_cache_version(self, instance):
+        """
+        Anything that changes whenever the representation does; None disables
+        caching for instance. Serializers with nested data extend this.
+        """
+        return getattr(instance, 'updated_at', None)
+
+    def _render_cache_enabled(self):
+        request = self.context.get('request')
+        return isinstance(getattr(request, 'accepted_renderer', None), FastJSONRenderer)
+
+    def _render_cache_prefix(self):
+        # The field list is part of the key, so a deploy that changes it never serves old bytes
+        prefix = self.__dict__.get('_render_cache_key_prefix')
+        if prefix is None:
+            cls = type(self)
+            fields = ','.join(self.fields)
+            digest = hashlib.md5(f'{cls.__module__}.{cls.__qualname__}:{fields}'.encode()).hexdigest()
+            prefix = self.__dict__['_render_cache_key_prefix'] = f'render:{digest[:12]}'
+        return prefix
+
+    def get_render_cache_key(self, instance):
+        version = self.get_render_cache_version(instance)
+        if version is None or instance.pk is None:
+            return None
+        version = hashlib.md5(repr(version).encode()).hexdigest()
+        # Pks repeat across tenant schemas
+        return (
+            f'{self._render_cache_prefix()}:{connection.schema_name}:'
+            f'{instance._meta.label_lower}:{instance.pk}:{version}'
+        )
+
+    def to_representation(self, instance):
+        key = self._render_cache_enabled() and self.get_render_cache_key(instance)
+        if not key:
+            return super().to_representation(instance)
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = JSONFragment(encode_json(super().to_representation(instance)))
+            cache.set(key, fragment, get_render_cache_timeout())
+        return fragment
+
+    @property
+    def data(self):
+        data = serializers.BaseSerializer.data.fget(self)
+        if isinstance(data, JSONFragment):
+            return data
+        return ReturnDict(data, serializer=self)
+
+
+# Field types whose to_representation returns a values() result unchanged
+_PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.FloatField,
+)
+
+
+def _compile_converter(field):
+    """Cheapest callable equivalent to field.to_representation for a values() result; None means as-is."""
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return field.pk_field.to_representation if field.pk_field is not None else None
+    if isinstance(field, serializers.ChoiceField) and not isinstance(field, serializers.MultipleChoiceField):
+        return None if all(isinstance(key, str) for key in field.choices) else field.to_representation
+    if isinstance(field, serializers.JSONField):
+        return field.to_representation if field.binary else None
+    if isinstance(field, serializers.ListField):
+        child = _compile_converter(field.child)
+        return None if child is None else field.to_representation
+    if isinstance(field, _PASSTHROUGH_FIELDS):
+        return None
+    return field.to_representation
+
+
+class CompiledSerializer:
+    """
+    Read-only plan for a ModelSerializer that works on values() rows.
+
+    Field introspection, source resolution and converter selection happen
+    once; serializing a row is then a loop over (key, lookup, converter)
+    tuples with no model instances, get_attribute calls or OrderedDicts.
+    Output matches serializer_class(queryset, many=True).data.
+
+    Nested many=True serializers over reverse foreign keys are loaded with
+    one extra values() query each. Anything that needs the instance
+    (SerializerMethodField, properties, many-to-many) can't be compiled and
+    raises ImproperlyConfigured up front.
+    """
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.fields = []
+        self.nested = []
+        lookups = []
+        keys = []
+        for field in serializer._readable_fields:
+            keys.append(field.field_name)
+            if isinstance(field, serializers.ListSerializer):
+                self.nested.append(self._compile_nested(field))
+                continue
+            lookup = self._resolve_lookup(field)
+            lookups.append(lookup)
+            self.fields.append((field.field_name, lookup, _compile_converter(field)))
+        if self.nested:
+            lookups.append('pk')
+        self.lookups = tuple(lookups)
+        # Declared order; nested values are filled into their slots afterwards
+        self.keys = tuple(keys)
+
+    def _resolve_lookup(self, field):
+        if isinstance(field, (serializers.SerializerMethodField, serializers.ManyRelatedField, serializers.BaseSerializer)) \
+                or field.source == '*':
+            raise ImproperlyConfigured(f"{self.model.__name__}.{field.field_name} can't be read from values()")
+        model, model_field = self.model, None
+        for attr in field.source_attrs:
+            try:
+                model_field = model._meta.get_field(attr) if model is not None else None
+            except FieldDoesNotExist:
+                model_field = None
+            if model_field is None or model_field.one_to_many or model_field.many_to_many:
+                raise ImproperlyConfigured(
+                    f"{self.model.__name__}.{field.field_name}: {field.source!r} is not a single-valued model field"
+                )
+            model = model_field.related_model
+        if model_field.is_relation and not isinstance(field, serializers.PrimaryKeyRelatedField):
+            raise ImproperlyConfigured(f"{self.model.__name__}.{field.field_name} renders more than a related pk")
+        return '__'.join(field.source_attrs)
+
+    def _compile_nested(self, field):
+        relation = self.model._meta.get_field(field.source)
+        if not (relation.one_to_many and relation.auto_created):
+            raise ImproperlyConfigured(
+                f"{self.model.__name__}.{field.field_name}: only reverse foreign keys can be nested"
+            )
+        child = compile_serializer(type(field.child))
+        return field.field_name, relation.field.name, child
+
+    def values(self, queryset, *extra):
+        if not queryset.ordered:
+            queryset = queryset.order_by('pk')
+        return queryset.values(*dict.fromkeys(self.lookups + extra))
+
+    def serialize(self, rows):
+        """Representations for values() rows from self.values()."""
+        data = []
+        for row in rows:
+            item = dict.fromkeys(self.keys)
+            for key, lookup, converter in self.fields:
+                value = row[lookup]
+                item[key] = value if converter is None or value is None else converter(value)
+            data.append(item)
+        for key, parent_lookup, child in self.nested:
+            children = {row['pk']: [] for row in rows}
+            queryset = child.model._default_manager.filter(**{f'{parent_lookup}__in': list(children)})
+            child_rows = list(child.values(queryset, parent_lookup))
+            for row, item in zip(child_rows, child.serialize(child_rows)):
+                children[row[parent_lookup]].append(item)
+            for row, item in zip(rows, data):
+                item[key] = children[row['pk']]
+        return data
+
+    def serialize_queryset(self, queryset):
+        return self.serialize(list(self.values(queryset)))
+
+
+@functools.lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    return CompiledSerializer(serializer_class)
@@ -0,0 +1,77 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+ACCESS_LEVELS = ('admin', 'write', 'read')
+
+ACCESS_KEY = 'store_access:{merchant_id}:{version}'
+VERSION_KEY = 'store_access_version:{merchant_id}'
+
+
+def get_store_access_cache_timeout():
+    return getattr(settings, 'STORE_ACCESS_CACHE_TIMEOUT', 300)
+
+
+def _new_version():
+    # Timestamp-based, so a version key lost to eviction never resurrects old maps
+    return int(time.time() * 1000)
+
+
+def _get_version(merchant_id):
+    return cache.get_or_set(VERSION_KEY.format(merchant_id=merchant_id), _new_version(), None)
+
+
+def build_store_access_map(merchant_id):
+    """
+    Query {access_level: [store_id, ...]} for a merchant. Each level lists the
+    stores granted at that level or higher, primary store first, then by name.
+    """
+    from .models import StorePermission
+
+    rows = (
+        StorePermission.objects.filter(merchant_id=merchant_id)
+        .order_by('-store__is_primary_store', 'store__name')
+        .values_list('store_id', 'access_level')
+    )
+    access_map = {level: [] for level in ACCESS_LEVELS}
+    for store_id, access_level in rows:
+        if access_level not in ACCESS_LEVELS:
+            continue
+        for level in ACCESS_LEVELS[ACCESS_LEVELS.index(access_level):]:
+            access_map[level].append(store_id)
+    return access_map
+
+
+def get_store_access_map(merchant_id):
+    """Store access map for merchant_id from the shared cache, built on a miss."""
+    key = ACCESS_KEY.format(merchant_id=merchant_id, version=_get_version(merchant_id))
+    access_map = cache.get(key)
+    if access_map is None:
+        access_map = build_store_access_map(merchant_id)
+        cache.set(key, access_map, get_store_access_cache_timeout())
+    return access_map
+
+
+def get_permitted_store_ids(merchant_id, required_access_level='read'):
+    """Ordered ids of stores merchant_id can access at required_access_level or higher."""
+    if required_access_level not in ACCESS_LEVELS:
+        raise ValueError(f"Unknown access level {required_access_level!r}")
+    return get_store_access_map(merchant_id)[required_access_level]
+
+
+def invalidate_store_access(merchant_id):
+    """
+    Move the merchant's access map version now and again once the change is
+    committed, so a map rebuilt from pre-commit rows in between is never read.
+    """
+    version_key = VERSION_KEY.format(merchant_id=merchant_id)
+
+    def bump():
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            cache.set(version_key, _new_version(), None)
+    bump()
+    transaction.on_commit(bump)
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
 from django_countries.fields import CountryField
@@ -6,6 +6,10 @@ from django.core.validators import URLValidator
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
 from django.utils import timezone
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .access import invalidate_store_access
+from .snapshot import invalidate_storefront_config
     
 
 class Store(models.Model):
@@ -115,6 +119,12 @@ class Store(models.Model):
     def __str__(self):
         return self.name
 
+    def create_default_settings(self):
+        """Insert every one-to-one settings row for this store in one transaction."""
+        with transaction.atomic():
+            for model in (BrandingSettings, BusinessSettings, PaymentSettings, SEOSettings):
+                model.objects.bulk_create([model(store=self)], ignore_conflicts=True)
+
     def clean(self):
         """Ensure slug follows tenant naming rules"""
         if not self.slug.isidentifier():
@@ -134,6 +144,7 @@ class StorePermission(models.Model):
         ],
         default='read'
     )
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
 
     class Meta:
         db_table = 'store_meta_storepermission'
@@ -204,6 +215,8 @@ class BrandingSettings(models.Model):
     # Custom CSS
     custom_css = models.TextField(_('Custom CSS'), blank=True)
     
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
+    
     class Meta:
         verbose_name = _('Branding Settings')
         verbose_name_plural = _('Branding Settings')
@@ -252,6 +265,8 @@ class BusinessSettings(models.Model):
     privacy_policy = models.TextField(_('Privacy Policy'), blank=True)
     terms_of_service = models.TextField(_('Terms of Service'), blank=True)
     
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
+    
     class Meta:
         verbose_name = _('Business Settings')
         verbose_name_plural = _('Business Settings')
@@ -302,6 +317,8 @@ class PaymentSettings(models.Model):
     fraud_prevention_enabled = models.BooleanField(_('Fraud Prevention Enabled'), default=False)
     cvv_required = models.BooleanField(_('CVV Required'), default=True)
     
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
+    
     class Meta:
         verbose_name = _('Payment Settings')
         verbose_name_plural = _('Payment Settings')
@@ -322,6 +339,8 @@ class ShippingZone(models.Model):
     )
     is_default = models.BooleanField(_('Is Default Zone'), default=False)
     
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
+    
     class Meta:
         verbose_name = _('Shipping Zone')
         verbose_name_plural = _('Shipping Zones')
@@ -360,6 +379,8 @@ class ShippingMethod(models.Model):
     
     is_active = models.BooleanField(_('Is Active'), default=True)
     
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
+    
     class Meta:
         verbose_name = _('Shipping Method')
         verbose_name_plural = _('Shipping Methods')
@@ -386,6 +407,8 @@ class TaxSetting(models.Model):
     tax_provider = models.CharField(_('Tax Provider'), max_length=50, blank=True, 
                                   choices=[('avalara', 'Avalara'), ('taxjar', 'TaxJar')])
     
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
+    
     class Meta:
         verbose_name = _('Tax Setting')
         verbose_name_plural = _('Tax Settings')
@@ -441,6 +464,8 @@ class Market(models.Model):
     
     is_active = models.BooleanField(_('Is Active'), default=True)
     
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
+    
     class Meta:
         verbose_name = _('Market')
         verbose_name_plural = _('Markets')
@@ -464,6 +489,8 @@ class SEOSettings(models.Model):
     
     enable_sitemap = models.BooleanField(_('Enable Sitemap'), default=True)
     
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
+    
     class Meta:
         verbose_name = _('SEO Settings')
         verbose_name_plural = _('SEO Settings')
@@ -497,4 +524,56 @@ class StoreProduct(models.Model):
         def __str__(self):
             return f"{self.product.title} - {self.store.name}"
 # except ImportError:
-#     pass  # Oscar not available
\ No newline at end of file
+#     pass  # Oscar not available
+
+
+@receiver(post_save, sender=StorePermission)
+@receiver(post_delete, sender=StorePermission)
+def invalidate_permission_store_access(sender, instance=None, **kwargs):
+    invalidate_store_access(instance.merchant_id)
+
+
+@receiver(post_save, sender=Store)
+def invalidate_store_store_access(sender, instance=None, **kwargs):
+    # Name and primary flag decide the order get_store picks stores in
+    merchant_ids = StorePermission.objects.filter(store=instance).values_list('merchant_id', flat=True)
+    for merchant_id in set(merchant_ids):
+        invalidate_store_access(merchant_id)
+
+
+@receiver(post_save, sender=Store)
+def create_store_default_settings(sender, instance=None, created=False, raw=False, **kwargs):
+    if created and not raw:
+        instance.create_default_settings()
+
+
+@receiver(post_save, sender=Store)
+@receiver(post_delete, sender=Store)
+def invalidate_store_storefront_config(sender, instance=None, **kwargs):
+    invalidate_storefront_config(instance.pk)
+
+
+@receiver(post_save, sender=BrandingSettings)
+@receiver(post_delete, sender=BrandingSettings)
+@receiver(post_save, sender=BusinessSettings)
+@receiver(post_delete, sender=BusinessSettings)
+@receiver(post_save, sender=PaymentSettings)
+@receiver(post_delete, sender=PaymentSettings)
+@receiver(post_save, sender=SEOSettings)
+@receiver(post_delete, sender=SEOSettings)
+@receiver(post_save, sender=ShippingZone)
+@receiver(post_delete, sender=ShippingZone)
+@receiver(post_save, sender=TaxSetting)
+@receiver(post_delete, sender=TaxSetting)
+@receiver(post_save, sender=Market)
+@receiver(post_delete, sender=Market)
+def invalidate_settings_storefront_config(sender, instance=None, **kwargs):
+    invalidate_storefront_config(instance.store_id)
+
+
+@receiver(post_save, sender=ShippingMethod)
+@receiver(post_delete, sender=ShippingMethod)
+def invalidate_shipping_method_storefront_config(sender, instance=None, **kwargs):
+    # The zone may already be gone when it is deleted with its methods; its own signal covers that
+    store_id = ShippingZone.objects.filter(pk=instance.shipping_zone_id).values_list('store_id', flat=True).first()
+    invalidate_storefront_config(store_id)
@@ -2,27 +2,45 @@
 from rest_framework import serializers
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
+from core.serializers import RenderCacheMixin
 from .models import Store, StorePermission
 from .models import (
     Store, StorePermission, BrandingSettings, BusinessSettings, PaymentSettings,
     ShippingZone, ShippingMethod, TaxSetting, Market, SEOSettings, StoreProduct
 )
 
+class EagerLoadingMixin:
+    """
+    Lets a serializer declare the relations it renders, so views can load
+    them up front instead of one query per row.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        return queryset
+
+
 class StorePermissionSerializer(serializers.ModelSerializer):
     """
     Serializer for the StorePermission model.
     """
     class Meta:
         model = StorePermission
-        fields = ['id', 'merchant', 'store', 'created_at', 'access_level']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'merchant', 'store', 'created_at', 'updated_at', 'access_level']
+        read_only_fields = ['id', 'created_at', 'updated_at']
 
     def validate(self, attrs):
         # Additional validations can be added here if needed.
         return attrs
 
 
-class StoreSerializer(serializers.ModelSerializer):
+class StoreSerializer(RenderCacheMixin, EagerLoadingMixin, serializers.ModelSerializer):
     """
     Serializer for the Store (meta) model.
     
@@ -38,6 +56,9 @@ class StoreSerializer(serializers.ModelSerializer):
     # Extra flag to indicate that this request is to terminate the store.
     terminate = serializers.BooleanField(write_only=True, required=False)
     country = serializers.CharField(source='country.code', read_only=True)
+
+    # StorePermissionSerializer renders merchant/store as ids, so no joins are needed beyond the prefetch
+    prefetch_related_fields = ('storepermission_set',)
     class Meta:
         model = Store
         fields = '__all__'
@@ -46,6 +67,11 @@ class StoreSerializer(serializers.ModelSerializer):
             'store_password': {'write_only': True},  # Ensure password is not exposed in responses
         }
 
+    def get_render_cache_version(self, instance):
+        # Permission rows are prefetched, so this costs no queries
+        permissions = tuple((p.pk, p.updated_at) for p in instance.storepermission_set.all())
+        return (instance.updated_at, permissions)
+
 
     def validate(self, attrs):
         """
@@ -205,4 +231,94 @@ class StoreProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = StoreProduct
-        fields = ['id', 'store', 'product', 'product_title', 'is_active', 'sort_order']
\ No newline at end of file
+        fields = ['id', 'store', 'product', 'product_title', 'is_active', 'sort_order']
+
+# Storefront config snapshot: only what a public storefront may see.
+
+class StorefrontStoreSerializer(serializers.ModelSerializer):
+    country = serializers.CharField(source='country.code', read_only=True)
+
+    class Meta:
+        model = Store
+        fields = [
+            'id', 'name', 'slug', 'legal_business_name', 'primary_domain', 'contact_email',
+            'contact_phone', 'address_line1', 'address_line2', 'city', 'state_province',
+            'postal_code', 'country', 'timezone', 'default_currency', 'weight_unit',
+            'dimension_unit', 'is_active', 'description', 'password_protected', 'updated_at',
+        ]
+
+
+class StorefrontBrandingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BrandingSettings
+        exclude = ['id', 'store']
+
+
+class StorefrontBusinessSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BusinessSettings
+        fields = [
+            'include_tax_in_prices', 'charge_tax_on_shipping', 'customer_accounts_required',
+            'default_marketing_opt_in', 'google_analytics_id', 'facebook_pixel_id',
+            'refund_policy', 'privacy_policy', 'terms_of_service',
+        ]
+
+
+class StorefrontPaymentSerializer(serializers.ModelSerializer):
+    """Publishable keys only; secrets and API keys never leave the admin API."""
+    class Meta:
+        model = PaymentSettings
+        fields = [
+            'stripe_enabled', 'stripe_public_key', 'paypal_enabled', 'paypal_client_id',
+            'allow_credit_cards', 'accepted_card_brands', 'apple_pay_enabled', 'google_pay_enabled',
+            'bank_transfer_enabled', 'bank_transfer_instructions', 'cash_on_delivery_enabled',
+            'cash_on_delivery_instructions', 'multi_currency_enabled', 'installments_enabled',
+            'cvv_required',
+        ]
+
+
+class StorefrontSEOSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SEOSettings
+        exclude = ['id', 'store']
+
+
+class StorefrontShippingMethodSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ShippingMethod
+        exclude = ['shipping_zone', 'carrier_account_id', 'is_active']
+
+
+class StorefrontShippingZoneSerializer(serializers.ModelSerializer):
+    shipping_methods = StorefrontShippingMethodSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ShippingZone
+        fields = ['id', 'name', 'countries', 'is_default', 'shipping_methods']
+
+
+class StorefrontTaxSettingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TaxSetting
+        exclude = ['store', 'tax_registration_number']
+
+
+class StorefrontMarketSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Market
+        exclude = ['store', 'is_active']
+
+
+class StorefrontConfigSerializer(serializers.Serializer):
+    """
+    Everything a storefront needs to boot, from a Store loaded with
+    storefront_config_queryset(). Missing one-to-one settings render as null.
+    """
+    store = StorefrontStoreSerializer(source='*', read_only=True)
+    branding = StorefrontBrandingSerializer(read_only=True)
+    business = StorefrontBusinessSerializer(source='business_settings', read_only=True)
+    payments = StorefrontPaymentSerializer(source='payment_settings', read_only=True)
+    seo = StorefrontSEOSerializer(source='seo_settings', read_only=True)
+    shipping_zones = StorefrontShippingZoneSerializer(many=True, read_only=True)
+    tax_settings = StorefrontTaxSettingSerializer(many=True, read_only=True)
+    markets = StorefrontMarketSerializer(many=True, read_only=True)
@@ -0,0 +1,85 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch
+
+logger = logging.getLogger(__name__)
+
+CONFIG_KEY = 'storefront_config:{store_id}'
+
+
+def get_storefront_config_cache_timeout():
+    return getattr(settings, 'STOREFRONT_CONFIG_CACHE_TIMEOUT', 3600)
+
+
+def storefront_config_queryset():
+    """
+    Store with every storefront setting loaded in five queries. Only active
+    shipping methods are listed, and only zones that have one: ShippingZone
+    has no active flag of its own.
+    """
+    from .models import Market, ShippingMethod, ShippingZone, Store
+
+    active_methods = ShippingMethod.objects.filter(is_active=True)
+    return Store.objects.select_related(
+        'branding', 'business_settings', 'payment_settings', 'seo_settings'
+    ).prefetch_related(
+        Prefetch(
+            'shipping_zones',
+            queryset=ShippingZone.objects.filter(Exists(active_methods.filter(shipping_zone=OuterRef('pk')))),
+        ),
+        Prefetch('shipping_zones__shipping_methods', queryset=active_methods),
+        'tax_settings',
+        Prefetch('markets', queryset=Market.objects.filter(is_active=True)),
+    )
+
+
+def build_storefront_config(store_id):
+    """
+    Render the storefront snapshot for store_id as {'version', 'etag', 'body'}
+    (body is JSON bytes), or None if the store does not exist.
+    """
+    from core.renderers import encode_json
+    from .serializers import StorefrontConfigSerializer
+
+    store = storefront_config_queryset().filter(pk=store_id).first()
+    if store is None:
+        return None
+    data = StorefrontConfigSerializer(store).data
+    # Content hash, so a rebuild that changes nothing keeps clients' ETags valid
+    version = hashlib.sha1(encode_json(data)).hexdigest()
+    body = encode_json(dict(data, version=version))
+    return {'version': version, 'etag': f'"{version}"', 'body': body}
+
+
+def refresh_storefront_config(store_id):
+    snapshot = build_storefront_config(store_id)
+    key = CONFIG_KEY.format(store_id=store_id)
+    if snapshot is None:
+        cache.delete(key)
+    else:
+        cache.set(key, snapshot, get_storefront_config_cache_timeout())
+        logger.debug("Rebuilt storefront config for store %s (%s)", store_id, snapshot['version'][:12])
+    return snapshot
+
+
+def get_storefront_config(store_id):
+    """Cached snapshot for store_id, built on a miss."""
+    snapshot = cache.get(CONFIG_KEY.format(store_id=store_id))
+    if snapshot is None:
+        snapshot = refresh_storefront_config(store_id)
+    return snapshot
+
+
+def invalidate_storefront_config(store_id):
+    """
+    Drop the snapshot now and rebuild it once the change is committed, so
+    the rebuild never reads uncommitted or rolled-back rows.
+    """
+    if store_id is None:
+        return
+    cache.delete(CONFIG_KEY.format(store_id=store_id))
+    transaction.on_commit(lambda: refresh_storefront_config(store_id))
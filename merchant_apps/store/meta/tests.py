@@ -1,3 +1,161 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django_tenants.test.cases import TenantTestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.serializers import compile_serializer
+from .access import ACCESS_KEY, VERSION_KEY, get_store_access_map
+from .models import Market, ShippingMethod, ShippingZone, Store, StorePermission, TaxSetting
+from .serializers import (
+    MarketSerializer, ShippingMethodSerializer, ShippingZoneSerializer, StorefrontConfigSerializer, TaxSettingSerializer,
+)
+from .snapshot import storefront_config_queryset
+from .views import ShippingMethodsAPIView, StoreViewSet
+
+
+class StoreViewSetQueryCountTests(TenantTestCase):
+
+    @classmethod
+    def setup_tenant(cls, tenant):
+        tenant.name = 'Query Count Merchant'
+        tenant.contact_email = 'query-count@example.com'
+        tenant.auto_create_admin = False
+
+    def _create_stores(self, count, start=0):
+        for number in range(start, start + count):
+            store = Store.objects.create(name=f'Store {number}', slug=f'store_{number}')
+            StorePermission.objects.create(merchant=self.tenant, store=store, access_level='admin')
+
+    def _list_query_count(self):
+        request = APIRequestFactory().get('/store/api/stores/')
+        request.tenant = self.tenant
+        force_authenticate(request, user=get_user_model()(email='viewer@example.com'))
+        view = StoreViewSet.as_view({'get': 'list'})
+        with CaptureQueriesContext(connection) as ctx:
+            response = view(request)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.data['count']
+
+    def test_list_query_count_does_not_grow_with_stores(self):
+        self._create_stores(1)
+        queries_for_one, count = self._list_query_count()
+        self.assertEqual(count, 1)
+
+        self._create_stores(7, start=1)
+        queries_for_many, count = self._list_query_count()
+        self.assertEqual(count, 8)
+
+        self.assertEqual(queries_for_one, queries_for_many)
+
+
+class CompiledSerializerTests(TenantTestCase):
+
+    @classmethod
+    def setup_tenant(cls, tenant):
+        tenant.name = 'Compiled Serializer Merchant'
+        tenant.contact_email = 'compiled@example.com'
+        tenant.auto_create_admin = False
+
+    def setUp(self):
+        self.store = Store.objects.create(name='Compiled', slug='compiled')
+        for number in range(3):
+            zone = ShippingZone.objects.create(store=self.store, name=f'Zone {number}', countries=['US', 'CA'])
+            for method in range(number):
+                ShippingMethod.objects.create(
+                    shipping_zone=zone, name=f'Method {method}', price=Decimal('4.50'),
+                    method_type='flat',
+                    min_order_price=Decimal('10') if method else None,
+                )
+        Market.objects.create(
+            store=self.store, name='North America', countries=['US', 'CA'], base_currency='USD',
+            price_adjustment_type='percentage', price_adjustment_value=Decimal('2.5'),
+        )
+        TaxSetting.objects.create(
+            store=self.store, country='US', tax_rate=Decimal('8.25'), product_type_overrides={'books': 0},
+        )
+
+    def assertCompiledMatches(self, serializer_class, queryset):
+        queryset = queryset.order_by('pk')
+        expected = serializer_class(queryset, many=True).data
+        self.assertEqual(compile_serializer(serializer_class).serialize_queryset(queryset), expected)
+
+    def test_nested_reverse_foreign_key(self):
+        self.assertCompiledMatches(ShippingZoneSerializer, ShippingZone.objects.filter(store=self.store))
+
+    def test_flat_serializers(self):
+        self.assertCompiledMatches(MarketSerializer, Market.objects.filter(store=self.store))
+        self.assertCompiledMatches(TaxSettingSerializer, TaxSetting.objects.filter(store=self.store))
+
+    def test_shipping_methods_endpoint(self):
+        StorePermission.objects.create(merchant=self.tenant, store=self.store, access_level='read')
+        zone = ShippingZone.objects.get(store=self.store, name='Zone 2')
+        request = APIRequestFactory().get(f'/store/api/shipping/{zone.pk}/methods/')
+        request.tenant = self.tenant
+        force_authenticate(request, user=get_user_model()(email='viewer@example.com'))
+        response = ShippingMethodsAPIView.as_view()(request, zone_id=zone.pk)
+        self.assertEqual(response.status_code, 200)
+        expected = ShippingMethodSerializer(zone.shipping_methods.order_by('pk'), many=True).data
+        self.assertEqual(sorted(response.data['results'], key=lambda method: method['id']), expected)
+
+
+class StorefrontConfigTests(TenantTestCase):
+
+    @classmethod
+    def setup_tenant(cls, tenant):
+        tenant.name = 'Storefront Merchant'
+        tenant.contact_email = 'storefront@example.com'
+        tenant.auto_create_admin = False
+
+    def test_lists_only_zones_with_active_methods(self):
+        store = Store.objects.create(name='Storefront', slug='storefront')
+        active = ShippingZone.objects.create(store=store, name='Active', countries=['US'])
+        ShippingMethod.objects.create(shipping_zone=active, name='Ground', price=Decimal('5'), method_type='flat')
+        ShippingMethod.objects.create(
+            shipping_zone=active, name='Retired', price=Decimal('9'), method_type='flat', is_active=False,
+        )
+        retired = ShippingZone.objects.create(store=store, name='Retired', countries=['CA'])
+        ShippingMethod.objects.create(
+            shipping_zone=retired, name='Old', price=Decimal('7'), method_type='flat', is_active=False,
+        )
+        ShippingZone.objects.create(store=store, name='Empty', countries=['MX'])
+
+        data = StorefrontConfigSerializer(storefront_config_queryset().get(pk=store.pk)).data
+        self.assertEqual([zone['name'] for zone in data['shipping_zones']], ['Active'])
+        self.assertEqual([method['name'] for method in data['shipping_zones'][0]['shipping_methods']], ['Ground'])
+
+
+class StoreAccessCacheTests(TenantTestCase):
+
+    @classmethod
+    def setup_tenant(cls, tenant):
+        tenant.name = 'Store Access Merchant'
+        tenant.contact_email = 'store-access@example.com'
+        tenant.auto_create_admin = False
+
+    def setUp(self):
+        cache.clear()
+        self.store = Store.objects.create(name='Access', slug='access')
+        self.permission = StorePermission.objects.create(merchant=self.tenant, store=self.store, access_level='admin')
+
+    def test_version_moves_again_on_commit(self):
+        self.assertEqual(get_store_access_map(self.tenant.pk)['read'], [self.store.pk])
+        version_key = VERSION_KEY.format(merchant_id=self.tenant.pk)
+        callbacks = []
+        with mock.patch('django.db.transaction.on_commit', callbacks.append):
+            self.permission.delete()
+        self.assertEqual(len(callbacks), 1)
+
+        # A reader racing the commit caches the revoked map under the new version
+        stale_version = cache.get(version_key)
+        cache.set(ACCESS_KEY.format(merchant_id=self.tenant.pk, version=stale_version), {
+            'admin': [self.store.pk], 'write': [self.store.pk], 'read': [self.store.pk],
+        })
+        callbacks[0]()
+        self.assertNotEqual(cache.get(version_key), stale_version)
+        self.assertEqual(get_store_access_map(self.tenant.pk)['read'], [])
@@ -14,6 +14,7 @@ from .views import (
     MarketsAPIView,
     MarketDetailAPIView,
     SEOSettingsAPIView,
+    StorefrontConfigAPIView,
 )
 
 # Set up the router for viewsets
@@ -41,4 +42,5 @@ urlpatterns = [
     path('api/markets/', MarketsAPIView.as_view(), name='markets'),
     path('api/markets/<int:pk>/', MarketDetailAPIView.as_view(), name='market_detail'),
     path('api/seo/', SEOSettingsAPIView.as_view(), name='seo'),
+    path('api/config/', StorefrontConfigAPIView.as_view(), name='storefront_config'),
 ]
\ No newline at end of file
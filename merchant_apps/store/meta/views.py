@@ -1,11 +1,18 @@
 
-from django.http import Http404
+import hashlib
+from calendar import timegm
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_tenants.utils import tenant_context, get_tenant_model 
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from .models import (
     Store, BrandingSettings, BusinessSettings, PaymentSettings,
@@ -17,11 +24,15 @@ from .serializers import (
     TaxSettingSerializer, MarketSerializer, SEOSettingsSerializer,StorePermissionSerializer
 )
 from rest_framework.views import APIView
-from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView, UpdateAPIView
+from rest_framework.generics import ListCreateAPIView, RetrieveUpdateAPIView, RetrieveUpdateDestroyAPIView
 
 
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied
+from .access import get_permitted_store_ids, invalidate_store_access
 from .models import Store, StorePermission
+from .snapshot import get_storefront_config
+from core.pagination import KeysetPagination
+from core.serializers import compile_serializer
 
 class StoreContextMixin:
     """
@@ -31,6 +42,9 @@ class StoreContextMixin:
         """
         Get the current shop for the logged-in merchant, ensuring StorePermission.
         Default required access: 'read'. Use 'write' or 'admin' as appropriate.
+
+        Memoized on the request, and the merchant's permitted store ids come
+        from a shared cache invalidated on StorePermission and Store changes.
         """
         request = getattr(self, 'request', None)
         merchant = getattr(request, 'tenant', None) if request else None
@@ -38,30 +52,147 @@ class StoreContextMixin:
         if not merchant:
             raise PermissionDenied("Merchant context required.")
 
-        # Find the store, checking StorePermission for this merchant and at least the required access level.
-        # Adjust as needed if your store/user logic differs.
-        try:
-            # Looks for at least the required access; you can create a hierarchy if needed.
-            valid_levels = ['admin', 'write', 'read']
-            # Only access levels equal or higher than required_access_level count as valid
-            req_index = valid_levels.index(required_access_level)
-            allowed_levels = valid_levels[:req_index+1]
-
-            # Find store IDs where this merchant has required permission
-            permitted_store_ids = StorePermission.objects.filter(
-                merchant=merchant,
-                access_level__in=allowed_levels
-            ).values_list('store_id', flat=True)
-
-            store = Store.objects.filter(id__in=permitted_store_ids).order_by('-is_primary_store', 'name').first()
-            if not store:
-                raise PermissionDenied("No accessible shop found for current merchant.")
-            return store
-        except Store.DoesNotExist:
+        # Memoize on the HttpRequest, so get_queryset and perform_create share it
+        http_request = getattr(request, '_request', request)
+        stores = http_request.__dict__.setdefault('_store_context_cache', {})
+        if required_access_level in stores:
+            return stores[required_access_level]
+
+        permitted_store_ids = get_permitted_store_ids(merchant.id, required_access_level)
+        store = Store.objects.filter(id=permitted_store_ids[0]).first() if permitted_store_ids else None
+        if store is None and permitted_store_ids:
+            # The cached ids went stale between invalidation and this request
+            invalidate_store_access(merchant.id)
+            permitted_store_ids = get_permitted_store_ids(merchant.id, required_access_level)
+            store = Store.objects.filter(id__in=permitted_store_ids[:1]).first()
+        if not store:
+            raise PermissionDenied("No accessible shop found for current merchant.")
+
+        stores[required_access_level] = store
+        return store
+
+    def get_store_id(self, required_access_level='read'):
+        """Id of the store get_store() would return, from the shared cache without querying Store."""
+        request = getattr(self, 'request', None)
+        merchant = getattr(request, 'tenant', None) if request else None
+
+        if not merchant:
+            raise PermissionDenied("Merchant context required.")
+
+        permitted_store_ids = get_permitted_store_ids(merchant.id, required_access_level)
+        if not permitted_store_ids:
             raise PermissionDenied("No accessible shop found for current merchant.")
+        return permitted_store_ids[0]
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified on GET, derived from updated_at, so a 304 is
+    answered without serializing anything. etag_related lists reverse
+    relations (with their own updated_at) that the response also renders.
+    """
+    etag_related = ()
+
+    def _related_aggregates(self, prefix=''):
+        aggregates = {}
+        for relation in self.etag_related:
+            aggregates[f'{relation}_count'] = Count(f'{prefix}{relation}', distinct=True)
+            aggregates[f'{relation}_updated'] = Max(f'{prefix}{relation}__updated_at')
+        return aggregates
+
+    def _make_validators(self, parts, timestamps):
+        etag = quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+        timestamps = [timestamp for timestamp in timestamps if timestamp]
+        return etag, max(timestamps) if timestamps else None
+
+    def get_object_validators(self, obj):
+        parts = [obj._meta.label, obj.pk, obj.updated_at]
+        timestamps = [obj.updated_at]
+        if self.etag_related:
+            values = type(obj).objects.filter(pk=obj.pk).aggregate(**self._related_aggregates())
+            parts.append(sorted(values.items()))
+            timestamps.extend(value for key, value in values.items() if key.endswith('_updated'))
+        return self._make_validators(parts, timestamps)
+
+    def get_queryset_validators(self, queryset):
+        values = queryset.order_by().aggregate(
+            count=Count('pk', distinct=True), updated=Max('updated_at'), **self._related_aggregates()
+        )
+        parts = [queryset.model._meta.label, sorted(values.items())]
+        timestamps = [value for key, value in values.items() if key.endswith('updated')]
+        return self._make_validators(parts, timestamps)
+
+    def conditional_response(self, request, validators, render):
+        """Return a 304/412 if the request's preconditions allow it, else render() with validators set."""
+        etag, last_modified = validators
+        last_modified = last_modified and timegm(last_modified.utctimetuple())
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = render()
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self.conditional_response(
+            request, self.get_object_validators(instance),
+            lambda: Response(self.get_serializer(instance).data),
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(
+            request, self.get_queryset_validators(queryset),
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+
+class CompiledListMixin:
+    """
+    list() from a read-only plan compiled off serializer_class and fed by
+    values() rows, instead of a ModelSerializer per instance. Output is the
+    same; writes still go through serializer_class.
+    """
+
+    def list(self, request, *args, **kwargs):
+        compiled = compile_serializer(self.get_serializer_class())
+        queryset = compiled.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.serialize(page))
+        return Response(compiled.serialize(list(queryset)))
+
+
+class StoreSettingsObjectMixin(StoreContextMixin):
+    """
+    Serve a store's one-to-one settings row without writing on reads: when
+    no row exists yet an unsaved default instance stands in, and the row is
+    only inserted by the first update.
+    """
+    settings_model = None
+
+    def get_object(self):
+        store = self.get_store()
+        try:
+            return self.settings_model.objects.get(store=store)
+        except self.settings_model.DoesNotExist:
+            return self.settings_model(store=store)
+
+    def perform_update(self, serializer):
+        if serializer.instance.pk is not None:
+            return super().perform_update(serializer)
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            # A concurrent first write created the row; apply this update to it
+            serializer.instance = self.settings_model.objects.get(store=serializer.instance.store)
+            serializer.save()
+
 
-        
-        
 class StoreViewSet(viewsets.ModelViewSet, StoreContextMixin):
     serializer_class = StoreSerializer
     # permission_classes = [IsAuthenticated]
@@ -69,7 +200,8 @@ class StoreViewSet(viewsets.ModelViewSet, StoreContextMixin):
 
     def get_queryset(self):
         """Only show stores accessible to current merchant"""
-        return Store.objects.filter(merchants=self.request.tenant)
+        queryset = Store.objects.filter(merchants=self.request.tenant)
+        return self.get_serializer_class().setup_eager_loading(queryset)
 
     @action(detail=True, methods=['get'], url_path='products', url_name='products')
     def products(self, request, pk=None):
@@ -101,68 +233,66 @@ class StoreViewSet(viewsets.ModelViewSet, StoreContextMixin):
 class StoreAccessViewSet(viewsets.ModelViewSet):
     queryset = StorePermission.objects.all()
     serializer_class = StorePermissionSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return super().get_queryset().filter(merchant=self.request.tenant)
 
 
-class StoreDashboardAPIView(StoreContextMixin,APIView):
+class StoreDashboardAPIView(StoreContextMixin, ConditionalGetMixin, APIView):
     """API view for the store dashboard."""
     # authentication_classes = [JWTAuthentication]
     # permission_classes = [IsAuthenticated]
     
+    etag_related = ('storepermission',)
+
     def get(self, request):
         store = self.get_store()
-        serializer = StoreSerializer(store)
-        return Response(serializer.data)
+        return self.conditional_response(
+            request, self.get_object_validators(store),
+            lambda: Response(StoreSerializer(store).data),
+        )
 
-class StoreSettingsAPIView(StoreContextMixin, UpdateAPIView):
+class StoreSettingsAPIView(StoreContextMixin, ConditionalGetMixin, RetrieveUpdateAPIView):
     """API view for updating general store settings."""
     # authentication_classes = [JWTAuthentication]
     # permission_classes = [IsAuthenticated]
     serializer_class = StoreSerializer
+    etag_related = ('storepermission',)
     
     def get_object(self):
         return self.get_store()
 
-class BrandingSettingsAPIView(StoreContextMixin, UpdateAPIView):
+class BrandingSettingsAPIView(StoreSettingsObjectMixin, ConditionalGetMixin, RetrieveUpdateAPIView):
     """API view for updating store branding settings."""
     # authentication_classes = [JWTAuthentication]
     # permission_classes = [IsAuthenticated]
     serializer_class = BrandingSettingsSerializer
     
-    def get_object(self):
-        store = self.get_store()
-        obj, created = BrandingSettings.objects.get_or_create(store=store)
-        return obj
+    settings_model = BrandingSettings
 
-class BusinessSettingsAPIView(StoreContextMixin, UpdateAPIView):
+class BusinessSettingsAPIView(StoreSettingsObjectMixin, ConditionalGetMixin, RetrieveUpdateAPIView):
     """API view for updating business operational settings."""
     # authentication_classes = [JWTAuthentication]
     # permission_classes = [IsAuthenticated]
     serializer_class = BusinessSettingsSerializer
     
-    def get_object(self):
-        store = self.get_store()
-        obj, created = BusinessSettings.objects.get_or_create(store=store)
-        return obj
+    settings_model = BusinessSettings
 
-class PaymentSettingsAPIView(StoreContextMixin, UpdateAPIView):
+class PaymentSettingsAPIView(StoreSettingsObjectMixin, ConditionalGetMixin, RetrieveUpdateAPIView):
     """API view for updating payment gateway settings."""
     # authentication_classes = [JWTAuthentication]
     # permission_classes = [IsAuthenticated]
     serializer_class = PaymentSettingsSerializer
     
-    def get_object(self):
-        store = self.get_store()
-        obj, created = PaymentSettings.objects.get_or_create(store=store)
-        return obj
+    settings_model = PaymentSettings
 
-class ShippingZonesAPIView(StoreContextMixin, ListCreateAPIView):
+class ShippingZonesAPIView(StoreContextMixin, ConditionalGetMixin, CompiledListMixin, ListCreateAPIView):
     """API view for listing and creating shipping zones."""
     # authentication_classes = [JWTAuthentication]
     # permission_classes = [IsAuthenticated]
     serializer_class = ShippingZoneSerializer
+    etag_related = ('shipping_methods',)
     
     def get_queryset(self):
         store = self.get_store()
@@ -172,17 +302,18 @@ class ShippingZonesAPIView(StoreContextMixin, ListCreateAPIView):
         store = self.get_store()
         serializer.save(store=store)
 
-class ShippingZoneDetailAPIView(StoreContextMixin, RetrieveUpdateDestroyAPIView):
+class ShippingZoneDetailAPIView(StoreContextMixin, ConditionalGetMixin, RetrieveUpdateDestroyAPIView):
     """API view for managing a specific shipping zone."""
     # authentication_classes = [JWTAuthentication]
     # permission_classes = [IsAuthenticated]
     serializer_class = ShippingZoneSerializer
+    etag_related = ('shipping_methods',)
     
     def get_queryset(self):
         store = self.get_store()
         return ShippingZone.objects.filter(store=store)
 
-class ShippingMethodsAPIView(StoreContextMixin, ListCreateAPIView):
+class ShippingMethodsAPIView(StoreContextMixin, ConditionalGetMixin, CompiledListMixin, ListCreateAPIView):
     """API view for listing and creating shipping methods for a zone."""
     # authentication_classes = [JWTAuthentication]
     # permission_classes = [IsAuthenticated]
@@ -191,13 +322,13 @@ class ShippingMethodsAPIView(StoreContextMixin, ListCreateAPIView):
     def get_queryset(self):
         store = self.get_store()
         zone_id = self.kwargs.get('zone_id')
-        return ShippingMethod.objects.filter(shipping_zone__shop=store, shipping_zone_id=zone_id)
+        return ShippingMethod.objects.filter(shipping_zone__store=store, shipping_zone_id=zone_id)
     
     def perform_create(self, serializer):
         zone = get_object_or_404(ShippingZone, id=self.kwargs.get('zone_id'), store=self.get_store())
         serializer.save(shipping_zone=zone)
 
-class TaxSettingsAPIView(StoreContextMixin, ListCreateAPIView):
+class TaxSettingsAPIView(StoreContextMixin, ConditionalGetMixin, CompiledListMixin, ListCreateAPIView):
     """API view for managing tax settings across regions."""
     # authentication_classes = [JWTAuthentication]
     # permission_classes = [IsAuthenticated]
@@ -211,7 +342,7 @@ class TaxSettingsAPIView(StoreContextMixin, ListCreateAPIView):
         store = self.get_store()
         serializer.save(store=store)
 
-class MarketsAPIView(StoreContextMixin, ListCreateAPIView):
+class MarketsAPIView(StoreContextMixin, ConditionalGetMixin, CompiledListMixin, ListCreateAPIView):
     """API view for listing and creating markets."""
     # authentication_classes = [JWTAuthentication]
     # permission_classes = [IsAuthenticated]
@@ -225,7 +356,7 @@ class MarketsAPIView(StoreContextMixin, ListCreateAPIView):
         store = self.get_store()
         serializer.save(store=store)
 
-class MarketDetailAPIView(StoreContextMixin, RetrieveUpdateDestroyAPIView):
+class MarketDetailAPIView(StoreContextMixin, ConditionalGetMixin, RetrieveUpdateDestroyAPIView):
     """API view for managing a specific market."""
     # authentication_classes = [JWTAuthentication]
     # permission_classes = [IsAuthenticated]
@@ -235,13 +366,33 @@ class MarketDetailAPIView(StoreContextMixin, RetrieveUpdateDestroyAPIView):
         store = self.get_store()
         return Market.objects.filter(store=store)
 
-class SEOSettingsAPIView(StoreContextMixin, UpdateAPIView):
+class SEOSettingsAPIView(StoreSettingsObjectMixin, ConditionalGetMixin, RetrieveUpdateAPIView):
     """API view for updating SEO and marketing settings."""
     # authentication_classes = [JWTAuthentication]
     # permission_classes = [IsAuthenticated]
     serializer_class = SEOSettingsSerializer
     
-    def get_object(self):
-        store = self.get_store()
-        obj, created = SEOSettings.objects.get_or_create(store=store)
-        return obj
+    settings_model = SEOSettings
+
+
+class StorefrontConfigAPIView(StoreContextMixin, APIView):
+    """
+    Everything a storefront needs to boot in one response: the store's
+    materialized config snapshot, served from cache with ETag revalidation.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        snapshot = get_storefront_config(self.get_store_id())
+        if snapshot is None:
+            raise NotFound("Store not found.")
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        etags = [tag.strip() for tag in if_none_match.split(',')]
+        if snapshot['etag'] in etags or '*' in etags:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(snapshot['body'], content_type='application/json')
+        response['ETag'] = snapshot['etag']
+        patch_cache_control(response, no_cache=True)
+        return response
@@ -1,9 +1,44 @@
+from itertools import chain
+
 from oscar.apps.offer.applicator import Applicator as BaseApplicator
-from .models import ConditionalOffer 
+
+from .combination import OfferCombinationSolver
+from .index import get_offer_index
+
 
 class Applicator(BaseApplicator):
-    def get_offers(self, basket, user=None):
-        offers = super().get_offers(basket, user)
-        if basket.store:
-            offers = offers.filter(store=basket.store)
-        return offers
\ No newline at end of file
+    """
+    Site offers for a store's basket come from the store's offer index, so
+    recalculating a basket doesn't query offers, conditions or ranges. When
+    more than one offer is available, OfferCombinationSolver picks the set
+    giving the largest discount instead of Oscar's apply-everything loop.
+    """
+
+    def apply_offers(self, basket, offers):
+        if len(offers) < 2:
+            # Nothing to choose between; don't leave an earlier recalculation's result behind
+            basket.offer_combination = None
+            return super().apply_offers(basket, offers)
+        result = OfferCombinationSolver(basket, offers).solve()
+        basket.offer_applications = result.applications
+        # Chosen offers and search stats, for debugging
+        basket.offer_combination = result
+
+    def get_offers(self, basket, user=None, request=None):
+        store_id = getattr(basket, 'store_id', None)
+        if store_id is None:
+            return super().get_offers(basket, user, request)
+
+        index = get_offer_index(store_id)
+        site_offers = index.get_offers()
+        basket_offers = [
+            offer for offer in self.get_basket_offers(basket, user) if offer.store_id == store_id
+        ]
+        for offer in basket_offers:
+            index.combinations.attach(offer)
+        user_offers = self.get_user_offers(user)
+        session_offers = self.get_session_offers(request)
+
+        return list(sorted(chain(
+            session_offers, basket_offers, user_offers, site_offers),
+            key=lambda o: o.priority, reverse=True))
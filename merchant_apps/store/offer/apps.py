@@ -8,10 +8,16 @@ class OfferConfig(OscarOfferConfig):
     verbose_name = 'Store Offers'
 
     def ready(self):
+        from django.db.models.signals import m2m_changed
+        from oscar.core.loading import get_model
         from .models import (
-            ConditionalOffer, Range, Benefit, Condition
+            ConditionalOffer, Range, Benefit, Condition, update_product_categories_range_memberships
         )
         super().ready()
+        m2m_changed.connect(
+            update_product_categories_range_memberships,
+            sender=get_model('catalogue', 'Product').categories.through,
+        )
         # Dynamically override Oscar's OfferApplications
         from oscar.apps.offer import results as oscar_results
         from .results import OfferApplications
@@ -0,0 +1,257 @@
+"""
+Best-discount selection among the offers available to a basket.
+
+Oscar applies every available offer in priority order and keeps whatever
+each one manages to discount, so a higher priority offer can block better
+ones on the same lines (exclusive offers, or offers whose
+ConditionalOfferCombination rows don't pair them). The solver looks for the
+subset of offers, still applied in priority order, that gives the largest
+basket discount:
+
+* Offers only interact through the basket lines they share, so candidates
+  are split into groups with overlapping lines and each group is searched
+  on its own.
+* Within a group, a branch and bound over include/exclude decisions, bounded
+  by each remaining offer's discount on its own: other offers only consume
+  lines, so an offer never adds more than that to a set.
+* Condition results are memoized per offer and per quantities still
+  available to it on its lines, so re-applying a set doesn't re-run them.
+* OFFER_COMBINATION_TIME_BUDGET caps the search. The best set found so far
+  is used, starting from Oscar's own result, so the solver never gives a
+  smaller discount than the greedy loop.
+
+Which offers may share lines comes from the store's CombinationGraph, built
+once with its offer index (see offer.index).
+"""
+import logging
+import time
+from collections import defaultdict
+from decimal import Decimal as D
+
+from django.conf import settings
+from oscar.core.loading import get_class, get_model
+
+logger = logging.getLogger(__name__)
+
+OfferApplications = get_class('offer.results', 'OfferApplications')
+
+
+def get_combination_time_budget():
+    return getattr(settings, 'OFFER_COMBINATION_TIME_BUDGET', 0.05)
+
+
+class CombinationGraph:
+    """
+    A store's ConditionalOfferCombination rows as adjacency sets.
+
+    Attached to offers as combination_ids and declares_combinations, which
+    the basket's LineOfferConsumer reads instead of querying per line.
+    """
+
+    def __init__(self, pairs):
+        self.declared = set()
+        self.neighbours = defaultdict(set)
+        for primary_id, secondary_id in pairs:
+            self.declared.add(primary_id)
+            self.neighbours[primary_id].add(secondary_id)
+            self.neighbours[secondary_id].add(primary_id)
+
+    @classmethod
+    def build(cls, store_id):
+        ConditionalOfferCombination = get_model('offer', 'ConditionalOfferCombination')
+
+        return cls(
+            ConditionalOfferCombination.objects.filter(primary__store_id=store_id)
+            .values_list('primary_id', 'secondary_id')
+        )
+
+    def attach(self, offer):
+        offer.__dict__['combination_ids'] = frozenset(self.neighbours.get(offer.pk, ()))
+        offer.__dict__['declares_combinations'] = offer.pk in self.declared
+
+
+class OutOfTime(Exception):
+    pass
+
+
+class CombinationResult:
+
+    def __init__(self, offers, discount, applications, stats):
+        self.offers = offers
+        self.discount = discount
+        self.applications = applications
+        self.stats = stats
+
+    def __repr__(self):
+        return f'<CombinationResult offers={[offer.pk for offer in self.offers]} discount={self.discount}>'
+
+
+class OfferCombinationSolver:
+
+    def __init__(self, basket, offers, time_budget=None):
+        self.basket = basket
+        # Priority order, as the applicator sorted them; every set is applied in this order
+        self.offers = list(offers)
+        self.position = {offer.pk: n for n, offer in enumerate(self.offers)}
+        self.lines = list(basket.all_lines())
+        self.time_budget = get_combination_time_budget() if time_budget is None else time_budget
+
+        # Proxies look their range up on first use; build them once per solve
+        self._proxies = {offer.pk: (offer.condition.proxy(), offer.benefit.proxy()) for offer in self.offers}
+        self._offer_lines = {offer.pk: self._lines_for(offer) for offer in self.offers}
+        self._max_applications = {}
+        self._conditions = {}
+        self._values = {}
+        self._affects_other = set()
+        self.stats = {
+            'offers': len(self.offers), 'candidates': 0, 'groups': 0, 'evaluations': 0, 'pruned': 0,
+            'condition_hits': 0, 'condition_misses': 0, 'timed_out': False,
+        }
+
+    def _lines_for(self, offer):
+        condition, benefit = self._proxies[offer.pk]
+        if condition.range is None:
+            # Custom conditions may look at any line
+            return self.lines
+        ranges = [condition.range] + ([benefit.range] if benefit.range is not None else [])
+        return [line for line in self.lines if any(r.contains_product(line.product) for r in ranges)]
+
+    def _check_time(self):
+        if time.perf_counter() > self.deadline:
+            raise OutOfTime
+
+    def _condition_satisfied(self, offer, condition):
+        key = (offer.pk, tuple(line.quantity_without_offer_discount(offer) for line in self._offer_lines[offer.pk]))
+        satisfied = self._conditions.get(key)
+        if satisfied is None:
+            self.stats['condition_misses'] += 1
+            satisfied = self._conditions[key] = condition.is_satisfied(offer, self.basket)
+        else:
+            self.stats['condition_hits'] += 1
+        return satisfied
+
+    def _apply(self, offer_ids):
+        """Apply offer_ids to a clean basket in priority order, like Applicator.apply_offers."""
+        for line in self.lines:
+            line.clear_discount()
+        applications = OfferApplications()
+        discount = D('0.00')
+        for offer in sorted((self.offers[self.position[pk]] for pk in offer_ids), key=lambda o: self.position[o.pk]):
+            condition, benefit = self._proxies[offer.pk]
+            if offer.pk not in self._max_applications:
+                self._max_applications[offer.pk] = offer.get_max_applications(self.basket.owner)
+            for _ in range(self._max_applications[offer.pk]):
+                if not self._condition_satisfied(offer, condition):
+                    break
+                result = benefit.apply(self.basket, condition, offer)
+                if not result.is_successful:
+                    break
+                applications.add(offer, result)
+                if result.affects_basket:
+                    discount += result.discount
+                else:
+                    self._affects_other.add(offer.pk)
+                if result.is_final:
+                    break
+        return discount, applications
+
+    def _evaluate(self, offer_ids):
+        offer_ids = frozenset(offer_ids)
+        if offer_ids not in self._values:
+            self._check_time()
+            self.stats['evaluations'] += 1
+            self._values[offer_ids] = self._apply(offer_ids)[0]
+        return self._values[offer_ids]
+
+    def _groups(self, offer_ids):
+        """Partition offer_ids into groups connected by shared basket lines."""
+        parent = {pk: pk for pk in offer_ids}
+
+        def find(pk):
+            while parent[pk] != pk:
+                parent[pk] = parent[parent[pk]]
+                pk = parent[pk]
+            return pk
+
+        owners = {}
+        for pk in offer_ids:
+            for line in self._offer_lines[pk]:
+                other = owners.setdefault(id(line), pk)
+                parent[find(pk)] = find(other)
+        groups = defaultdict(list)
+        for pk in offer_ids:
+            groups[find(pk)].append(pk)
+        return list(groups.values())
+
+    def _search(self, candidates, fixed, standalone):
+        """Best subset of candidates applied together with fixed, by branch and bound."""
+        fixed = frozenset(fixed)
+        best_ids = frozenset(candidates)
+        best = self._evaluate(best_ids | fixed)
+
+        order = sorted(candidates, key=lambda pk: (-standalone[pk], self.position[pk]))
+        remaining = [D('0.00')] * (len(order) + 1)
+        for n in range(len(order) - 1, -1, -1):
+            remaining[n] = remaining[n + 1] + standalone[order[n]]
+
+        try:
+            stack = [(0, frozenset(), self._evaluate(fixed))]
+            while stack:
+                n, chosen, value = stack.pop()
+                if value > best:
+                    best, best_ids = value, chosen
+                if n == len(order):
+                    continue
+                if value + remaining[n] <= best:
+                    self.stats['pruned'] += 1
+                    continue
+                # Exclude first on the stack so the include branch, usually better, is explored first
+                stack.append((n + 1, chosen, value))
+                included = chosen | {order[n]}
+                stack.append((n + 1, included, self._evaluate(included | fixed)))
+        except OutOfTime:
+            self.stats['timed_out'] = True
+        return best_ids | fixed
+
+    def solve(self):
+        started = time.perf_counter()
+        self.deadline = started + self.time_budget
+        all_ids = [offer.pk for offer in self.offers]
+        greedy, _ = self._apply(all_ids)
+        chosen = set(all_ids)
+
+        try:
+            standalone = {pk: self._evaluate([pk]) for pk in all_ids}
+        except OutOfTime:
+            self.stats['timed_out'] = True
+        else:
+            # An offer that gives nothing alone gives nothing alongside others, which only consume lines
+            candidates = {pk for pk, value in standalone.items() if value > 0}
+            fixed = self._affects_other - candidates
+            self.stats['candidates'] = len(candidates)
+            chosen = set()
+            groups = self._groups(candidates | fixed)
+            self.stats['groups'] = len(groups)
+            for group in groups:
+                group = set(group)
+                if self.stats['timed_out']:
+                    chosen |= group
+                    continue
+                try:
+                    chosen |= self._search(group & candidates, group & fixed, standalone)
+                except OutOfTime:
+                    self.stats['timed_out'] = True
+                    chosen |= group
+
+        discount, applications = self._apply(chosen)
+        if discount < greedy:
+            # Groups are searched apart; guard against offers that reach beyond their ranges' lines
+            discount, applications = self._apply(all_ids)
+            chosen = set(all_ids)
+        self.stats.update(
+            greedy_discount=greedy, discount=discount,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+        )
+        offers = [offer for offer in self.offers if offer.pk in chosen]
+        logger.debug("Offer combination for basket %s: %s %s", self.basket.pk, [o.pk for o in offers], self.stats)
+        return CombinationResult(offers, discount, applications, self.stats)
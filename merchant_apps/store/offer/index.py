@@ -0,0 +1,153 @@
+"""
+Per-store index of the site offers a basket can receive.
+
+Oscar's applicator queries every site offer on each basket recalculation,
+then builds condition and benefit proxies that look their ranges up again,
+and answers each Range.contains_product with a query per basket line. The
+index loads a store's open site offers once, with proxies and ranges
+attached, each range's membership loaded and the store's offer combinations
+as a graph, so applying offers to a basket is evaluated in memory.
+
+Indexes are kept per process and checked against a version in the shared
+cache, which offer, condition, benefit, range and combination edits bump
+(see the receivers in offer.models), as do catalogue edits that change a
+range's membership (see offer.membership). The version moves when the edit
+is made and again once it commits, so an index built from pre-commit rows
+in between is never used. OFFER_INDEX_CACHE_TIMEOUT
+bounds how long an index lives regardless.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils.timezone import now
+from oscar.core.loading import get_model
+
+from .combination import CombinationGraph
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'offer_index_version:{schema_name}:{store_id}'
+
+# (schema_name, store_id) -> OfferIndex
+_indexes = {}
+
+
+def get_offer_index_timeout():
+    return getattr(settings, 'OFFER_INDEX_CACHE_TIMEOUT', 300)
+
+
+def _new_version():
+    # Timestamp-based, so a version key lost to eviction never resurrects old indexes
+    return int(time.time() * 1000)
+
+
+def _get_version(schema_name, store_id):
+    return cache.get_or_set(
+        VERSION_KEY.format(schema_name=schema_name, store_id=store_id), _new_version(), None
+    )
+
+
+class OfferIndex:
+
+    def __init__(self, store_id, version, offers, combinations):
+        self.store_id = store_id
+        self.version = version
+        # Highest priority first, like Applicator.get_offers
+        self.offers = offers
+        self.combinations = combinations
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, store_id, version):
+        ConditionalOffer = get_model('offer', 'ConditionalOffer')
+        Range = get_model('offer', 'Range')
+
+        offers = list(
+            ConditionalOffer.objects.filter(
+                store_id=store_id, offer_type=ConditionalOffer.SITE, status=ConditionalOffer.OPEN,
+            ).exclude(end_datetime__lt=now())
+            .select_related('condition', 'benefit')
+            .order_by('-priority', 'pk')
+        )
+        range_ids = {offer.condition.range_id for offer in offers} | {offer.benefit.range_id for offer in offers}
+        range_ids.discard(None)
+        ranges = Range.objects.in_bulk(range_ids)
+        combinations = CombinationGraph.build(store_id)
+        for product_range in ranges.values():
+            # Load memberships now rather than on the first basket that needs them
+            if not product_range.proxy_class:
+                product_range.membership
+
+        for offer in offers:
+            # Proxies short-circuit proxy() on themselves, so these are built once here
+            condition, benefit = offer.condition.proxy(), offer.benefit.proxy()
+            if condition.range_id:
+                condition.range = ranges[condition.range_id]
+            if benefit.range_id:
+                benefit.range = ranges[benefit.range_id]
+            offer.condition, offer.benefit = condition, benefit
+            combinations.attach(offer)
+
+        logger.debug("Built offer index for store %s: %d offers, %d ranges", store_id, len(offers), len(ranges))
+        return cls(store_id, version, offers, combinations)
+
+    def is_fresh(self, version):
+        return self.version == version and time.monotonic() - self.built_at < get_offer_index_timeout()
+
+    def get_offers(self, test_date=None):
+        """
+        Offers available at test_date, each a shallow copy: callers such as
+        order placement update usage counters on them, so instances are not
+        shared between baskets. Conditions and benefits are shared read-only.
+        """
+        if test_date is None:
+            test_date = now()
+        available = []
+        for offer in self.offers:
+            if offer.start_datetime and offer.start_datetime > test_date:
+                continue
+            if offer.end_datetime and test_date > offer.end_datetime:
+                continue
+            clone = offer.__class__.__new__(offer.__class__)
+            clone.__dict__ = offer.__dict__.copy()
+            available.append(clone)
+        return available
+
+
+def get_offer_index(store_id):
+    """This process's offer index for store_id in the current schema, rebuilt when stale."""
+    schema_name = connection.schema_name
+    version = _get_version(schema_name, store_id)
+    index = _indexes.get((schema_name, store_id))
+    if index is None or not index.is_fresh(version):
+        index = _indexes[(schema_name, store_id)] = OfferIndex.build(store_id, version)
+    return index
+
+
+def invalidate_offer_index(store_id, schema_name=None):
+    """Move the store's index version now and again once the change is committed."""
+    if store_id is None:
+        return
+    schema_name = schema_name or connection.schema_name
+    version_key = VERSION_KEY.format(schema_name=schema_name, store_id=store_id)
+
+    def bump():
+        _indexes.pop((schema_name, store_id), None)
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            cache.set(version_key, _new_version(), None)
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_range_offer_indexes(range_ids):
+    """Invalidate the offer indexes of the stores owning range_ids."""
+    Range = get_model('offer', 'Range')
+
+    store_ids = Range.objects.filter(pk__in=list(range_ids)).values_list('store_id', flat=True).distinct()
+    for store_id in store_ids:
+        invalidate_offer_index(store_id)
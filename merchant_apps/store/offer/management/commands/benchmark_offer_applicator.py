@@ -0,0 +1,136 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from oscar.apps.offer.applicator import Applicator as StockApplicator
+from oscar.core.loading import get_class, get_model
+
+from merchant_apps.store.offer.applicator import Applicator
+from merchant_apps.store.offer.index import get_offer_index, invalidate_offer_index
+
+Basket = get_model('basket', 'Basket')
+Benefit = get_model('offer', 'Benefit')
+Condition = get_model('offer', 'Condition')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+Partner = get_model('partner', 'Partner')
+Product = get_model('catalogue', 'Product')
+ProductClass = get_model('catalogue', 'ProductClass')
+Range = get_model('offer', 'Range')
+StockRecord = get_model('partner', 'StockRecord')
+Store = get_model('store_meta', 'Store')
+OfferApplications = get_class('offer.results', 'OfferApplications')
+Selector = get_class('partner.strategy', 'Selector')
+
+
+class StoreStockApplicator(StockApplicator):
+    """Oscar's query-per-recalculation applicator, limited to the basket's store."""
+
+    def __init__(self, store_id):
+        self.store_id = store_id
+
+    def get_site_offers(self):
+        return super().get_site_offers().filter(store_id=self.store_id)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare basket offer application through Oscar's stock applicator and the per-store "
+        "offer index. Run inside a merchant schema (tenant_command); all fixtures are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--offers', type=int, default=500)
+        parser.add_argument('--lines', type=int, default=50)
+        parser.add_argument('--products', type=int, default=2000)
+        parser.add_argument('--range-size', type=int, default=100, help='Products per offer range')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--stock-iterations', type=int, default=2, help='Stock applicator runs are slow')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        with transaction.atomic():
+            store, basket = self._create_fixtures(options)
+            self.stdout.write(
+                f"{options['offers']} offers, {basket.num_lines}-line basket, "
+                f"{options['range_size']} products per range"
+            )
+            self.stdout.write(f"{'applicator':<14}{'ms/apply':>12}{'queries':>10}{'discount':>12}")
+
+            stock = StoreStockApplicator(store.pk)
+            self._report('stock', stock, basket, options['stock_iterations'])
+
+            invalidate_offer_index(store.pk)
+            started = time.perf_counter()
+            get_offer_index(store.pk)
+            self.stdout.write(f"index build: {(time.perf_counter() - started) * 1000:.1f} ms")
+            self._report('indexed', Applicator(), basket, options['iterations'])
+
+            invalidate_offer_index(store.pk)
+            transaction.set_rollback(True)
+
+    def _report(self, label, applicator, basket, iterations):
+        timings = []
+        for _ in range(iterations):
+            self._reset(basket)
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                applicator.apply(basket)
+                timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f"{label:<14}{sum(timings) / len(timings):>12.2f}{len(ctx.captured_queries):>10}"
+            f"{basket.total_discount:>12}"
+        )
+        combination = getattr(basket, 'offer_combination', None)
+        if combination is not None:
+            self.stdout.write(f"  combination: {combination.stats}")
+
+    def _reset(self, basket):
+        for line in basket.all_lines():
+            line.clear_discount()
+        basket.offer_applications = OfferApplications()
+        basket.__dict__.pop('offer_combination', None)
+
+    def _create_fixtures(self, options):
+        suffix = f'{int(time.time())}'
+        store = Store.objects.create(name=f'Offer benchmark {suffix}', slug=f'offer_benchmark_{suffix}')
+        product_class = ProductClass.objects.create(name=f'Benchmark {suffix}', store=store)
+        partner = Partner.objects.create(name=f'Benchmark {suffix}', store=store)
+
+        products = Product.objects.bulk_create(
+            Product(title=f'Product {n}', upc=f'bench-{suffix}-{n}', product_class=product_class, store=store)
+            for n in range(options['products'])
+        )
+        StockRecord.objects.bulk_create(
+            StockRecord(
+                partner=partner, product=product, partner_sku=product.upc,
+                price=Decimal(random.randint(500, 10000)) / 100, num_in_stock=1000,
+            )
+            for product in products
+        )
+
+        for n in range(options['offers']):
+            product_range = Range.objects.create(name=f'Benchmark {suffix} {n}', store=store)
+            Range.included_products.through.objects.bulk_create(
+                Range.included_products.through(range=product_range, product=product)
+                for product in random.sample(products, min(options['range_size'], len(products)))
+            )
+            condition = Condition.objects.create(
+                store=store, range=product_range, type=Condition.COUNT, value=random.randint(1, 3),
+            )
+            benefit = Benefit.objects.create(
+                store=store, range=product_range, type=Benefit.PERCENTAGE, value=random.randint(1, 20),
+            )
+            ConditionalOffer.objects.create(
+                name=f'Benchmark {suffix} {n}', store=store, condition=condition, benefit=benefit,
+                priority=random.randint(0, 10), exclusive=bool(n % 2),
+            )
+
+        basket = Basket.objects.create(store=store)
+        basket.strategy = Selector().strategy()
+        for product in random.sample(products, min(options['lines'], len(products))):
+            basket.add_product(product, quantity=random.randint(1, 3))
+        return store, basket
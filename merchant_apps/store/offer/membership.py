@@ -0,0 +1,166 @@
+"""
+Precomputed product membership for offer ranges.
+
+Oscar answers Range.contains_product with a query per call and rebuilds
+the range's product queryset (categories, classes, children, exclusions)
+each time. A RangeMembership holds the outcome as a sorted array of
+product ids: 8 bytes a product in the shared cache, contains_product is a
+binary search and all_products() needs no queries to construct.
+
+Edits that touch specific products (range includes and excludes, product
+saves and deletes, product categories) re-test just those products and
+their children against each cached membership, and drop the memberships
+whose answer changed; edits that leave a range as it was keep its entry.
+Edits that can move many products at once (range flags, classes,
+categories) drop the membership unconditionally. Entries are only ever
+dropped, never patched, so overlapping commits can't lose each other's
+changes. Checks run once the transaction commits, and the short
+RANGE_MEMBERSHIP_CACHE_TIMEOUT bounds the life of an entry that a reader
+built from rows a concurrent commit was changing.
+"""
+import logging
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from oscar.core.loading import get_model
+
+from .index import invalidate_offer_index, invalidate_range_offer_indexes
+
+logger = logging.getLogger(__name__)
+
+MEMBERSHIP_KEY = 'range_membership:{schema_name}:{range_id}'
+
+
+def get_range_membership_timeout():
+    return getattr(settings, 'RANGE_MEMBERSHIP_CACHE_TIMEOUT', 600)
+
+
+def _membership_key(schema_name, range_id):
+    return MEMBERSHIP_KEY.format(schema_name=schema_name, range_id=range_id)
+
+
+class RangeMembership:
+    """Product ids in a range, answering contains_product without queries."""
+    __slots__ = ('includes_all', 'product_ids')
+
+    def __init__(self, includes_all, product_ids):
+        # For ranges that include all products, product_ids holds the exclusions
+        self.includes_all = includes_all
+        self.product_ids = product_ids
+
+    @classmethod
+    def from_ids(cls, includes_all, ids):
+        return cls(includes_all, array('q', sorted(set(ids))))
+
+    @classmethod
+    def build(cls, product_range):
+        if product_range.includes_all_products:
+            return cls.from_ids(True, product_range.excluded_products.values_list('id', flat=True))
+        # Oscar's queryset: included products, classes, category subtrees, children, minus exclusions
+        return cls.from_ids(False, product_range.product_queryset.values_list('id', flat=True))
+
+    def __contains__(self, product_id):
+        ids = self.product_ids
+        position = bisect_left(ids, product_id)
+        found = position < len(ids) and ids[position] == product_id
+        return found != self.includes_all
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    def to_cache(self):
+        return self.includes_all, self.product_ids.tobytes()
+
+    @classmethod
+    def from_cache(cls, value):
+        includes_all, data = value
+        product_ids = array('q')
+        product_ids.frombytes(data)
+        return cls(includes_all, product_ids)
+
+
+def get_range_membership(product_range):
+    """Cached membership for product_range, built on a miss."""
+    key = _membership_key(connection.schema_name, product_range.pk)
+    value = cache.get(key)
+    if value is not None:
+        return RangeMembership.from_cache(value)
+    membership = RangeMembership.build(product_range)
+    cache.set(key, membership.to_cache(), get_range_membership_timeout())
+    logger.debug("Built membership for range %s: %d ids", product_range.pk, len(membership))
+    return membership
+
+
+def _affected_product_ids(product_ids):
+    # Ranges hold parents; their children follow them in and out
+    Product = get_model('catalogue', 'Product')
+    product_ids = list(product_ids)
+    return set(product_ids) | set(
+        Product.objects.filter(parent_id__in=product_ids).values_list('id', flat=True)
+    )
+
+
+def _update_memberships(schema_name, range_ids, product_ids, deleted):
+    Range = get_model('offer', 'Range')
+
+    keys = {_membership_key(schema_name, range_id): range_id for range_id in range_ids}
+    cached = cache.get_many(list(keys))
+    if not cached:
+        return
+    affected = set(product_ids) if deleted else _affected_product_ids(product_ids)
+    ranges = Range.objects.in_bulk([keys[key] for key in cached])
+    stale = {}
+    for key, value in cached.items():
+        product_range = ranges.get(keys[key])
+        membership = RangeMembership.from_cache(value)
+        if product_range is None or product_range.includes_all_products != membership.includes_all:
+            stale[key] = product_range
+        elif membership.includes_all:
+            # Only exclusions are stored, which a product edit can't change; deleted ids just go unused
+            continue
+        elif deleted:
+            if any(product_id in membership for product_id in affected):
+                stale[key] = product_range
+        else:
+            members = set(product_range.product_queryset.filter(id__in=affected).values_list('id', flat=True))
+            if any((product_id in membership) != (product_id in members) for product_id in affected):
+                stale[key] = product_range
+    if not stale:
+        return
+    cache.delete_many(list(stale))
+    for store_id in {product_range.store_id for product_range in stale.values() if product_range is not None}:
+        invalidate_offer_index(store_id, schema_name=schema_name)
+
+
+def update_range_memberships(range_ids, product_ids, deleted=False):
+    """
+    Re-test product_ids (and their children) against the cached memberships
+    of range_ids once the transaction commits, dropping those that no
+    longer match. deleted treats the products as gone.
+    """
+    range_ids, product_ids = list(range_ids), list(product_ids)
+    if not range_ids or not product_ids:
+        return
+    schema_name = connection.schema_name
+    transaction.on_commit(lambda: _update_memberships(schema_name, range_ids, product_ids, deleted))
+
+
+def invalidate_range_memberships(range_ids):
+    """
+    Drop memberships of range_ids, to be rebuilt in full on the next read.
+    Dropped again on commit, with the owning stores' offer indexes, in case
+    something read the pre-commit rows in between.
+    """
+    range_ids = list(range_ids)
+    if not range_ids:
+        return
+    keys = [_membership_key(connection.schema_name, range_id) for range_id in range_ids]
+    cache.delete_many(keys)
+
+    def invalidate():
+        cache.delete_many(keys)
+        invalidate_range_offer_indexes(range_ids)
+    transaction.on_commit(invalidate)
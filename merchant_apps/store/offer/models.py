@@ -6,8 +6,13 @@ from oscar.apps.offer.abstract_models import (
     AbstractRangeProduct
 )
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from merchant_apps.store.meta.models import Store
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _ 
+from .index import invalidate_offer_index, invalidate_range_offer_indexes
+from .membership import get_range_membership, invalidate_range_memberships, update_range_memberships
 
 
 class ConditionalOfferCombination(models.Model):
@@ -56,6 +61,21 @@ class ConditionalOffer(AbstractConditionalOffer):
         help_text=_("Select other offers to combine with this one")
     )
 
+    @cached_property
+    def combination_ids(self):
+        """Offers this one may share basket lines with, declared on either side."""
+        return frozenset(self.primary_combinations.values_list('secondary_id', flat=True)) \
+            | frozenset(self.secondary_combinations.values_list('primary_id', flat=True))
+
+    @cached_property
+    def declares_combinations(self):
+        return self.primary_combinations.exists()
+
+    @cached_property
+    def combined_offers(self):
+        # Oscar's version follows an 'in_combination' reverse accessor this model doesn't have
+        return self.__class__.objects.filter(models.Q(pk=self.pk) | models.Q(pk__in=self.combination_ids))
+
 class RangeProduct(AbstractRangeProduct):
     class Meta:
         app_label = 'offer'
@@ -80,6 +100,35 @@ class Range(AbstractRange):
         blank=True
     )
 
+    @cached_property
+    def membership(self):
+        return get_range_membership(self)
+
+    def contains_product(self, product):
+        if self.proxy:
+            return self.proxy.contains_product(product)
+        return product.id in self.membership
+
+    def all_products(self):
+        if self.proxy:
+            return self.proxy.all_products()
+        Product = self.included_products.model
+        product_ids = self.membership.product_ids.tolist()
+        if self.membership.includes_all:
+            return Product.objects.exclude(id__in=product_ids)
+        return Product.objects.filter(id__in=product_ids)
+
+    def num_products(self):
+        if self.proxy:
+            return self.proxy.num_products()
+        if self.includes_all_products:
+            return None
+        return len(self.membership)
+
+    def invalidate_cached_queryset(self):
+        super().invalidate_cached_queryset()
+        self.__dict__.pop('membership', None)
+
 
 
 class Condition(AbstractCondition):
@@ -97,4 +146,140 @@ class Benefit(AbstractBenefit):
     )
 
 # Import Oscar’s abstract models after defining your overrides
-from oscar.apps.offer.models import *
\ No newline at end of file
+from oscar.apps.offer.models import *
+
+
+@receiver(post_save, sender=ConditionalOffer)
+@receiver(post_delete, sender=ConditionalOffer)
+@receiver(post_save, sender=Condition)
+@receiver(post_delete, sender=Condition)
+@receiver(post_save, sender=Benefit)
+@receiver(post_delete, sender=Benefit)
+@receiver(post_save, sender=Range)
+@receiver(post_delete, sender=Range)
+def invalidate_store_offer_index(sender, instance=None, **kwargs):
+    invalidate_offer_index(instance.store_id)
+
+
+@receiver(post_save, sender=ConditionalOfferCombination)
+@receiver(post_delete, sender=ConditionalOfferCombination)
+def invalidate_combination_offer_index(sender, instance=None, **kwargs):
+    invalidate_offer_index(
+        ConditionalOffer.objects.filter(pk=instance.primary_id).values_list('store_id', flat=True).first()
+    )
+
+
+@receiver(m2m_changed, sender=ConditionalOffer.combinations.through)
+def invalidate_combinations_offer_index(sender, instance=None, action=None, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_offer_index(instance.store_id)
+
+
+@receiver(post_save, sender=RangeProduct)
+@receiver(post_delete, sender=RangeProduct)
+def invalidate_range_product_offer_index(sender, instance=None, **kwargs):
+    invalidate_range_offer_indexes([instance.range_id])
+
+
+@receiver(m2m_changed, sender=Range.included_products.through)
+@receiver(m2m_changed, sender=Range.excluded_products.through)
+@receiver(m2m_changed, sender=Range.classes.through)
+@receiver(m2m_changed, sender=Range.included_categories.through)
+def invalidate_range_membership_offer_index(sender, instance=None, action=None, reverse=False, pk_set=None, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # Reverse changes come from the product/class/category side, with range ids in pk_set
+    invalidate_range_offer_indexes((pk_set or ()) if reverse else [instance.pk])
+
+
+@receiver(post_save, sender=Range)
+@receiver(post_delete, sender=Range)
+def invalidate_range_membership(sender, instance=None, **kwargs):
+    # Flags such as includes_all_products can move every product at once
+    invalidate_range_memberships([instance.pk])
+
+
+@receiver(post_save, sender=RangeProduct)
+@receiver(post_delete, sender=RangeProduct)
+def update_range_product_membership(sender, instance=None, **kwargs):
+    update_range_memberships([instance.range_id], [instance.product_id])
+
+
+@receiver(m2m_changed, sender=Range.included_products.through)
+@receiver(m2m_changed, sender=Range.excluded_products.through)
+def update_range_products_membership(sender, instance=None, action=None, reverse=False, pk_set=None, **kwargs):
+    if action == 'post_clear':
+        # pk_set is unknown after a clear
+        range_ids = ranges_for_product(instance) if reverse else [instance.pk]
+        invalidate_range_memberships(range_ids)
+    elif action in ('post_add', 'post_remove'):
+        if reverse:
+            update_range_memberships(pk_set, [instance.pk])
+        else:
+            update_range_memberships([instance.pk], pk_set)
+
+
+@receiver(m2m_changed, sender=Range.classes.through)
+@receiver(m2m_changed, sender=Range.included_categories.through)
+def invalidate_range_rules_membership(sender, instance=None, action=None, reverse=False, pk_set=None, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_range_memberships([instance.pk])
+    elif pk_set:
+        invalidate_range_memberships(pk_set)
+    else:
+        invalidate_range_memberships(Range.objects.filter(store_id=instance.store_id).values_list('pk', flat=True))
+
+
+def ranges_for_product(product):
+    return Range.objects.filter(store_id=product.store_id).values_list('pk', flat=True)
+
+
+@receiver(post_save, sender='catalogue.Product')
+def update_product_range_memberships(sender, instance=None, **kwargs):
+    # Ranges that can gain or lose the product: rule-based ones and those listing it or its parent
+    product_ids = [instance.pk, instance.parent_id] if instance.parent_id else [instance.pk]
+    range_ids = Range.objects.filter(store_id=instance.store_id, includes_all_products=False).filter(
+        models.Q(classes__isnull=False)
+        | models.Q(included_categories__isnull=False)
+        | models.Q(included_products__in=product_ids)
+    ).values_list('pk', flat=True).distinct()
+    update_range_memberships(range_ids, [instance.pk])
+
+
+@receiver(post_delete, sender='catalogue.Product')
+def discard_product_range_memberships(sender, instance=None, **kwargs):
+    update_range_memberships(ranges_for_product(instance), [instance.pk], deleted=True)
+
+
+def category_range_ids():
+    return Range.objects.filter(included_categories__isnull=False).values_list('pk', flat=True).distinct()
+
+
+@receiver(post_save, sender='catalogue.ProductCategory')
+@receiver(post_delete, sender='catalogue.ProductCategory')
+def update_product_category_range_memberships(sender, instance=None, **kwargs):
+    update_range_memberships(category_range_ids(), [instance.product_id])
+
+
+def update_product_categories_range_memberships(sender, instance=None, action=None, reverse=False, pk_set=None, **kwargs):
+    """m2m_changed for Product.categories; connected in OfferConfig.ready(), once catalogue is loaded."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    range_ids = category_range_ids()
+    if reverse:
+        # Category side: pk_set holds product ids, unknown after a clear
+        if pk_set:
+            update_range_memberships(range_ids, pk_set)
+        else:
+            invalidate_range_memberships(range_ids)
+    else:
+        update_range_memberships(range_ids, [instance.pk])
+
+
+@receiver(post_save, sender='catalogue.Category')
+@receiver(post_delete, sender='catalogue.Category')
+def invalidate_category_range_memberships(sender, instance=None, **kwargs):
+    # Moving or deleting a category reshapes whole subtrees
+    invalidate_range_memberships(category_range_ids())
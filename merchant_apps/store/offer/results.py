@@ -4,7 +4,7 @@ from oscar.apps.offer.results import (
     BasketDiscount as OscarBasketDiscount)
 
 class OfferApplications(OscarOfferApplications):
-    def __init__(self, request):
+    def __init__(self, request=None):
         super().__init__()
         self.store = getattr(request, 'store', None)  # Get store from request
 
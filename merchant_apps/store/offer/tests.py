@@ -0,0 +1,268 @@
+from decimal import Decimal as D
+from unittest import mock
+
+from django.core.cache import cache
+from django_tenants.test.cases import TenantTestCase
+from oscar.apps.offer.applicator import Applicator as StockApplicator
+from oscar.core.loading import get_class, get_model
+
+from merchant_apps.store.meta.models import Store
+from .applicator import Applicator
+from .combination import OfferCombinationSolver
+from .index import _indexes
+from .membership import _membership_key
+from .models import Benefit, Condition, ConditionalOffer, Range
+
+Basket = get_model('basket', 'Basket')
+Partner = get_model('partner', 'Partner')
+Product = get_model('catalogue', 'Product')
+ProductClass = get_model('catalogue', 'ProductClass')
+StockRecord = get_model('partner', 'StockRecord')
+OfferApplications = get_class('offer.results', 'OfferApplications')
+Selector = get_class('partner.strategy', 'Selector')
+
+
+def run_on_commit(func):
+    # TenantTestCase wraps each test in a transaction that never commits
+    func()
+
+
+class OfferTestCase(TenantTestCase):
+
+    @classmethod
+    def setup_tenant(cls, tenant):
+        tenant.name = 'Offer Merchant'
+        tenant.contact_email = 'offers@example.com'
+        tenant.auto_create_admin = False
+
+    def setUp(self):
+        cache.clear()
+        _indexes.clear()
+        patcher = mock.patch('django.db.transaction.on_commit', run_on_commit)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = Store.objects.create(name='Offers', slug='offers')
+        self.shirts = ProductClass.objects.create(store=self.store, name='Shirts')
+        self.books = ProductClass.objects.create(store=self.store, name='Books')
+
+    def create_product(self, title, product_class=None, **fields):
+        return Product.objects.create(
+            store=self.store, title=title, product_class=product_class or self.books, **fields
+        )
+
+    def create_offer(self, name, products, condition, benefit, priority=0, exclusive=True):
+        product_range = Range.objects.create(store=self.store, name=name)
+        for product in products:
+            product_range.add_product(product)
+        condition_type, condition_value = condition
+        benefit_type, benefit_value = benefit
+        return ConditionalOffer.objects.create(
+            store=self.store, name=name, priority=priority, exclusive=exclusive,
+            condition=Condition.objects.create(
+                store=self.store, range=product_range, type=condition_type, value=condition_value,
+            ),
+            benefit=Benefit.objects.create(
+                store=self.store, range=product_range, type=benefit_type, value=benefit_value,
+            ),
+        )
+
+    def create_basket(self, prices):
+        """A basket with one line per price, quantity 2 each, and the products in order."""
+        partner = Partner.objects.create(store=self.store, name='Offers')
+        basket = Basket.objects.create(store=self.store)
+        basket.strategy = Selector().strategy()
+        products = []
+        for number, price in enumerate(prices):
+            product = self.create_product(f'Product {number}', upc=f'offer-{number}')
+            StockRecord.objects.create(
+                partner=partner, product=product, partner_sku=product.upc, price=price, num_in_stock=100,
+            )
+            basket.add_product(product, quantity=2)
+            products.append(product)
+        return basket, products
+
+    def apply(self, applicator, basket):
+        """Apply offers to a clean basket and return (total discount, line discounts, applied offer ids)."""
+        for line in basket.all_lines():
+            line.clear_discount()
+        basket.offer_applications = OfferApplications()
+        basket.__dict__.pop('offer_combination', None)
+        applicator.apply(basket)
+        return (
+            basket.total_discount,
+            [line.discount_value for line in basket.all_lines()],
+            sorted(basket.offer_applications.offers),
+        )
+
+
+class RangeMembershipTests(OfferTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.range = Range.objects.create(store=self.store, name='Sale')
+        self.range.classes.add(self.shirts)
+        self.shirt = self.create_product('Shirt', self.shirts)
+        self.book = self.create_product('Book')
+        self.other_book = self.create_product('Other book')
+        self.range.add_product(self.book)
+
+    def membership_ids(self):
+        return set(Range.objects.get(pk=self.range.pk).membership.product_ids)
+
+    def assertMembershipMatches(self):
+        product_range = Range.objects.get(pk=self.range.pk)
+        expected = set(product_range.product_queryset.values_list('id', flat=True))
+        self.assertEqual(set(product_range.membership.product_ids), expected)
+        return expected
+
+    def test_membership_matches_product_queryset(self):
+        self.assertEqual(self.assertMembershipMatches(), {self.shirt.pk, self.book.pk})
+
+    def test_included_product_joins(self):
+        self.membership_ids()
+        self.range.add_product(self.other_book)
+        self.assertIn(self.other_book.pk, self.assertMembershipMatches())
+
+    def test_removed_product_leaves(self):
+        self.membership_ids()
+        self.range.remove_product(self.book)
+        self.assertNotIn(self.book.pk, self.assertMembershipMatches())
+
+    def test_excluded_product_leaves(self):
+        self.membership_ids()
+        self.range.excluded_products.add(self.shirt)
+        self.assertNotIn(self.shirt.pk, self.assertMembershipMatches())
+
+    def test_new_product_of_range_class_joins(self):
+        self.membership_ids()
+        shirt = self.create_product('New shirt', self.shirts)
+        self.assertIn(shirt.pk, self.assertMembershipMatches())
+
+    def test_product_moved_out_of_range_class_leaves(self):
+        self.membership_ids()
+        self.shirt.product_class = self.books
+        self.shirt.save()
+        self.assertNotIn(self.shirt.pk, self.assertMembershipMatches())
+
+    def test_deleted_product_leaves(self):
+        self.membership_ids()
+        book_pk = self.book.pk
+        self.book.delete()
+        self.assertNotIn(book_pk, self.assertMembershipMatches())
+
+    def test_unrelated_edit_keeps_cached_membership(self):
+        self.membership_ids()
+        key = _membership_key(self.tenant.schema_name, self.range.pk)
+        self.other_book.title = 'Renamed'
+        self.other_book.save()
+        self.assertIsNotNone(cache.get(key))
+        self.assertMembershipMatches()
+
+    def test_changed_membership_is_dropped_not_patched(self):
+        self.membership_ids()
+        key = _membership_key(self.tenant.schema_name, self.range.pk)
+        self.range.add_product(self.other_book)
+        self.assertIsNone(cache.get(key))
+
+
+class StoreStockApplicator(StockApplicator):
+    """Oscar's query-per-recalculation applicator, limited to the basket's store."""
+
+    def __init__(self, store_id):
+        self.store_id = store_id
+
+    def get_site_offers(self):
+        return super().get_site_offers().filter(store_id=self.store_id)
+
+
+class IndexedStockApplicator(Applicator):
+    """Offers from the store's index, applied with Oscar's loop rather than the combination solver."""
+
+    def apply_offers(self, basket, offers):
+        StockApplicator.apply_offers(self, basket, offers)
+
+
+class OfferIndexTests(OfferTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.basket, products = self.create_basket([D('10.00'), D('12.50'), D('20.00'), D('7.99'), D('30.00')])
+        self.create_offer(
+            'Two of the first three', products[:3], (Condition.COUNT, 2), (Benefit.PERCENTAGE, 10), priority=5,
+        )
+        self.create_offer(
+            'Spend 40 on the middle', products[1:4], (Condition.VALUE, 40), (Benefit.FIXED, 5), priority=3,
+            exclusive=False,
+        )
+        self.create_offer(
+            'Any of the last two', products[3:], (Condition.COUNT, 1), (Benefit.PERCENTAGE, 20), priority=1,
+            exclusive=False,
+        )
+        self.stock = StoreStockApplicator(self.store.pk)
+
+    def test_same_discounts_as_stock_applicator(self):
+        expected = self.apply(self.stock, self.basket)
+        self.assertGreater(expected[0], 0)
+        self.assertEqual(self.apply(IndexedStockApplicator(), self.basket), expected)
+
+    def test_edits_reach_the_index(self):
+        self.apply(IndexedStockApplicator(), self.basket)
+        benefit = ConditionalOffer.objects.get(name='Any of the last two').benefit
+        benefit.value = 50
+        benefit.save()
+        offer = ConditionalOffer.objects.get(name='Two of the first three')
+        offer.status = ConditionalOffer.SUSPENDED
+        offer.save()
+        self.assertEqual(self.apply(IndexedStockApplicator(), self.basket), self.apply(self.stock, self.basket))
+
+
+class OfferCombinationTests(OfferTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.basket, self.products = self.create_basket([D('10.00'), D('12.50'), D('20.00'), D('7.99')])
+        self.stock = StoreStockApplicator(self.store.pk)
+
+    def test_better_offer_blocked_by_priority_is_chosen(self):
+        self.create_offer('Small', self.products[:2], (Condition.COUNT, 1), (Benefit.PERCENTAGE, 5), priority=5)
+        large = self.create_offer(
+            'Large', self.products[:2], (Condition.COUNT, 1), (Benefit.PERCENTAGE, 50), priority=1,
+        )
+        greedy = self.apply(self.stock, self.basket)[0]
+        discount, _lines, offer_ids = self.apply(Applicator(), self.basket)
+        self.assertGreater(discount, greedy)
+        self.assertEqual(offer_ids, [large.pk])
+        self.assertEqual(self.basket.offer_combination.discount, discount)
+
+    def test_never_less_than_greedy(self):
+        self.create_offer('First', self.products[:3], (Condition.COUNT, 2), (Benefit.PERCENTAGE, 10), priority=5)
+        self.create_offer(
+            'Middle', self.products[1:], (Condition.VALUE, 30), (Benefit.FIXED, 5), priority=3, exclusive=False,
+        )
+        self.create_offer(
+            'Last', self.products[2:], (Condition.COUNT, 1), (Benefit.PERCENTAGE, 20), priority=1, exclusive=False,
+        )
+        self.create_offer('Everything', self.products, (Condition.COUNT, 3), (Benefit.FIXED, 8), priority=0)
+        greedy = self.apply(self.stock, self.basket)[0]
+        self.assertGreaterEqual(self.apply(Applicator(), self.basket)[0], greedy)
+
+    def test_time_budget_falls_back_to_greedy(self):
+        self.create_offer('Small', self.products[:2], (Condition.COUNT, 1), (Benefit.PERCENTAGE, 5), priority=5)
+        self.create_offer('Large', self.products[:2], (Condition.COUNT, 1), (Benefit.PERCENTAGE, 50), priority=1)
+        offers = Applicator().get_offers(self.basket)
+        result = OfferCombinationSolver(self.basket, offers, time_budget=0).solve()
+        self.assertTrue(result.stats['timed_out'])
+        self.assertEqual(result.discount, result.stats['greedy_discount'])
+        self.assertEqual(result.discount, self.apply(self.stock, self.basket)[0])
+
+    def test_single_offer_clears_previous_combination(self):
+        self.create_offer('Small', self.products[:2], (Condition.COUNT, 1), (Benefit.PERCENTAGE, 5), priority=5)
+        large = self.create_offer(
+            'Large', self.products[:2], (Condition.COUNT, 1), (Benefit.PERCENTAGE, 50), priority=1,
+        )
+        applicator = Applicator()
+        applicator.apply(self.basket)
+        self.assertIsNotNone(self.basket.offer_combination)
+        large.delete()
+        applicator.apply_offers(self.basket, applicator.get_offers(self.basket))
+        self.assertIsNone(self.basket.offer_combination)
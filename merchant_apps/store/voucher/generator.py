@@ -0,0 +1,117 @@
+"""
+Bulk voucher generation for VoucherSets.
+
+Oscar generates a set's vouchers one at a time: an existence query per
+code, a Voucher.save() and a VoucherOffer insert each. Here codes are drawn
+a batch at a time from the OS random source, checked against the table
+with one query per batch and inserted with bulk_create, along with their
+VoucherOffer rows.
+
+Codes are checked against every voucher in the schema, not just the
+store's: the code column is unique on its own as well as with store. Each
+batch commits separately, so progress survives an interrupted run and
+running again tops the set up from where it stopped. Batches lock the
+VoucherSet row and recount its vouchers, so overlapping runs take turns
+and never overshoot the set's count. bulk_create skips
+Voucher.save(), so codes are generated upper case, and post_save
+receivers don't run; the lookup caches are invalidated here instead.
+"""
+import secrets
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from oscar.core.loading import get_model
+
+from .lookup import invalidate_voucher_codes
+
+CODE_CHARS = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+
+# Maps every byte onto CODE_CHARS; 256 is a multiple of its 32 characters, so the draw stays uniform
+_CODE_TABLE = bytes((CODE_CHARS * (256 // len(CODE_CHARS))).encode('ascii'))
+
+# Retries of a batch that lost a race for one of its codes to a concurrent insert
+MAX_BATCH_ATTEMPTS = 3
+
+
+def get_voucher_batch_size():
+    return getattr(settings, 'VOUCHER_GENERATION_BATCH_SIZE', 5000)
+
+
+def generate_codes(count, length=12, group_length=4, separator='-'):
+    """count random codes formatted like oscar.apps.voucher.utils.generate_code."""
+    raw = secrets.token_bytes(count * length).translate(_CODE_TABLE).decode('ascii')
+    for start in range(0, count * length, length):
+        code = raw[start:start + length]
+        yield separator.join(code[n:n + group_length] for n in range(0, length, group_length))
+
+
+def _unused_codes(count, length):
+    Voucher = get_model('voucher', 'Voucher')
+
+    codes = set()
+    while len(codes) < count:
+        candidates = set(generate_codes(count - len(codes), length)) - codes
+        taken = Voucher.objects.filter(code__in=candidates).values_list('code', flat=True)
+        codes |= candidates.difference(taken)
+    return codes
+
+
+def _create_batch(voucher_set, count):
+    Voucher = get_model('voucher', 'Voucher')
+    VoucherOffer = get_model('voucher', 'VoucherOffer')
+
+    codes = _unused_codes(count, voucher_set.code_length)
+    vouchers = Voucher.objects.bulk_create(
+        Voucher(
+            name=voucher_set.name,
+            code=code,
+            store_id=voucher_set.store_id,
+            source_set=voucher_set,
+            usage=Voucher.SINGLE_USE,
+            start_datetime=voucher_set.start_datetime,
+            end_datetime=voucher_set.end_datetime,
+        )
+        for code in codes
+    )
+    # bulk_create sends no post_save: drop any misses cached for these codes and grow the code filters
+    invalidate_voucher_codes(voucher_set.store_id, codes, new_codes=True)
+    if voucher_set.offer_id:
+        VoucherOffer.objects.bulk_create(
+            VoucherOffer(voucher_id=voucher.pk, offer_id=voucher_set.offer_id) for voucher in vouchers
+        )
+    return len(vouchers)
+
+
+def generate_voucher_set(voucher_set, batch_size=None):
+    """
+    Create the vouchers voucher_set is missing up to voucher_set.count,
+    yielding progress after each committed batch (and once up front) as
+    dicts of created, total and elapsed seconds.
+    """
+    VoucherSet = get_model('voucher', 'VoucherSet')
+
+    batch_size = batch_size or get_voucher_batch_size()
+    started = time.monotonic()
+    created = voucher_set.vouchers.count()
+    total = max(voucher_set.count, created)
+
+    def progress():
+        return {'created': created, 'total': total, 'elapsed': round(time.monotonic() - started, 2)}
+
+    yield progress()
+    while created < total:
+        for attempt in range(MAX_BATCH_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    # Another run may have added vouchers, or grown the set, since the last batch
+                    locked = VoucherSet.objects.select_for_update().get(pk=voucher_set.pk)
+                    created = locked.vouchers.count()
+                    total = max(locked.count, created)
+                    if created < total:
+                        created += _create_batch(voucher_set, min(batch_size, total - created))
+                break
+            except IntegrityError:
+                if attempt == MAX_BATCH_ATTEMPTS - 1:
+                    raise
+        yield progress()
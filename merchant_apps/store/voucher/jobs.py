@@ -0,0 +1,92 @@
+"""
+Queued voucher generation for sets too large to generate in a request.
+
+Jobs live in the public schema (merchant.VoucherGenerationJob), so a single
+process_voucher_generation_jobs worker serves every merchant. Generation
+resumes from the vouchers a set already has, so a failed job is retried by
+queueing the set again and a job left running by a dead worker is simply
+run again.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django_tenants.utils import schema_context
+from oscar.core.loading import get_model
+
+from .generator import generate_voucher_set
+
+logger = logging.getLogger(__name__)
+
+
+def get_inline_generation_limit():
+    """Most vouchers the API generates within the request; larger runs are queued."""
+    return getattr(settings, 'VOUCHER_GENERATION_INLINE_LIMIT', 10000)
+
+
+def enqueue_voucher_generation(voucher_set):
+    """The set's unfinished job, or a new pending one."""
+    from public_apps.merchant.models import VoucherGenerationJob
+
+    jobs = VoucherGenerationJob.objects.filter(schema_name=connection.schema_name, voucher_set_id=voucher_set.pk)
+    job = jobs.filter(status__in=('pending', 'running')).first()
+    if job is None:
+        job = jobs.create(
+            schema_name=connection.schema_name,
+            voucher_set_id=voucher_set.pk,
+            created=voucher_set.vouchers.count(),
+            total=voucher_set.count,
+        )
+    return job
+
+
+def claim_voucher_generation_job():
+    """Lock the oldest pending job and mark it running, skipping jobs other workers hold."""
+    from public_apps.merchant.models import VoucherGenerationJob
+
+    with transaction.atomic():
+        job = (
+            VoucherGenerationJob.objects.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.attempts += 1
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'attempts', 'started_at'])
+    return job
+
+
+def requeue_stale_voucher_jobs(older_than):
+    """Put jobs left running by a crashed worker back in the queue."""
+    from public_apps.merchant.models import VoucherGenerationJob
+
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    return VoucherGenerationJob.objects.filter(status='running', started_at__lt=cutoff).update(status='pending')
+
+
+def run_voucher_generation_job(job):
+    """Generate the job's voucher set, recording progress after each batch and the outcome."""
+    VoucherSet = get_model('voucher', 'VoucherSet')
+
+    try:
+        with schema_context(job.schema_name):
+            voucher_set = VoucherSet.objects.get(pk=job.voucher_set_id)
+            for progress in generate_voucher_set(voucher_set):
+                job.created, job.total = progress['created'], progress['total']
+                job.save(update_fields=['created', 'total'])
+    except Exception as e:
+        logger.exception("Voucher generation job %s failed", job.pk)
+        job.status = 'failed'
+        job.error = str(e)
+    else:
+        job.status = 'succeeded'
+        job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    return job
@@ -0,0 +1,230 @@
+"""
+Voucher lookup by code for a store, and usage counts without counting
+VoucherApplications on every availability check.
+
+Codes typed at checkout go through three layers:
+
+* A Bloom filter of the store's codes, kept per process and shared through
+  the cache, turns away codes that don't exist without a cache or database
+  round trip. It is rebuilt when the store's code version moves, which new
+  vouchers and code changes bump as they commit.
+* The shared cache holds each looked-up code's voucher, or a miss marker
+  for VOUCHER_NEGATIVE_CACHE_TIMEOUT to absorb the filter's false
+  positives. Voucher saves and deletes drop the entry.
+* Application counts per voucher, and per voucher and user, live in the
+  cache and move with VoucherApplication inserts and deletes as they
+  commit, so storefront lookups don't count rows. They can lag behind
+  concurrent orders: checkout and Voucher.record_usage query instead.
+
+Versions are read from the shared cache, so every worker sees new codes
+once they commit; with a per-process cache a code created by another
+process would be turned away by a stale filter.
+
+VOUCHER_LOOKUP_CACHE_TIMEOUT bounds the life of everything but misses.
+"""
+import hashlib
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from oscar.core.loading import get_model
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_KEY = 'voucher_lookup:{schema_name}:{store_id}:{code}'
+CODES_VERSION_KEY = 'voucher_codes_version:{schema_name}:{store_id}'
+CODE_FILTER_KEY = 'voucher_code_filter:{schema_name}:{store_id}:{version}'
+APPLICATIONS_KEY = 'voucher_applications:{schema_name}:{voucher_id}'
+USER_APPLICATIONS_KEY = 'voucher_applications:{schema_name}:{voucher_id}:{user_id}'
+
+# Cached in place of a voucher for codes that don't exist
+MISSING = 0
+
+# False positive rate the code filters are sized for
+CODE_FILTER_ERROR_RATE = 0.01
+
+# (schema_name, store_id) -> CodeFilter
+_filters = {}
+
+
+def get_lookup_timeout():
+    return getattr(settings, 'VOUCHER_LOOKUP_CACHE_TIMEOUT', 3600)
+
+
+def get_negative_timeout():
+    return getattr(settings, 'VOUCHER_NEGATIVE_CACHE_TIMEOUT', 300)
+
+
+def normalize_code(code):
+    # Voucher.save() upper cases codes
+    return code.strip().upper()
+
+
+def _new_version():
+    # Timestamp-based, so a version key lost to eviction never resurrects old filters
+    return int(time.time() * 1000)
+
+
+def _get_codes_version(schema_name, store_id):
+    return cache.get_or_set(
+        CODES_VERSION_KEY.format(schema_name=schema_name, store_id=store_id), _new_version(), None
+    )
+
+
+class CodeFilter:
+    """Bloom filter over a store's voucher codes: no false negatives, CODE_FILTER_ERROR_RATE false positives."""
+    __slots__ = ('version', 'num_hashes', 'bits', 'built_at')
+
+    def __init__(self, version, num_hashes, bits):
+        self.version = version
+        self.num_hashes = num_hashes
+        self.bits = bits
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, store_id, version):
+        Voucher = get_model('voucher', 'Voucher')
+
+        codes = Voucher.objects.filter(store_id=store_id).values_list('code', flat=True)
+        count = codes.count()
+        num_bits = max(1024, math.ceil(-count * math.log(CODE_FILTER_ERROR_RATE) / math.log(2) ** 2))
+        num_hashes = max(1, round(num_bits / max(count, 1) * math.log(2)))
+        code_filter = cls(version, num_hashes, bytearray(math.ceil(num_bits / 8)))
+        for code in codes.iterator(chunk_size=10000):
+            code_filter.add(code)
+        logger.debug("Built voucher code filter for store %s: %d codes, %d bytes", store_id, count, len(code_filter.bits))
+        return code_filter
+
+    def _positions(self, code):
+        digest = hashlib.blake2b(code.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        num_bits = len(self.bits) * 8
+        return ((first + n * second) % num_bits for n in range(self.num_hashes))
+
+    def add(self, code):
+        for position in self._positions(code):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, code):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(code))
+
+    def is_fresh(self, version):
+        return self.version == version and time.monotonic() - self.built_at < get_lookup_timeout()
+
+    def to_cache(self):
+        return self.num_hashes, bytes(self.bits)
+
+    @classmethod
+    def from_cache(cls, version, value):
+        num_hashes, bits = value
+        return cls(version, num_hashes, bytearray(bits))
+
+
+def get_code_filter(store_id):
+    """This process's code filter for store_id, loaded from the cache or rebuilt when stale."""
+    schema_name = connection.schema_name
+    version = _get_codes_version(schema_name, store_id)
+    code_filter = _filters.get((schema_name, store_id))
+    if code_filter is None or not code_filter.is_fresh(version):
+        # Built once per version across processes
+        key = CODE_FILTER_KEY.format(schema_name=schema_name, store_id=store_id, version=version)
+        value = cache.get(key)
+        if value is not None:
+            code_filter = CodeFilter.from_cache(version, value)
+        else:
+            code_filter = CodeFilter.build(store_id, version)
+            cache.set(key, code_filter.to_cache(), get_lookup_timeout())
+        _filters[(schema_name, store_id)] = code_filter
+    return code_filter
+
+
+def lookup_voucher(store_id, code):
+    """The store's voucher with code, or None; codes the store doesn't have rarely reach the database."""
+    Voucher = get_model('voucher', 'Voucher')
+
+    code = normalize_code(code)
+    if not code or code not in get_code_filter(store_id):
+        return None
+    key = LOOKUP_KEY.format(schema_name=connection.schema_name, store_id=store_id, code=code)
+    voucher = cache.get(key)
+    if voucher == MISSING:
+        return None
+    if voucher is None or voucher.code != code:
+        # Entries cached under a code the voucher has since given up are misses
+        voucher = Voucher.objects.filter(store_id=store_id, code=code).first()
+        if voucher is None:
+            cache.set(key, MISSING, get_negative_timeout())
+        else:
+            cache.set(key, voucher, get_lookup_timeout())
+    return voucher
+
+
+def invalidate_voucher_codes(store_id, codes=(), new_codes=False):
+    """
+    Drop cached lookups of codes, now and on commit. new_codes also moves
+    the store's code version, so code filters are rebuilt to include them.
+    """
+    schema_name = connection.schema_name
+    keys = [LOOKUP_KEY.format(schema_name=schema_name, store_id=store_id, code=code) for code in codes]
+    version_key = CODES_VERSION_KEY.format(schema_name=schema_name, store_id=store_id)
+
+    def invalidate():
+        if keys:
+            cache.delete_many(keys)
+        if new_codes:
+            _filters.pop((schema_name, store_id), None)
+            try:
+                cache.incr(version_key)
+            except ValueError:
+                cache.set(version_key, _new_version(), None)
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+def _applications_key(schema_name, voucher_id, user_id=None):
+    if user_id is None:
+        return APPLICATIONS_KEY.format(schema_name=schema_name, voucher_id=voucher_id)
+    return USER_APPLICATIONS_KEY.format(schema_name=schema_name, voucher_id=voucher_id, user_id=user_id)
+
+
+def _count_applications(voucher_id, user_id=None):
+    VoucherApplication = get_model('voucher', 'VoucherApplication')
+
+    applications = VoucherApplication.objects.filter(voucher_id=voucher_id)
+    if user_id is not None:
+        applications = applications.filter(user_id=user_id)
+    return applications.count()
+
+
+def get_application_count(voucher, user=None):
+    """Applications of voucher, or of voucher by user, counted once and then cached."""
+    user_id = getattr(user, 'pk', None)
+    key = _applications_key(connection.schema_name, voucher.pk, user_id)
+    count = cache.get(key)
+    if count is None:
+        count = _count_applications(voucher.pk, user_id)
+        # add(), not set(): a commit that raced this count has already stored a newer one
+        cache.add(key, count, get_lookup_timeout())
+    return count
+
+
+def record_application_change(voucher_id, user_id, delta):
+    """
+    Move the cached counts of voucher_id, and of it by user_id, by delta
+    once the transaction commits. Counts that aren't cached are recounted
+    and stored, so a get_application_count that read the rows before the
+    commit can't add its stale count afterwards.
+    """
+    schema_name = connection.schema_name
+
+    def update():
+        for counted_user_id in {None, user_id}:
+            key = _applications_key(schema_name, voucher_id, counted_user_id)
+            try:
+                cache.incr(key, delta)
+            except ValueError:
+                cache.set(key, _count_applications(voucher_id, counted_user_id), get_lookup_timeout())
+    transaction.on_commit(update)
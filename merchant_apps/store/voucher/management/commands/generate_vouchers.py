@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from oscar.core.loading import get_model
+
+from merchant_apps.store.voucher.generator import generate_voucher_set
+
+VoucherSet = get_model('voucher', 'VoucherSet')
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a voucher set's missing vouchers in bulk, printing progress after each batch. "
+        "Run inside a merchant schema (tenant_command); an interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('voucher_set', type=int, help='VoucherSet id')
+        parser.add_argument('--count', type=int, help='Grow the set to this many vouchers first')
+        parser.add_argument('--batch-size', type=int, help='Vouchers per insert (VOUCHER_GENERATION_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        try:
+            voucher_set = VoucherSet.objects.get(pk=options['voucher_set'])
+        except VoucherSet.DoesNotExist:
+            raise CommandError(f"Voucher set {options['voucher_set']} does not exist")
+
+        if options['count'] is not None:
+            if options['count'] < voucher_set.count:
+                raise CommandError(f"Voucher set already has a count of {voucher_set.count}")
+            voucher_set.count = options['count']
+            # Not save(): Oscar's VoucherSet.save() generates the vouchers inline
+            VoucherSet.objects.filter(pk=voucher_set.pk).update(count=voucher_set.count)
+
+        for progress in generate_voucher_set(voucher_set, options['batch_size']):
+            rate = progress['created'] / progress['elapsed'] if progress['elapsed'] else 0
+            self.stdout.write(
+                f"{progress['created']}/{progress['total']} vouchers, {progress['elapsed']:.1f}s, {rate:.0f}/s"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Voucher set {voucher_set.pk} has {progress['total']} vouchers"))
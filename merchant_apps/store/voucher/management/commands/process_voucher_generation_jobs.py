@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from merchant_apps.store.voucher.jobs import (
+    claim_voucher_generation_job,
+    requeue_stale_voucher_jobs,
+    run_voucher_generation_job,
+)
+
+
+class Command(BaseCommand):
+    help = 'Run queued voucher set generation (VoucherGenerationJob rows) for every merchant.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument(
+            '--stale-after', type=int, default=3600,
+            help='Requeue jobs left running for longer than this many seconds'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale_voucher_jobs(options['stale_after'])
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale jobs"))
+
+            job = claim_voucher_generation_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            started = time.perf_counter()
+            run_voucher_generation_job(job)
+            elapsed = time.perf_counter() - started
+            name = f"{job.schema_name} voucher set {job.voucher_set_id}"
+            if job.status == 'succeeded':
+                self.stdout.write(self.style.SUCCESS(f"{name}: {job.created} vouchers in {elapsed:.2f}s"))
+            else:
+                self.stdout.write(self.style.ERROR(f"{name} failed after {elapsed:.2f}s: {job.error}"))
@@ -0,0 +1,17 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voucher', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='voucher',
+            name='source_set',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='vouchers', to='voucher.voucherset', verbose_name='Voucher set'),
+        ),
+    ]
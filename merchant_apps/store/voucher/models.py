@@ -4,9 +4,16 @@ from oscar.apps.voucher.abstract_models import (
     AbstractVoucherSet,
     AbstractVoucherApplication
     )
+from oscar.apps.voucher.utils import get_unused_code
 from oscar.core.loading import get_model
-from django.db import models
+from django.db import models, transaction
 from merchant_apps.store.meta.models import Store
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from oscar.apps.order.exceptions import UnableToPlaceOrder
+from .generator import generate_voucher_set
+from .lookup import get_application_count, invalidate_voucher_codes, record_application_change
 
 
 # OscarVoucher = get_model('voucher', 'Voucher') 
@@ -48,6 +55,36 @@ class VoucherSet(AbstractVoucherSet):
         app_label = 'voucher'
         unique_together = ('name', 'store')
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            return
+        # Oscar's save() moves the set's voucher dates with a queryset update, which sends no post_save
+        codes = list(self.vouchers.values_list('code', flat=True))
+        for start in range(0, len(codes), 10000):
+            invalidate_voucher_codes(self.store_id, codes[start:start + 10000])
+
+    def generate_vouchers(self):
+        """Generate the vouchers this set is missing, in bulk."""
+        for _progress in generate_voucher_set(self):
+            pass
+
+    def add_new(self):
+        """Add a new voucher to this set"""
+        Voucher = get_model('voucher', 'Voucher')
+        voucher = Voucher.objects.create(
+            name=self.name,
+            code=get_unused_code(length=self.code_length),
+            store_id=self.store_id,
+            source_set=self,
+            usage=Voucher.SINGLE_USE,
+            start_datetime=self.start_datetime,
+            end_datetime=self.end_datetime)
+        if self.offer_id:
+            voucher.offers.add(self.offer_id)
+        return voucher
+
 class VoucherApplication(AbstractVoucherApplication):
     voucher = models.ForeignKey(
         'voucher.Voucher',
@@ -112,13 +149,105 @@ class Voucher(AbstractVoucher):
         related_name='store_voucher_groups',
         blank=True
     )
+    # Oscar's voucher_set foreign key; that name is taken by the voucher groups above
+    source_set = models.ForeignKey(
+        'voucher.VoucherSet',
+        on_delete=models.CASCADE,
+        related_name='vouchers',
+        null=True,
+        blank=True,
+        verbose_name='Voucher set'
+    )
 
 
 
     def __str__(self):
         return self.code
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets post_save tell code changes, which code filters must learn, from counter updates
+        instance._loaded_code = instance.__dict__.get('code')
+        return instance
+
+    def _has_applications(self, user=None, cached=False):
+        if cached:
+            return bool(get_application_count(self, user))
+        applications = VoucherApplication.objects.filter(voucher=self)
+        if user is not None:
+            applications = applications.filter(user=user)
+        return applications.exists()
+
+    def is_available_to_user(self, user=None, cached=False):
+        """
+        Oscar's check. cached counts applications from the cache (see
+        voucher.lookup), which may lag behind orders: it is only for
+        storefront lookups, never for checkout or redemption.
+        """
+        is_available, message = False, ''
+        if self.usage == self.SINGLE_USE:
+            is_available = not self._has_applications(cached=cached)
+            if not is_available:
+                message = _("This voucher has already been used")
+        elif self.usage == self.MULTI_USE:
+            is_available = True
+        elif self.usage == self.ONCE_PER_CUSTOMER:
+            if not user.is_authenticated:
+                is_available = False
+                message = _(
+                    "This voucher is only available to signed in users")
+            else:
+                is_available = not self._has_applications(user, cached=cached)
+                if not is_available:
+                    message = _("You have already used this voucher in "
+                                "a previous order")
+        return is_available, message
+
+    def record_usage(self, order, user):
+        """
+        Records a usage of this voucher in an order.
+
+        The voucher row is locked and its availability checked again, so
+        two orders placed at once can't both use a single use voucher.
+        """
+        with transaction.atomic():
+            voucher = Voucher.objects.select_for_update().get(pk=self.pk)
+            is_available, message = voucher.is_available_to_user(user)
+            if not is_available:
+                raise UnableToPlaceOrder(message)
+            # applications here relates orders, not VoucherApplication rows
+            VoucherApplication.objects.create(
+                voucher=voucher, order=order, user=user if user.is_authenticated else None)
+            voucher.num_orders += 1
+            voucher.save(update_fields=['num_orders'])
+        self.num_orders = voucher.num_orders
+    record_usage.alters_data = True
+
     class Meta(AbstractVoucher.Meta):
         unique_together = ('code', 'store')
         app_label = 'voucher'
 # from oscar.apps.voucher.models import *
+
+
+@receiver(post_save, sender=Voucher)
+def invalidate_voucher_lookup(sender, instance=None, created=False, **kwargs):
+    loaded_code = getattr(instance, '_loaded_code', None)
+    invalidate_voucher_codes(instance.store_id, [instance.code], new_codes=created or loaded_code != instance.code)
+    instance._loaded_code = instance.code
+
+
+@receiver(post_delete, sender=Voucher)
+def invalidate_deleted_voucher_lookup(sender, instance=None, **kwargs):
+    invalidate_voucher_codes(instance.store_id, [instance.code])
+
+
+@receiver(post_save, sender=VoucherApplication)
+def count_voucher_application(sender, instance=None, created=False, **kwargs):
+    if created:
+        record_application_change(instance.voucher_id, instance.user_id, 1)
+
+
+@receiver(post_delete, sender=VoucherApplication)
+def uncount_voucher_application(sender, instance=None, **kwargs):
+    record_application_change(instance.voucher_id, instance.user_id, -1)
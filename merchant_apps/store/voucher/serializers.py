@@ -0,0 +1,28 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from public_apps.merchant.models import VoucherGenerationJob
+
+
+def get_max_voucher_set_count():
+    return getattr(settings, 'VOUCHER_SET_MAX_COUNT', 1000000)
+
+
+class VoucherGenerationSerializer(serializers.Serializer):
+    """Optional new size for a voucher set about to be generated."""
+    count = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_count(self, value):
+        voucher_set = self.context['voucher_set']
+        if value < voucher_set.count:
+            raise serializers.ValidationError(f"The set already has a count of {voucher_set.count}.")
+        if value > get_max_voucher_set_count():
+            raise serializers.ValidationError(f"Voucher sets can have at most {get_max_voucher_set_count()} vouchers.")
+        return value
+
+
+class VoucherGenerationJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VoucherGenerationJob
+        fields = ['id', 'voucher_set_id', 'status', 'created', 'total', 'error', 'created_at', 'finished_at']
+        read_only_fields = fields
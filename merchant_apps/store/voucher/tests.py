@@ -0,0 +1,220 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_tenants.test.cases import TenantTestCase
+from oscar.core.loading import get_model
+
+from merchant_apps.store.meta.models import Store
+from . import lookup
+from .generator import generate_voucher_set
+from .lookup import CodeFilter, get_application_count, get_code_filter, lookup_voucher, record_application_change
+from .models import Voucher, VoucherOffer, VoucherSet
+
+Benefit = get_model('offer', 'Benefit')
+Condition = get_model('offer', 'Condition')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+Range = get_model('offer', 'Range')
+
+
+def run_on_commit(func):
+    # TenantTestCase wraps each test in a transaction that never commits
+    func()
+
+
+class VoucherLookupTestCase(TenantTestCase):
+
+    @classmethod
+    def setup_tenant(cls, tenant):
+        tenant.name = 'Voucher Lookup Merchant'
+        tenant.contact_email = 'voucher-lookup@example.com'
+        tenant.auto_create_admin = False
+
+    def setUp(self):
+        cache.clear()
+        lookup._filters.clear()
+        patcher = mock.patch('django.db.transaction.on_commit', run_on_commit)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = Store.objects.create(name='Vouchers', slug='vouchers')
+
+    def create_voucher(self, code, usage=Voucher.SINGLE_USE):
+        now = timezone.now()
+        return Voucher.objects.create(
+            store=self.store, name=code, code=code, usage=usage,
+            start_datetime=now - datetime.timedelta(days=1), end_datetime=now + datetime.timedelta(days=1),
+        )
+
+
+class CodeFilterTests(VoucherLookupTestCase):
+
+    def test_filter_has_no_false_negatives(self):
+        codes = [f'CODE-{number:04d}' for number in range(500)]
+        for code in codes:
+            self.create_voucher(code)
+        code_filter = CodeFilter.build(self.store.pk, version=1)
+        self.assertTrue(all(code in code_filter for code in codes))
+
+    def test_filter_rejects_most_unknown_codes(self):
+        for number in range(500):
+            self.create_voucher(f'CODE-{number:04d}')
+        code_filter = CodeFilter.build(self.store.pk, version=1)
+        false_positives = sum(f'OTHER-{number:04d}' in code_filter for number in range(2000))
+        self.assertLess(false_positives, 2000 * lookup.CODE_FILTER_ERROR_RATE * 3)
+
+    def test_new_voucher_reaches_filter(self):
+        self.create_voucher('FIRST')
+        self.assertNotIn('SECOND', get_code_filter(self.store.pk))
+        self.create_voucher('SECOND')
+        self.assertIn('SECOND', get_code_filter(self.store.pk))
+
+    def test_filter_shared_through_cache(self):
+        self.create_voucher('SHARED')
+        get_code_filter(self.store.pk)
+        # Another process only has the shared cache
+        lookup._filters.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertIn('SHARED', get_code_filter(self.store.pk))
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+
+class LookupVoucherTests(VoucherLookupTestCase):
+
+    def test_lookup_is_case_insensitive(self):
+        voucher = self.create_voucher('SUMMER')
+        self.assertEqual(lookup_voucher(self.store.pk, ' summer '), voucher)
+
+    def test_unknown_code_filtered_without_queries(self):
+        self.create_voucher('SUMMER')
+        get_code_filter(self.store.pk)
+        with mock.patch.object(CodeFilter, '__contains__', return_value=False):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertIsNone(lookup_voucher(self.store.pk, 'WINTER'))
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_false_positive_cached_as_miss(self):
+        self.create_voucher('SUMMER')
+        get_code_filter(self.store.pk)
+        with mock.patch.object(CodeFilter, '__contains__', return_value=True):
+            self.assertIsNone(lookup_voucher(self.store.pk, 'WINTER'))
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertIsNone(lookup_voucher(self.store.pk, 'WINTER'))
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_created_voucher_replaces_cached_miss(self):
+        self.create_voucher('SUMMER')
+        with mock.patch.object(CodeFilter, '__contains__', return_value=True):
+            self.assertIsNone(lookup_voucher(self.store.pk, 'WINTER'))
+        voucher = self.create_voucher('WINTER')
+        self.assertEqual(lookup_voucher(self.store.pk, 'WINTER'), voucher)
+
+    def test_renamed_voucher_gives_up_old_code(self):
+        voucher = self.create_voucher('SUMMER')
+        self.assertEqual(lookup_voucher(self.store.pk, 'SUMMER'), voucher)
+        voucher.code = 'AUTUMN'
+        voucher.save()
+        with mock.patch.object(CodeFilter, '__contains__', return_value=True):
+            self.assertIsNone(lookup_voucher(self.store.pk, 'SUMMER'))
+        self.assertEqual(lookup_voucher(self.store.pk, 'AUTUMN'), voucher)
+
+
+class ApplicationCountTests(VoucherLookupTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.voucher = self.create_voucher('COUNTED', usage=Voucher.ONCE_PER_CUSTOMER)
+        self.user = get_user_model().objects.create(email='customer@example.com')
+
+    def test_count_cached_after_first_read(self):
+        self.assertEqual(get_application_count(self.voucher), 0)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(get_application_count(self.voucher), 0)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_changes_move_cached_counts(self):
+        self.assertEqual(get_application_count(self.voucher), 0)
+        self.assertEqual(get_application_count(self.voucher, self.user), 0)
+        record_application_change(self.voucher.pk, self.user.pk, 1)
+        self.assertEqual(get_application_count(self.voucher), 1)
+        self.assertEqual(get_application_count(self.voucher, self.user), 1)
+        record_application_change(self.voucher.pk, self.user.pk, -1)
+        self.assertEqual(get_application_count(self.voucher), 0)
+
+    def test_uncached_counts_are_recounted(self):
+        record_application_change(self.voucher.pk, self.user.pk, 1)
+        # No VoucherApplication rows exist, so the recount wins over the delta
+        self.assertEqual(get_application_count(self.voucher), 0)
+
+    def test_availability_ignores_cached_counts(self):
+        cache.set(lookup._applications_key(connection.schema_name, self.voucher.pk, self.user.pk), 1)
+        self.assertFalse(self.voucher.is_available_to_user(self.user, cached=True)[0])
+        self.assertTrue(self.voucher.is_available_to_user(self.user)[0])
+
+
+class VoucherSetGenerationTests(VoucherLookupTestCase):
+
+    def setUp(self):
+        super().setUp()
+        product_range = Range.objects.create(store=self.store, name='Everything', includes_all_products=True)
+        offer = ConditionalOffer.objects.create(
+            store=self.store, name='Voucher offer', offer_type=ConditionalOffer.VOUCHER,
+            condition=Condition.objects.create(store=self.store, range=product_range, type=Condition.COUNT, value=1),
+            benefit=Benefit.objects.create(store=self.store, range=product_range, type=Benefit.PERCENTAGE, value=10),
+        )
+        now = timezone.now()
+        # count=0, so Oscar's save() generates nothing yet
+        self.voucher_set = VoucherSet.objects.create(
+            store=self.store, offer=offer, name='Launch', description='', count=0,
+            start_datetime=now, end_datetime=now + datetime.timedelta(days=30),
+        )
+
+    def grow(self, count, batch_size=100):
+        VoucherSet.objects.filter(pk=self.voucher_set.pk).update(count=count)
+        self.voucher_set.count = count
+        return list(generate_voucher_set(self.voucher_set, batch_size=batch_size))
+
+    def test_codes_are_unique_and_formatted(self):
+        self.grow(250)
+        codes = list(self.voucher_set.vouchers.values_list('code', flat=True))
+        self.assertEqual(len(codes), 250)
+        self.assertEqual(len(set(codes)), 250)
+        for code in codes:
+            self.assertRegex(code, r'^[A-Z2-9]{4}-[A-Z2-9]{4}-[A-Z2-9]{4}$')
+
+    def test_progress_after_each_batch(self):
+        progress = self.grow(250)
+        self.assertEqual([p['created'] for p in progress], [0, 100, 200, 250])
+        self.assertTrue(all(p['total'] == 250 for p in progress))
+
+    def test_rerun_resumes_without_replacing_codes(self):
+        self.grow(100)
+        codes = set(self.voucher_set.vouchers.values_list('code', flat=True))
+        progress = self.grow(150)
+        self.assertEqual(progress[0]['created'], 100)
+        self.assertEqual(self.voucher_set.vouchers.count(), 150)
+        self.assertTrue(codes <= set(self.voucher_set.vouchers.values_list('code', flat=True)))
+
+    def test_overlapping_runs_do_not_overshoot_count(self):
+        VoucherSet.objects.filter(pk=self.voucher_set.pk).update(count=100)
+        self.voucher_set.count = 100
+        first = generate_voucher_set(self.voucher_set, batch_size=30)
+        self.assertEqual(next(first)['created'], 0)
+        # Another run completes the set before the first one's next batch
+        list(generate_voucher_set(VoucherSet.objects.get(pk=self.voucher_set.pk), batch_size=30))
+        list(first)
+        self.assertEqual(self.voucher_set.vouchers.count(), 100)
+
+    def test_vouchers_get_offer_rows(self):
+        self.grow(120)
+        offers = VoucherOffer.objects.filter(voucher__source_set=self.voucher_set)
+        self.assertEqual(offers.count(), 120)
+        self.assertEqual(set(offers.values_list('offer_id', flat=True)), {self.voucher_set.offer_id})
+
+    def test_generated_codes_are_found(self):
+        self.grow(10)
+        voucher = self.voucher_set.vouchers.first()
+        self.assertEqual(lookup_voucher(self.store.pk, voucher.code), voucher)
@@ -0,0 +1,14 @@
+from django.urls import path
+
+from .views import VoucherGenerationJobAPIView, VoucherLookupAPIView, VoucherSetGenerateAPIView
+
+app_name = 'voucher'
+
+urlpatterns = [
+    path('api/vouchers/lookup/', VoucherLookupAPIView.as_view(), name='voucher_lookup'),
+    path('api/voucher-sets/<int:pk>/generate/', VoucherSetGenerateAPIView.as_view(), name='voucher_set_generate'),
+    path(
+        'api/voucher-generation-jobs/<uuid:pk>/', VoucherGenerationJobAPIView.as_view(),
+        name='voucher_generation_job',
+    ),
+]
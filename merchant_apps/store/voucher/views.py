@@ -0,0 +1,78 @@
+from django.db import connection
+from django.shortcuts import get_object_or_404
+from django.utils.translation import gettext_lazy as _
+from oscar.core.loading import get_model
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from merchant_apps.store.meta.views import StoreContextMixin
+from public_apps.merchant.models import VoucherGenerationJob
+from .generator import generate_voucher_set
+from .jobs import enqueue_voucher_generation, get_inline_generation_limit
+from .lookup import lookup_voucher
+from .serializers import VoucherGenerationJobSerializer, VoucherGenerationSerializer
+
+VoucherSet = get_model('voucher', 'VoucherSet')
+
+
+class VoucherSetGenerateAPIView(StoreContextMixin, APIView):
+    """
+    Generate a voucher set's missing vouchers, optionally growing it to a
+    new count first (up to VOUCHER_SET_MAX_COUNT). Up to
+    VOUCHER_GENERATION_INLINE_LIMIT missing vouchers are generated in the
+    request and the final progress returned; larger runs are queued for
+    process_voucher_generation_jobs and answered 202 with the job.
+    """
+    # authentication_classes = [JWTAuthentication]
+    # permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        voucher_set = get_object_or_404(VoucherSet, pk=pk, store=self.get_store('write'))
+        serializer = VoucherGenerationSerializer(data=request.data, context={'voucher_set': voucher_set})
+        serializer.is_valid(raise_exception=True)
+        count = serializer.validated_data.get('count')
+        if count is not None and count != voucher_set.count:
+            voucher_set.count = count
+            # Not save(): Oscar's VoucherSet.save() generates the vouchers inline
+            VoucherSet.objects.filter(pk=voucher_set.pk).update(count=count)
+
+        if voucher_set.count - voucher_set.vouchers.count() > get_inline_generation_limit():
+            job = enqueue_voucher_generation(voucher_set)
+            return Response(VoucherGenerationJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+        for progress in generate_voucher_set(voucher_set):
+            pass
+        return Response(progress)
+
+
+class VoucherGenerationJobAPIView(StoreContextMixin, APIView):
+    """Progress of a queued voucher set generation."""
+
+    def get(self, request, pk):
+        job = get_object_or_404(VoucherGenerationJob, pk=pk, schema_name=connection.schema_name)
+        get_object_or_404(VoucherSet, pk=job.voucher_set_id, store=self.get_store('read'))
+        return Response(VoucherGenerationJobSerializer(job).data)
+
+
+class VoucherLookupAPIView(StoreContextMixin, APIView):
+    """
+    Whether ?code= is a voucher the current store's customer can use.
+    Codes the store doesn't have are turned away by its code filter and
+    miss cache, and usage comes from cached counts (see voucher.lookup).
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        voucher = lookup_voucher(self.get_store_id(), request.query_params.get('code', ''))
+        if voucher is None:
+            raise NotFound("Voucher not found.")
+        if not voucher.is_active():
+            is_available, message = False, _("This voucher is not active")
+        else:
+            is_available, message = voucher.is_available_to_user(request.user, cached=True)
+        return Response({
+            'code': voucher.code, 'name': voucher.name, 'available': is_available, 'message': message,
+        })
@@ -10,9 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from oscar.defaults import *
 from datetime import timedelta
+
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -156,20 +160,16 @@ INSTALLED_APPS = list(dict.fromkeys(SHARED_APPS + [
 ]))
 
 MIDDLEWARE = [
-    'django_tenants.middleware.main.TenantMainMiddleware',
+    'core.middleware.tenant_main.CachedTenantMainMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware', # Must come before TenantAdminMiddleware
-    'core.middleware.jwt_tenant.JWTTenantMiddleware', 
+    'core.middleware.tenant_context.TenantContextMiddleware',  # JWT, tenant and admin access checks in one pass
     'oscar.apps.basket.middleware.BasketMiddleware',
     'django.contrib.flatpages.middleware.FlatpageFallbackMiddleware',
-    'core.middleware.current_user.CurrentMerchantUserMiddleware', 
-    'core.middleware.merchant_admin.MerchantAdminMiddleware',
-    'core.middleware.merchant_isolation.MerchantIsolationMiddleware',
-    'core.middleware.admin_access.AdminAccessMiddleware',
     'core.middleware.order_creator.OrderCreatorMiddleware',
     'core.middleware.cors.CorsMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -214,6 +214,27 @@ CORS_ALLOW_HEADERS = (
 AUTH_USER_MODEL = 'user.User'
 TENANT_MODEL = 'merchant.Merchant'
 TENANT_DOMAIN_MODEL = 'merchant.Domain' 
+TENANT_CACHE_TTL = 60  # Seconds to cache hostname -> tenant lookups (0 disables)
+TENANT_MEMBERSHIP_CACHE_TIMEOUT = 300  # Seconds a user's membership map stays in the shared cache
+STORE_ACCESS_CACHE_TIMEOUT = 300  # Seconds a merchant's permitted store ids stay in the shared cache
+STOREFRONT_CONFIG_CACHE_TIMEOUT = 3600  # Upper bound on a storefront config snapshot's life; changes rebuild it at once
+RENDER_CACHE_TIMEOUT = 600  # Seconds an instance's encoded JSON stays cached; keys change with updated_at
+OFFER_INDEX_CACHE_TIMEOUT = 300  # Upper bound on a per-process store offer index; offer and range edits rebuild it at once
+RANGE_MEMBERSHIP_CACHE_TIMEOUT = 600  # Offer range product ids; catalogue and range edits drop them as they commit
+OFFER_COMBINATION_TIME_BUDGET = 0.05  # Seconds the offer combination search may spend per basket before settling on its best set so far
+VOUCHER_GENERATION_BATCH_SIZE = 5000  # Vouchers inserted and committed per batch when generating a voucher set
+VOUCHER_GENERATION_INLINE_LIMIT = 10000  # Missing vouchers the API generates in the request; more are queued for process_voucher_generation_jobs
+VOUCHER_SET_MAX_COUNT = 1000000  # Largest count the API accepts for a voucher set
+VOUCHER_LOOKUP_CACHE_TIMEOUT = 3600  # Cached vouchers by code, code filters and application counts; writes update or drop them at once
+VOUCHER_NEGATIVE_CACHE_TIMEOUT = 300  # Seconds a looked-up code that matched no voucher is remembered as missing
+# Pre-migrated schema new merchants are cloned from. Keep it current on deploy with
+# `migrate_schemas --tenant --schema=tenant_template` (create_merchants_bulk does this).
+TENANT_TEMPLATE_SCHEMA = 'tenant_template'
+# Signup queues a ProvisioningJob for `manage.py process_provisioning_jobs`; set False to provision inline
+MERCHANT_PROVISIONING_ASYNC = True
+MERCHANT_PROVISIONING_MAX_ATTEMPTS = 5  # Worker retries failed provisioning jobs until this many attempts; inline runs fail at once
+MERCHANT_PROVISIONING_RETRY_DELAY = 30  # Seconds before the first retry; doubles with every failed attempt
+TENANT_MIGRATION_WORKERS = 4  # Default pool size for `manage.py migrate_tenants_parallel`
 ROOT_URLCONF = 'multistore.urls'
 SITE_ID = 1
 
@@ -266,12 +287,18 @@ WSGI_APPLICATION = 'multistore.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django_tenants.postgresql_backend',
+        # django_tenants backend plus a warm connection pool that skips redundant SET search_path
+        'ENGINE': 'core.db.backends.tenant_pool',
         'NAME': 'multistore',
         'USER': 'admin',
         'PASSWORD': 'securepassword123',
         'HOST': '127.0.0.1',
         'PORT': '5432',
+        'POOL': {
+            'MAX_SIZE': 20,  # Open connections per process
+            'TIMEOUT': 10,  # Seconds to wait for a free connection
+            'MAX_IDLE_AGE': 300,  # Recycle connections idle for longer
+        },
     },
     'OPTIONS': { 
         'options': '-c timezone=UTC' 
@@ -281,6 +308,30 @@ DATABASE_ROUTERS = (
     'django_tenants.routers.TenantSyncRouter',
 )
 
+# Shared cache for membership maps and other versioned lookups. Invalidation
+# only reaches every worker through a shared backend, so CACHE_URL is required
+# outside DEBUG: redis://host:port/db. (Not memcached: its 1MB item limit is
+# below the size of large stores' code filters and range memberships.)
+CACHE_URL = os.environ.get('CACHE_URL', '')
+if CACHE_URL.startswith(('redis://', 'rediss://', 'unix://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': 'multistore',
+        }
+    }
+elif DEBUG:
+    # Single process development server only
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'multistore',
+        }
+    }
+else:
+    raise ImproperlyConfigured("Set CACHE_URL to a redis:// URL for the shared cache.")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -303,9 +354,18 @@ AUTH_PASSWORD_VALIDATORS = [
 AUTHENTICATION_BACKENDS = (
     # 'public_apps.user.authentication.backends.TenantAwareAuthBackend'
     # 'oscar.apps.customer.auth_backends.EmailBackend',
-    'django.contrib.auth.backends.ModelBackend',
+    'core.authentication.backends.HashExecutorModelBackend',  # ModelBackend with hashing offloaded
 )
 
+PASSWORD_HASHERS = [
+    'core.authentication.hashing.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = 216000  # PBKDF2 cost; changing it re-hashes passwords on next login
+PASSWORD_HASH_EXECUTOR = 'thread'  # 'thread', 'process' or None to hash on the request worker
+PASSWORD_HASH_WORKERS = 4  # Concurrent hashes per process; extra logins queue instead of pinning every CPU
+PASSWORD_HASH_TIMEOUT = 30  # Seconds to wait for a queued hash
+
 HAYSTACK_CONNECTIONS = {
     'default': {
         'ENGINE': 'haystack.backends.simple_backend.SimpleEngine',
@@ -325,15 +385,14 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.jwt_cache.CachedJWTAuthentication',  # Reuses the token decoded by TenantContextMiddleware
         'rest_framework.authentication.SessionAuthentication',  # Keep for browsable API
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',  # Keep for development
-    ]
+        'core.renderers.FastJSONRenderer',  # orjson when installed, stdlib json otherwise
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),  # Browsable API in development only
 }
 
 OSCAR_OVERRIDE_MODULES = [
@@ -392,6 +451,10 @@ SIMPLE_JWT = {
     'TENANT_SCHEMA_CLAIM': 'schema_name',
     'STORE_ID_CLAIM': 'store_id',
 }
+# Verified access tokens (and their users) kept in-process by jti; 0 disables. User
+# saves only clear this process's entries, so with more than one worker a
+# deactivation or password change can take until the token expires to apply.
+JWT_VERIFIED_TOKEN_CACHE_SIZE = 0
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -417,8 +480,6 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # ALLOWED_HOSTS = ['.localhost', '127.0.0.1']
 ALLOWED_HOSTS = ['*']  # For development only
 
-import os
-
 # Create logs directory path relative to BASE_DIR
 LOGS_DIR = os.path.join(BASE_DIR, 'logs')
 os.makedirs(LOGS_DIR, exist_ok=True)
@@ -176,8 +176,8 @@ urlpatterns = [
     # path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
     # # API endpoints for checkout operations
     # path('checkout/', include('merchant_apps.store.checkout.urls')),
-    # # API endpoints for voucher operations
-    # path('voucher/', include('merchant_apps.store.voucher.urls')),
+    # API endpoints for voucher operations
+    path('voucher/', include('merchant_apps.store.voucher.urls')),
     # # API endpoints for basket operations
     # path('basket/', include('merchant_apps.store.basket.urls')),
     # # API endpoints for order operations
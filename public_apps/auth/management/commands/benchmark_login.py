@@ -0,0 +1,65 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django_tenants.utils import get_tenant_model
+
+from public_apps.auth.serializers import UnifiedAuthenticationSerializer
+from public_apps.merchant.models import TenantMembership
+
+BENCHMARK_PASSWORD = 'benchmark-password-123'
+
+
+class Command(BaseCommand):
+    help = 'Measure UnifiedAuthenticationSerializer login throughput for users with 1, 5 and 50 memberships'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--memberships', type=int, nargs='+', default=[1, 5, 50])
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument(
+            '--real-hasher', action='store_true',
+            help='Keep the configured password hasher instead of MD5, to include hashing cost'
+        )
+
+    def handle(self, *args, **options):
+        merchants = list(get_tenant_model().objects.exclude(schema_name='public').order_by('id'))
+        needed = max(options['memberships'])
+        if len(merchants) < needed:
+            raise CommandError(f"Need at least {needed} merchants, found {len(merchants)}")
+
+        hashers = None if options['real_hasher'] else ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+        self.stdout.write(f"{'memberships':<14}{'logins/s':>10}{'ms/login':>10}{'queries':>10}")
+        for count in options['memberships']:
+            with override_settings(**({'PASSWORD_HASHERS': hashers} if hashers else {})):
+                self._run(merchants[:count], options['iterations'])
+
+    def _run(self, merchants, iterations):
+        User = get_user_model()
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email=f"login-benchmark-{len(merchants)}@example.com",
+                password=BENCHMARK_PASSWORD,
+            )
+            TenantMembership.objects.bulk_create([
+                TenantMembership(user=user, tenant=merchant, role='store_staff')
+                for merchant in merchants
+            ])
+            attrs = {'email': user.email, 'password': BENCHMARK_PASSWORD}
+
+            with CaptureQueriesContext(connection) as ctx:
+                UnifiedAuthenticationSerializer().validate(attrs)
+            queries = len(ctx.captured_queries)
+
+            started = time.perf_counter()
+            for _ in range(iterations):
+                UnifiedAuthenticationSerializer().validate(attrs)
+            elapsed = time.perf_counter() - started
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{len(merchants):<14}{iterations / elapsed:>10.1f}{elapsed / iterations * 1000:>10.2f}{queries:>10}"
+        )
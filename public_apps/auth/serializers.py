@@ -1,5 +1,5 @@
 # public_apps/auth/serializers.py
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.password_validation import validate_password
@@ -8,8 +8,12 @@ from datetime import timedelta
 import secrets
 from django.db import IntegrityError, transaction
 
-from public_apps.merchant.models import Domain, Merchant, TenantMembership, TenantInvitation
+from public_apps.merchant.models import Domain, Merchant, ProvisioningJob, TenantMembership, TenantInvitation
+from public_apps.merchant.provisioning import (
+    enqueue_merchant_provisioning, provisioning_is_async, run_provisioning_job,
+)
 from public_apps.user.tokens import TenantToken
+from core.authentication.hashing import PasswordHashTimeout, hash_password
 
 User = get_user_model()
 
@@ -31,10 +35,10 @@ class UnifiedAuthenticationSerializer(TokenObtainPairSerializer):
         if not user.is_active:
             raise serializers.ValidationError('User account is disabled')
         
-        # Get active tenant memberships
-        memberships = user.memberships.filter(is_active=True).select_related('tenant')
+        # Get active tenant memberships, materialized once for the whole login
+        memberships = list(user.memberships.filter(is_active=True).select_related('tenant'))
         
-        if not memberships.exists():
+        if not memberships:
             raise serializers.ValidationError('User has no active tenant access')
         
         # Prepare response data
@@ -46,7 +50,7 @@ class UnifiedAuthenticationSerializer(TokenObtainPairSerializer):
         }
         
         # Handle multi-tenant scenario
-        if memberships.count() > 1:
+        if len(memberships) > 1:
             data['requires_tenant_selection'] = True
             data['available_tenants'] = [
                 {
@@ -60,11 +64,11 @@ class UnifiedAuthenticationSerializer(TokenObtainPairSerializer):
             ]
         else:
             # Single tenant - generate tokens immediately
-            membership = memberships.first()
+            membership = memberships[0]
             tenant = membership.tenant
             
             # Generate tenant-aware tokens
-            token = TenantToken.for_user_and_tenant(user, tenant)
+            token = TenantToken.for_user_and_tenant(user, tenant, membership)
             
             data.update({
                 'access': str(token.access_token),
@@ -92,7 +96,8 @@ class TenantSelectionSerializer(serializers.Serializer):
         user = self.context['request'].user
         
         try:
-            membership = user.memberships.get(
+            # Kept for create(), so selecting a tenant loads the membership once
+            self._membership = user.memberships.select_related('tenant').get(
                 tenant_id=value,
                 is_active=True
             )
@@ -102,17 +107,11 @@ class TenantSelectionSerializer(serializers.Serializer):
     
     def create(self, validated_data):
         user = self.context['request'].user
-        tenant_id = validated_data['tenant_id']
-        
-        membership = user.memberships.get(
-            tenant_id=tenant_id,
-            is_active=True
-        )
-        
+        membership = self._membership
         tenant = membership.tenant
         
         # Generate tenant-specific tokens
-        token = TenantToken.for_user_and_tenant(user, tenant)
+        token = TenantToken.for_user_and_tenant(user, tenant, membership=membership)
         
         # Update primary tenant if user chooses
         if self.context['request'].data.get('set_as_primary'):
@@ -157,8 +156,11 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         validated_data.pop('password2')
         password = validated_data.pop('password')
         
-        user = User.objects.create(**validated_data)
-        user.set_password(password)
+        user = User(**validated_data)
+        try:
+            user.password = hash_password(password)
+        except PasswordHashTimeout:
+            raise exceptions.Throttled(detail="Too many passwords are being processed right now; try again shortly.")
         user.save()
         
         return user
@@ -363,7 +365,7 @@ class SocialAuthSerializer(serializers.Serializer):
             user.save()
         
         # Get active tenant memberships
-        memberships = user.memberships.filter(is_active=True).select_related('tenant')
+        memberships = list(user.memberships.filter(is_active=True).select_related('tenant'))
         
         # Prepare response data
         data = {
@@ -374,11 +376,11 @@ class SocialAuthSerializer(serializers.Serializer):
             'is_new_user': created
         }
         
-        if not memberships.exists():
+        if not memberships:
             # User has no tenant access - they need to join or create one
             data['requires_onboarding'] = True
             data['message'] = 'Welcome! You can join an existing merchant or create your own.'
-        elif memberships.count() > 1:
+        elif len(memberships) > 1:
             # Multi-tenant scenario
             data['requires_tenant_selection'] = True
             data['available_tenants'] = [
@@ -393,10 +395,10 @@ class SocialAuthSerializer(serializers.Serializer):
             ]
         else:
             # Single tenant - generate tokens immediately
-            membership = memberships.first()
+            membership = memberships[0]
             tenant = membership.tenant
             
-            token = TenantToken.for_user_and_tenant(user, tenant)
+            token = TenantToken.for_user_and_tenant(user, tenant, membership)
             
             data.update({
                 'access': str(token.access_token),
@@ -448,7 +450,10 @@ class MerchantCreationSerializer(serializers.ModelSerializer):
         schema_name = base_name
         counter = 0
         original_schema = schema_name
-        while Merchant.objects.filter(schema_name=schema_name).exists():
+        while (
+            Merchant.objects.filter(schema_name=schema_name).exists()
+            or ProvisioningJob.objects.filter(schema_name=schema_name).exists()
+        ):
             counter += 1
             schema_name = f"{original_schema}_{counter}"
         return schema_name
@@ -472,33 +477,18 @@ class MerchantCreationSerializer(serializers.ModelSerializer):
         if 'schema_name' not in validated_data:
             validated_data['schema_name'] = self._generate_schema_name(validated_data['name'])
 
-        try:
-            with transaction.atomic():
-                # Create merchant
-                merchant = Merchant.objects.create(**validated_data)
-                merchant._create_admin_user()  # Ensure admin user is created
-                
-                # Create domains if provided
-                # for domain_data in domains_data:
-                #     Domain.objects.create(tenant=merchant, **domain_data)
-
-                # Create TenantMembership for the user
-                TenantMembership.objects.create(
-                    user=user,
-                    tenant=merchant,
-                    role='merchant_admin',
-                    is_owner=True,
-                    is_active=True
-                )
-
-                # Set as primary tenant if user has no primary tenant
-                if not user.primary_tenant:
-                    user.primary_tenant = merchant
-                    user.save()
+        self.created_user = user
 
+        # Schema, domain, admin user and owner membership are created by the
+        # process_provisioning_jobs worker; signup only records the job.
+        schema_name = validated_data.pop('schema_name')
+        try:
+            job = enqueue_merchant_provisioning(user, schema_name, **validated_data)
         except IntegrityError as e:
             if 'unique constraint' in str(e):
                 raise serializers.ValidationError("Merchant with this schema_name already exists.")
             raise
 
-        return merchant  
+        if not provisioning_is_async():
+            run_provisioning_job(job)
+        return job
@@ -1,3 +1,86 @@
-from django.test import TestCase
+from concurrent.futures import Future
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import Throttled
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.authentication.backends import HashExecutorModelBackend
+from core.authentication.hashing import hash_metrics
+from core.authentication.jwt_cache import CachedJWTAuthentication
+from core.authentication.stateless import StatelessTenantJWTAuthentication, TenantClaimsUser
+from public_apps.merchant.memberships import get_tenant_summary
+from .serializers import UserRegistrationSerializer
+from .views import UserTenantsView
+
+
+class StatelessAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(email='stateless@example.com', password='secret123')
+        self.token = str(AccessToken.for_user(self.user))
+
+    def get(self, path='/api/auth/tenants/'):
+        return APIRequestFactory().get(path, HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def test_tenants_view_runs_without_queries(self):
+        get_tenant_summary(self.user.pk)
+        request = self.get()
+        with CaptureQueriesContext(connection) as ctx:
+            response = UserTenantsView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_stored_results_are_per_authentication_class(self):
+        request = self.get()
+        user, _token = CachedJWTAuthentication().authenticate(request)
+        self.assertIsInstance(user, get_user_model())
+
+        claims_user, _token = StatelessTenantJWTAuthentication().authenticate(request)
+        self.assertIsInstance(claims_user, TenantClaimsUser)
+        self.assertFalse(claims_user.is_hydrated)
+
+        # Each class reuses its own result
+        self.assertIs(CachedJWTAuthentication().authenticate(request)[0], user)
+        self.assertIs(StatelessTenantJWTAuthentication().authenticate(request)[0], claims_user)
+
+
+class StalledExecutor:
+    """Hash executor that never gets to the work it is given."""
+
+    def submit(self, func, *args):
+        return Future()
+
+
+@override_settings(PASSWORD_HASH_TIMEOUT=0.01)
+class HashTimeoutTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='busy@example.com', password='secret123')
+        hash_metrics.reset()
+        patcher = mock.patch('core.authentication.hashing.get_hash_executor', return_value=StalledExecutor())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_login_fails_instead_of_erroring(self):
+        user = HashExecutorModelBackend().authenticate(None, username=self.user.email, password='secret123')
+        self.assertIsNone(user)
+        self.assertEqual(hash_metrics.snapshot()['check']['timeouts'], 1)
+
+    def test_registration_is_throttled(self):
+        serializer = UserRegistrationSerializer(data={
+            'email': 'new@example.com', 'first_name': 'New', 'last_name': 'User',
+            'password': 'a-long-enough-password', 'password2': 'a-long-enough-password',
+        })
+        serializer.is_valid(raise_exception=True)
+        with self.assertRaises(Throttled):
+            serializer.save()
+        self.assertEqual(hash_metrics.snapshot()['hash']['timeouts'], 1)
+        self.assertFalse(get_user_model().objects.filter(email='new@example.com').exists())
@@ -5,6 +5,7 @@ from .views import (
     SocialAuthView,
     RegisterView,
     CreateMerchantView,
+    ProvisioningStatusView,
     InviteUserView,
     AcceptInvitationView,
     UserTenantsView,
@@ -24,6 +25,7 @@ urlpatterns = [
     
     # Merchant management
     path('create-merchant/', CreateMerchantView.as_view(), name='create_merchant'),
+    path('provisioning/<uuid:job_id>/', ProvisioningStatusView.as_view(), name='provisioning_status'),
     
     # Invitations
     path('invite/<int:tenant_id>/', InviteUserView.as_view(), name='invite_user'),
@@ -1,11 +1,15 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status,permissions
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 
+from core.authentication.stateless import StatelessTenantJWTAuthentication
 from .serializers import (
     UnifiedAuthenticationSerializer,
     TenantSelectionSerializer,
@@ -15,8 +19,9 @@ from .serializers import (
     InvitationAcceptanceSerializer,
     SocialAuthSerializer
 )
-from public_apps.merchant.models import TenantMembership
-from public_apps.user.tokens import TenantToken, get_tokens_for_user_and_tenant
+from public_apps.merchant.memberships import get_tenant_summary
+from public_apps.merchant.models import ProvisioningJob, TenantMembership
+from public_apps.user.tokens import TenantToken, get_tokens_for_user_and_tenant, get_universal_tokens_for_user
 
 User = get_user_model()
 
@@ -109,25 +114,58 @@ class CreateMerchantView(APIView):
         )
         serializer.is_valid(raise_exception=True)
         
-        merchant = serializer.save()
+        job = serializer.save()
         
         # Get the user (either authenticated or newly created)
         user = request.user if request.user.is_authenticated else serializer.created_user
         
-        # Generate tokens for the new merchant
-        token = TenantToken.for_user_and_tenant(user, merchant)
-        
-        return Response({
-            'merchant': {
-                'id': merchant.id,
-                'name': merchant.name,
-                'domain': merchant.domain_url,
-                'schema_name': merchant.schema_name
-            },
-            'access': str(token.access_token),
-            'refresh': str(token),
-            'redirect_url': f"https://{merchant.domain_url}/dashboard/"
-        }, status=status.HTTP_201_CREATED)
+        response = {
+            'job_id': str(job.id),
+            'status': job.status,
+            'schema_name': job.schema_name,
+            'status_url': reverse('provisioning_status', kwargs={'job_id': job.id}),
+        }
+        if not request.user.is_authenticated:
+            # Lets a user created during signup poll the job status
+            response.update(get_universal_tokens_for_user(user))
+        return Response(response, status=status.HTTP_202_ACCEPTED)
+
+
+class ProvisioningStatusView(APIView):
+    """
+    Report the state of a merchant signup. Once provisioning succeeds the
+    response carries the merchant and tenant tokens signup used to return.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(
+            ProvisioningJob.objects.select_related('merchant'), id=job_id, user=request.user
+        )
+        data = {
+            'job_id': str(job.id),
+            'status': job.status,
+            'schema_name': job.schema_name,
+            'error': job.error or None,
+            'created_at': job.created_at,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at,
+        }
+        if job.status == 'succeeded' and job.merchant:
+            merchant = job.merchant
+            token = TenantToken.for_user_and_tenant(request.user, merchant)
+            data.update({
+                'merchant': {
+                    'id': merchant.id,
+                    'name': merchant.name,
+                    'domain': merchant.domain_url,
+                    'schema_name': merchant.schema_name
+                },
+                'access': str(token.access_token),
+                'refresh': str(token),
+                'redirect_url': f"https://{merchant.domain_url}/dashboard/"
+            })
+        return Response(data)
 
 
 class InviteUserView(APIView):
@@ -217,27 +255,12 @@ class UserTenantsView(APIView):
     """
     Get user's accessible tenants
     """
+    # Only needs the user id, so the User row is never loaded
+    authentication_classes = [StatelessTenantJWTAuthentication, SessionAuthentication]
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        memberships = request.user.memberships.filter(
-            is_active=True
-        ).select_related('tenant')
-        
-        tenants = []
-        for membership in memberships:
-            tenant = membership.tenant
-            tenants.append({
-                'id': tenant.id,
-                'name': tenant.name,
-                'domain': tenant.domain_url,
-                'schema_name': tenant.schema_name,
-                'role': membership.role,
-                'is_owner': membership.is_owner,
-                'is_primary': request.user.primary_tenant_id == tenant.id,
-                'dashboard_url': f"https://{tenant.domain_url}/dashboard/"
-            })
-        
+        tenants = get_tenant_summary(request.user.pk)['tenants']
         return Response({
             'tenants': tenants,
             'count': len(tenants)
@@ -260,7 +283,7 @@ class SwitchTenantView(APIView):
             )
         
         try:
-            membership = request.user.memberships.get(
+            membership = request.user.memberships.select_related('tenant').get(
                 tenant_id=tenant_id,
                 is_active=True
             )
@@ -272,7 +295,7 @@ class SwitchTenantView(APIView):
             )
         
         # Generate new tokens for the selected tenant
-        token = TenantToken.for_user_and_tenant(request.user, tenant)
+        token = TenantToken.for_user_and_tenant(request.user, tenant, membership=membership)
         
         # Optionally update primary tenant
         if request.data.get('set_as_primary', False):
@@ -4,7 +4,7 @@ from django_tenants.admin import TenantAdminMixin
 
 from public_apps.user.admin import UserAdmin
 from public_apps.user.models import User
-from .models import Domain, Merchant
+from .models import Domain, Merchant, ProvisioningJob, VoucherGenerationJob
 from merchant_apps.store.meta.models import StorePermission
 from django.contrib.messages import success
 from django.shortcuts import redirect
@@ -303,6 +303,23 @@ class DomainAdmin(admin.ModelAdmin):
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
     
 
+class ProvisioningJobAdmin(admin.ModelAdmin):
+    list_display = ('schema_name', 'user', 'status', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('schema_name', 'user__email')
+    readonly_fields = ('id', 'user', 'schema_name', 'payload', 'merchant', 'error', 'attempts', 'created_at', 'started_at', 'finished_at')
+
+
+class VoucherGenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('schema_name', 'voucher_set_id', 'status', 'created', 'total', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('schema_name',)
+    readonly_fields = (
+        'id', 'schema_name', 'voucher_set_id', 'created', 'total', 'error', 'attempts',
+        'created_at', 'started_at', 'finished_at',
+    )
+
+
 class PlatformAdminSite(admin.AdminSite):
     site_header = 'Platform Administration'
     site_title = 'Platform Admin'
@@ -317,5 +334,7 @@ platform_admin = PlatformAdminSite(name='platform_admin')
 # Register models only for platform admin
 platform_admin.register(Merchant, MerchantAdmin)
 platform_admin.register(Domain, DomainAdmin)
+platform_admin.register(ProvisioningJob, ProvisioningJobAdmin)
+platform_admin.register(VoucherGenerationJob, VoucherGenerationJobAdmin)
 platform_admin.register(User, UserAdmin)
 
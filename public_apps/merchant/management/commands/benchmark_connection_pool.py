@@ -0,0 +1,73 @@
+import copy
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.utils import load_backend
+from django_tenants.utils import get_public_schema_name, get_tenant_model
+
+from core.db.pool import get_pool_stats
+
+BACKENDS = (
+    ('stock', 'django_tenants.postgresql_backend'),
+    ('pooled', 'core.db.backends.tenant_pool'),
+)
+
+
+def build_wrapper(engine, alias):
+    settings_dict = copy.deepcopy(connection.settings_dict)
+    settings_dict['ENGINE'] = engine
+    return load_backend(engine).DatabaseWrapper(settings_dict, alias)
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request connection and search_path cost of the stock and pooled tenant backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+        parser.add_argument('--tenants', type=int, default=50, help='Number of merchant schemas to rotate through')
+        parser.add_argument(
+            '--repeat', type=int, default=1,
+            help='Consecutive requests per tenant before switching (models tenant affinity)'
+        )
+        parser.add_argument('--queries', type=int, default=3, help='Cursors opened per simulated request')
+
+    def handle(self, *args, **options):
+        schemas = list(
+            get_tenant_model().objects.exclude(schema_name=get_public_schema_name())
+            .order_by('id').values_list('schema_name', flat=True)[:options['tenants']]
+        )
+        if not schemas:
+            raise CommandError("No merchant schemas to benchmark against")
+
+        sequence = [
+            schemas[(i // options['repeat']) % len(schemas)]
+            for i in range(options['iterations'])
+        ]
+        self.stdout.write(
+            f"{len(sequence)} requests over {len(schemas)} schemas, "
+            f"{options['repeat']} in a row per tenant, {options['queries']} queries each"
+        )
+        self.stdout.write(f"{'backend':<10}{'req/s':>10}{'ms/req':>10}")
+
+        for label, engine in BACKENDS:
+            wrapper = build_wrapper(engine, f"benchmark_{label}")
+            elapsed = self._run(wrapper, sequence, options['queries'])
+            self.stdout.write(
+                f"{label:<10}{len(sequence) / elapsed:>10.1f}{elapsed / len(sequence) * 1000:>10.3f}"
+            )
+            if label == 'pooled':
+                for key, value in get_pool_stats(wrapper.alias).items():
+                    self.stdout.write(f"    {key:<22}{value}")
+                wrapper.pool.close_idle()
+
+    def _run(self, wrapper, sequence, queries):
+        started = time.perf_counter()
+        for schema_name in sequence:
+            # One request: select the tenant, run a few queries, close at request end
+            wrapper.set_schema(schema_name)
+            for _ in range(queries):
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            wrapper.close()
+        return time.perf_counter() - started
@@ -0,0 +1,92 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+TABLE = 'pagination_benchmark'
+ORDER_BY = 'ORDER BY created_at DESC, id DESC'
+
+
+class Command(BaseCommand):
+    help = 'Compare OFFSET and keyset page latency at increasing depth on a large temporary table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per page; the median is reported')
+        parser.add_argument(
+            '--depths', default='0,0.1,0.5,0.9,0.99',
+            help='Comma-separated page positions as a fraction of the table'
+        )
+
+    def handle(self, *args, **options):
+        rows, page_size = options['rows'], options['page_size']
+        if rows < page_size:
+            raise CommandError("--rows must be at least --page-size")
+        depths = [float(depth) for depth in options['depths'].split(',')]
+
+        with connection.cursor() as cursor:
+            self._populate(cursor, rows)
+            self.stdout.write(f"{rows} rows, {page_size} per page, median of {options['repeat']} runs")
+            self.stdout.write(f"{'depth':>8}{'offset':>12}{'count+offset ms':>18}{'keyset ms':>12}")
+            for depth in depths:
+                offset = min(int(rows * depth), rows - page_size) // page_size * page_size
+                boundary = self._boundary(cursor, offset)
+                paged = self._time(options['repeat'], lambda: self._offset_page(cursor, offset, page_size))
+                keyset = self._time(options['repeat'], lambda: self._keyset_page(cursor, boundary, page_size))
+                self.stdout.write(f"{depth:>8.2f}{offset:>12}{paged:>18.3f}{keyset:>12.3f}")
+            cursor.execute(f'DROP TABLE {TABLE}')
+
+    def _populate(self, cursor, rows):
+        # Temporary, so nothing outlives this session
+        started = time.perf_counter()
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {TABLE} ('
+            'id bigserial PRIMARY KEY, created_at timestamptz NOT NULL, payload text NOT NULL)'
+        )
+        cursor.execute(
+            f"INSERT INTO {TABLE} (created_at, payload) "
+            "SELECT now() - (n * interval '1 second'), md5(n::text) FROM generate_series(1, %s) AS n",
+            [rows],
+        )
+        # The index migration 0005 gives Merchant.created_at
+        cursor.execute(f'CREATE INDEX ON {TABLE} (created_at)')
+        cursor.execute(f'ANALYZE {TABLE}')
+        self.stdout.write(f"Populated in {time.perf_counter() - started:.1f}s")
+
+    def _offset_page(self, cursor, offset, page_size):
+        # What PageNumberPagination issues for ?page=N
+        cursor.execute(f'SELECT COUNT(*) FROM {TABLE}')
+        cursor.fetchone()
+        cursor.execute(f'SELECT * FROM {TABLE} {ORDER_BY} LIMIT %s OFFSET %s', [page_size, offset])
+        return cursor.fetchall()
+
+    def _boundary(self, cursor, offset):
+        # The position a ?cursor= link holds: created_at of the last row of the previous page
+        if not offset:
+            return None
+        cursor.execute(f'SELECT created_at FROM {TABLE} {ORDER_BY} LIMIT 1 OFFSET %s', [offset - 1])
+        return cursor.fetchone()[0]
+
+    def _keyset_page(self, cursor, boundary, page_size):
+        # What CreatedAtKeysetPagination issues: DRF's CursorPagination seeks on
+        # ordering[0] only and fetches one extra row to tell whether a next page
+        # exists. Rows sharing the boundary timestamp would be skipped with an
+        # OFFSET; the generated timestamps here are distinct, as they are in practice.
+        if boundary is None:
+            cursor.execute(f'SELECT * FROM {TABLE} {ORDER_BY} LIMIT %s', [page_size + 1])
+        else:
+            cursor.execute(
+                f'SELECT * FROM {TABLE} WHERE created_at < %s {ORDER_BY} LIMIT %s',
+                [boundary, page_size + 1],
+            )
+        return cursor.fetchall()
+
+    def _time(self, repeat, page):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            page()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
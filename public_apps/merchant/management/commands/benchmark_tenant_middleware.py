@@ -0,0 +1,86 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django_tenants.utils import get_tenant_model
+
+from core.middleware.admin_access import AdminAccessMiddleware
+from core.middleware.current_user import CurrentMerchantUserMiddleware
+from core.middleware.jwt_tenant import JWTTenantMiddleware
+from core.middleware.merchant_admin import MerchantAdminMiddleware
+from core.middleware.merchant_isolation import MerchantIsolationMiddleware
+from core.middleware.tenant_context import TenantContextMiddleware
+
+
+def _ok(request):
+    return HttpResponse()
+
+
+def build_legacy_chain():
+    """The five middlewares as they were chained in MIDDLEWARE."""
+    handler = _ok
+    for middleware in (
+        AdminAccessMiddleware,
+        MerchantIsolationMiddleware,
+        MerchantAdminMiddleware,
+        CurrentMerchantUserMiddleware,
+        JWTTenantMiddleware,
+    ):
+        handler = middleware(handler)
+    return handler
+
+
+def build_compiled_chain():
+    return TenantContextMiddleware(_ok)
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request overhead of the tenant/admin middlewares before and after consolidation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', type=str, required=True, help='Merchant schema to run requests against')
+        parser.add_argument('--iterations', type=int, default=5000)
+        parser.add_argument('--user-email', type=str, help='Authenticate requests as this user')
+
+    def handle(self, *args, **options):
+        TenantModel = get_tenant_model()
+        try:
+            tenant = TenantModel.objects.get(schema_name=options['schema'])
+        except TenantModel.DoesNotExist:
+            raise CommandError(f"No merchant with schema {options['schema']}")
+
+        user = AnonymousUser()
+        if options['user_email']:
+            from django.contrib.auth import get_user_model
+            user = get_user_model().objects.get(email=options['user_email'])
+
+        factory = RequestFactory()
+        iterations = options['iterations']
+        paths = ['/api/auth/user-tenants/', '/admin/', '/store/api/branding/']
+
+        self.stdout.write(f"{'path':<28}{'chain':<10}{'us/request':>12}{'queries':>10}")
+        for path in paths:
+            for label, chain in (('legacy', build_legacy_chain()), ('compiled', build_compiled_chain())):
+                def make_request():
+                    request = factory.get(path)
+                    request.tenant = tenant
+                    request.user = user
+                    return request
+
+                # Warm up and count queries for a single request
+                with CaptureQueriesContext(connection) as ctx:
+                    chain(make_request())
+                queries = len(ctx.captured_queries)
+
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    chain(make_request())
+                elapsed = time.perf_counter() - started
+
+                self.stdout.write(
+                    f"{path:<28}{label:<10}{elapsed / iterations * 1e6:>12.1f}{queries:>10}"
+                )
@@ -0,0 +1,87 @@
+import multiprocessing
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from public_apps.merchant.models import Merchant
+from public_apps.merchant.provisioning import (
+    ensure_template_schema,
+    init_provisioning_worker,
+    provision_merchant_worker,
+)
+
+
+class Command(BaseCommand):
+    help = 'Provision many merchant tenants in parallel by cloning the tenant template schema'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, required=True)
+        parser.add_argument('--prefix', type=str, default='merchant')
+        parser.add_argument('--start', type=int, default=1, help='First sequence number appended to the prefix')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--email-domain', type=str, default='example.com')
+        parser.add_argument('--domain-suffix', type=str, default='localhost')
+        parser.add_argument('--status', type=str, default='active')
+        parser.add_argument('--with-admin', action='store_true', help='Also create an admin user per merchant')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix'].lower()
+        if not prefix.replace('_', '').isalnum():
+            raise CommandError("Prefix can only contain alphanumerics and underscores")
+
+        specs = []
+        for number in range(options['start'], options['start'] + options['count']):
+            schema_name = f"{prefix}_{number}"
+            specs.append({
+                'name': f"{options['prefix']} {number}",
+                'schema_name': schema_name,
+                'contact_email': f"{schema_name}@{options['email_domain']}",
+                'domain_url': f"{schema_name}.{options['domain_suffix']}",
+                'status': options['status'],
+                'auto_create_admin': options['with_admin'],
+            })
+
+        existing = set(Merchant.objects.filter(
+            schema_name__in=[spec['schema_name'] for spec in specs]
+        ).values_list('schema_name', flat=True))
+        if existing:
+            raise CommandError(f"Schemas already exist: {', '.join(sorted(existing))}")
+
+        self.stdout.write("Migrating tenant template schema...")
+        started = time.perf_counter()
+        template = ensure_template_schema(verbosity=0)
+        if template:
+            self.stdout.write(f"Template {template} ready in {time.perf_counter() - started:.2f}s")
+        else:
+            self.stdout.write(self.style.WARNING(
+                "TENANT_TEMPLATE_SCHEMA is not set; every tenant will run its migrations"
+            ))
+
+        # Workers must not inherit the parent's database connections
+        connections.close_all()
+
+        timings, failures = [], []
+        total = len(specs)
+        started = time.perf_counter()
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(options['workers'], initializer=init_provisioning_worker) as pool:
+            results = pool.imap_unordered(provision_merchant_worker, specs)
+            for done, (schema_name, seconds, error) in enumerate(results, start=1):
+                if error:
+                    failures.append((schema_name, error))
+                    self.stdout.write(self.style.ERROR(f"[{done}/{total}] {schema_name} failed after {seconds:.2f}s: {error}"))
+                else:
+                    timings.append(seconds)
+                    self.stdout.write(f"[{done}/{total}] {schema_name} {seconds:.2f}s")
+        elapsed = time.perf_counter() - started
+
+        if timings:
+            self.stdout.write(self.style.SUCCESS(
+                f"Provisioned {len(timings)}/{total} merchants in {elapsed:.2f}s "
+                f"({len(timings) / elapsed:.2f}/s); per tenant "
+                f"avg {statistics.mean(timings):.2f}s, p50 {statistics.median(timings):.2f}s, max {max(timings):.2f}s"
+            ))
+        if failures:
+            raise CommandError(f"{len(failures)} merchants failed to provision")
@@ -0,0 +1,96 @@
+import json
+import multiprocessing
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from public_apps.merchant.schema_migrations import (
+    get_migration_fingerprint,
+    get_stale_schemas,
+    get_tenant_schemas,
+    init_migration_worker,
+    migrate_schema_worker,
+    record_migrated_schema,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Migrate tenant schemas across a process pool, skipping schemas already '
+        'at the current migration fingerprint, and report per-schema durations'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'TENANT_MIGRATION_WORKERS', 4),
+            help='Worker processes, each with its own database connection'
+        )
+        parser.add_argument('-s', '--schema', dest='schemas', action='append', help='Only migrate these schemas')
+        parser.add_argument('--force', action='store_true', help='Migrate schemas even when their fingerprint is current')
+        parser.add_argument('--no-template', action='store_true', help='Leave the provisioning template schema alone')
+        parser.add_argument('--report', type=str, help='Write the per-schema report to this JSON file')
+        parser.add_argument('--top', type=int, default=10, help='Slowest schemas to list in the summary')
+
+    def handle(self, *args, **options):
+        fingerprint = get_migration_fingerprint()
+        schemas = options['schemas'] or get_tenant_schemas(include_template=not options['no_template'])
+        pending = schemas if options['force'] else get_stale_schemas(schemas, fingerprint)
+
+        self.stdout.write(
+            f"Fingerprint {fingerprint[:12]}: {len(pending)} of {len(schemas)} schemas need migrating"
+        )
+        if not pending:
+            return
+
+        # Workers must not inherit the parent's database connections
+        connections.close_all()
+
+        report, failures = [], []
+        total = len(pending)
+        verbosity = max(options['verbosity'] - 1, 0)
+        started = time.perf_counter()
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(options['workers'], initializer=init_migration_worker) as pool:
+            tasks = [(schema, verbosity) for schema in pending]
+            results = pool.imap_unordered(migrate_schema_worker, tasks)
+            for done, (schema_name, seconds, error, output) in enumerate(results, start=1):
+                report.append({'schema': schema_name, 'seconds': round(seconds, 3), 'error': error})
+                if error:
+                    failures.append(schema_name)
+                    self.stdout.write(self.style.ERROR(f"[{done}/{total}] {schema_name} failed after {seconds:.2f}s: {error}"))
+                    if output:
+                        self.stderr.write(output)
+                    continue
+                record_migrated_schema(schema_name, fingerprint, seconds)
+                self.stdout.write(f"[{done}/{total}] {schema_name} {seconds:.2f}s")
+                if verbosity and output:
+                    self.stdout.write(output)
+        elapsed = time.perf_counter() - started
+
+        durations = [row['seconds'] for row in report if not row['error']]
+        if durations:
+            self.stdout.write(self.style.SUCCESS(
+                f"Migrated {len(durations)}/{total} schemas in {elapsed:.2f}s with {options['workers']} workers; "
+                f"per schema avg {statistics.mean(durations):.2f}s, p50 {statistics.median(durations):.2f}s, "
+                f"max {max(durations):.2f}s"
+            ))
+            self.stdout.write("Slowest schemas:")
+            for row in sorted(report, key=lambda row: row['seconds'], reverse=True)[:options['top']]:
+                self.stdout.write(f"  {row['schema']:<40}{row['seconds']:>8.2f}s")
+
+        if options['report']:
+            with open(options['report'], 'w') as fh:
+                json.dump({
+                    'fingerprint': fingerprint,
+                    'workers': options['workers'],
+                    'total_seconds': round(elapsed, 3),
+                    'skipped': len(schemas) - total,
+                    'schemas': report,
+                }, fh, indent=2)
+            self.stdout.write(f"Report written to {options['report']}")
+
+        if failures:
+            raise CommandError(f"{len(failures)} schemas failed to migrate: {', '.join(sorted(failures))}")
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from public_apps.merchant.provisioning import (
+    claim_provisioning_job,
+    ensure_template_schema,
+    requeue_stale_jobs,
+    run_provisioning_job,
+)
+
+
+class Command(BaseCommand):
+    help = 'Run queued merchant signups (ProvisioningJob rows). Start several to provision in parallel.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument(
+            '--stale-after', type=int, default=600,
+            help='Requeue jobs left running for longer than this many seconds'
+        )
+        parser.add_argument('--skip-template', action='store_true', help='Do not migrate the tenant template on start')
+
+    def handle(self, *args, **options):
+        if not options['skip_template']:
+            template = ensure_template_schema(verbosity=0)
+            if template:
+                self.stdout.write(f"Tenant template {template} is up to date")
+
+        while True:
+            requeued = requeue_stale_jobs(options['stale_after'])
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale jobs"))
+
+            job = claim_provisioning_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            started = time.perf_counter()
+            run_provisioning_job(job)
+            elapsed = time.perf_counter() - started
+            if job.status == 'succeeded':
+                self.stdout.write(self.style.SUCCESS(f"{job.schema_name} provisioned in {elapsed:.2f}s"))
+            elif job.status == 'pending':
+                self.stdout.write(self.style.WARNING(
+                    f"{job.schema_name} attempt {job.attempts} failed after {elapsed:.2f}s, "
+                    f"retrying at {job.next_attempt_at:%H:%M:%S}: {job.error}"
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f"{job.schema_name} failed after {elapsed:.2f}s: {job.error}"))
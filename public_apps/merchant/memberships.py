@@ -0,0 +1,131 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+MAP_KEY = 'tenant_memberships:{user_id}:{version}'
+VERSION_KEY = 'tenant_memberships_version:{user_id}'
+SUMMARY_KEY = 'tenant_summary:{user_id}'
+
+
+def get_membership_cache_timeout():
+    return getattr(settings, 'TENANT_MEMBERSHIP_CACHE_TIMEOUT', 300)
+
+
+def _new_version():
+    # Timestamp-based, so a version key lost to eviction never resurrects old maps
+    return int(time.time() * 1000)
+
+
+def _get_version(user_id):
+    return cache.get_or_set(VERSION_KEY.format(user_id=user_id), _new_version(), None)
+
+
+def build_membership_map(user_id):
+    """Query a user's memberships as {tenant_id: {role, permission_level, is_owner, is_active}}."""
+    from public_apps.merchant.models import TenantMembership
+
+    rows = TenantMembership.objects.filter(user_id=user_id).values_list(
+        'tenant_id', 'role', 'permission_level', 'is_owner', 'is_active'
+    )
+    return {
+        tenant_id: {
+            'role': role,
+            'permission_level': permission_level,
+            'is_owner': is_owner,
+            'is_active': is_active,
+        }
+        for tenant_id, role, permission_level, is_owner, is_active in rows
+    }
+
+
+def get_membership_map(user_id):
+    """
+    Membership map for user_id from the shared cache, built on a miss.
+    Stale maps are never read: invalidation bumps the per-user version.
+    """
+    key = MAP_KEY.format(user_id=user_id, version=_get_version(user_id))
+    membership_map = cache.get(key)
+    if membership_map is None:
+        membership_map = build_membership_map(user_id)
+        cache.set(key, membership_map, get_membership_cache_timeout())
+    return membership_map
+
+
+def get_active_membership(user_id, tenant_id):
+    """Cached membership dict if user_id is an active member of tenant_id, else None."""
+    membership = get_membership_map(user_id).get(tenant_id)
+    if membership is None or not membership['is_active']:
+        return None
+    return membership
+
+
+def invalidate_membership_map(user_id):
+    """
+    Move the user's map version now and again once the change is committed,
+    so a map rebuilt from pre-commit rows in between is never read.
+    """
+    version_key = VERSION_KEY.format(user_id=user_id)
+
+    def bump():
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            cache.set(version_key, _new_version(), None)
+    bump()
+    transaction.on_commit(bump)
+
+
+def build_tenant_summary(user_id):
+    """
+    Query the tenant picker document for user_id: the user's primary tenant
+    and one entry per active membership, most recently joined first.
+    """
+    from django.contrib.auth import get_user_model
+    from public_apps.merchant.models import TenantMembership
+
+    primary_tenant_id = (
+        get_user_model().objects.filter(pk=user_id).values_list('primary_tenant_id', flat=True).first()
+    )
+    rows = TenantMembership.objects.filter(user_id=user_id, is_active=True).values_list(
+        'tenant_id', 'tenant__name', 'tenant__domain_url', 'tenant__schema_name',
+        'role', 'permission_level', 'is_owner',
+    )
+    tenants = [
+        {
+            'id': tenant_id,
+            'name': name,
+            'domain': domain_url,
+            'schema_name': schema_name,
+            'role': role,
+            'permission_level': permission_level,
+            'is_owner': is_owner,
+            'is_primary': tenant_id == primary_tenant_id,
+            'dashboard_url': f"https://{domain_url}/dashboard/",
+        }
+        for tenant_id, name, domain_url, schema_name, role, permission_level, is_owner in rows
+    ]
+    return {'primary_tenant_id': primary_tenant_id, 'tenants': tenants}
+
+
+def get_tenant_summary(user_id):
+    """Tenant summary for user_id in a single cache read, built on a miss."""
+    key = SUMMARY_KEY.format(user_id=user_id)
+    summary = cache.get(key)
+    if summary is None:
+        summary = build_tenant_summary(user_id)
+        cache.set(key, summary, get_membership_cache_timeout())
+    return summary
+
+
+def invalidate_tenant_summaries(user_ids):
+    """
+    Drop the summaries now and again once the change is committed, so a
+    request that rebuilt one from pre-commit rows in between can't keep it.
+    """
+    keys = [SUMMARY_KEY.format(user_id=user_id) for user_id in user_ids]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchant', '0003_provisioningjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchemaMigrationState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schema_name', models.CharField(max_length=63, unique=True)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('duration', models.FloatField(blank=True, help_text='Seconds the last migration run took', null=True)),
+                ('migrated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
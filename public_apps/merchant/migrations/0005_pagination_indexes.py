@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchant', '0004_schemamigrationstate'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='merchant',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='tenantmembership',
+            index=models.Index(fields=['tenant', 'joined_at'], name='merchant_te_tenant__12ec66_idx'),
+        ),
+    ]
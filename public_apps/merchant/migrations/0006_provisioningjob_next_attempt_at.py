@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchant', '0005_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='provisioningjob',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, help_text='Earliest retry of a failed attempt', null=True),
+        ),
+    ]
@@ -5,13 +5,17 @@ from django.utils.translation import gettext_lazy as _
 from phonenumber_field.modelfields import PhoneNumberField
 from django.contrib.auth import get_user_model
 from django.db.utils import DatabaseError
-from django_tenants.utils import schema_context
+from django_tenants.utils import schema_context, schema_exists
 from django.core.exceptions import PermissionDenied
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
+from core.middleware.tenant_main import invalidate_tenant_cache
+from .memberships import invalidate_membership_map, invalidate_tenant_summaries
+from .provisioning import clone_template_schema, template_is_available
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +54,7 @@ class TenantMembership(models.Model):
         indexes = [
             models.Index(fields=['user', 'is_active']),
             models.Index(fields=['tenant', 'is_active']),
+            models.Index(fields=['tenant', 'joined_at']),
         ]
         ordering = ['-joined_at']
 
@@ -96,6 +101,90 @@ class TenantInvitation(models.Model):
         return self.status == 'pending' and self.expires_at > timezone.now()
 
 
+class ProvisioningJob(models.Model):
+    """Queued merchant signup, picked up by the process_provisioning_jobs worker."""
+
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey('user.User', on_delete=models.CASCADE, related_name='provisioning_jobs')
+    schema_name = models.CharField(max_length=63, unique=True)
+    payload = models.JSONField(default=dict, help_text="Merchant fields to create the tenant with")
+    merchant = models.ForeignKey('merchant.Merchant', on_delete=models.SET_NULL, null=True, blank=True, related_name='provisioning_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, help_text="Earliest retry of a failed attempt")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.schema_name} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+
+
+class VoucherGenerationJob(models.Model):
+    """
+    Voucher set generation too large to run in a request, picked up by the
+    process_voucher_generation_jobs worker. Kept in the public schema so one
+    worker polls every merchant's jobs; the set lives in schema_name.
+    """
+
+    STATUS_CHOICES = ProvisioningJob.STATUS_CHOICES
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    schema_name = models.CharField(max_length=63)
+    voucher_set_id = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    created = models.PositiveIntegerField(default=0, help_text="Vouchers the set had at the last progress update")
+    total = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.schema_name} voucher set {self.voucher_set_id} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+
+
+class SchemaMigrationState(models.Model):
+    """Migration fingerprint a tenant schema was last migrated to, so unchanged schemas can be skipped."""
+
+    schema_name = models.CharField(max_length=63, unique=True)
+    fingerprint = models.CharField(max_length=64)
+    duration = models.FloatField(null=True, blank=True, help_text="Seconds the last migration run took")
+    migrated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.schema_name} @ {self.fingerprint[:12]}"
+
+
 class Merchant(TenantMixin):
     name = models.CharField(_('merchant name'), max_length=255, help_text="Official business/organization name")
     schema_name = models.CharField(max_length=63, unique=True, default='merchant_schema')
@@ -140,7 +229,7 @@ class Merchant(TenantMixin):
     require_invitation = models.BooleanField(default=False)
     max_users = models.IntegerField(default=5)
     is_verified = models.BooleanField(default=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     stores = models.ManyToManyField('store_meta.Store', through='store_meta.StorePermission', related_name='merchants')
 
@@ -208,8 +297,10 @@ class Merchant(TenantMixin):
                 self.domains.all().delete()
                 with connection.cursor() as cursor:
                     cursor.execute(f'DROP SCHEMA IF EXISTS "{self.schema_name}" CASCADE')
+                tenant_id = self.pk
                 super().delete(*args, **kwargs)
                 logger.info("Successfully deleted merchant %s", self.name)
+            invalidate_tenant_cache(tenant_id=tenant_id)
         except Exception as e:
             logger.error("Failed to delete merchant %s: %s", self.name, str(e))
             raise
@@ -244,6 +335,9 @@ class Merchant(TenantMixin):
             self.clean()
             super().save(*args, **kwargs)
 
+        if not is_new:
+            invalidate_tenant_cache(tenant_id=self.pk)
+
         if is_new:
             self.get_or_create_domain()
             if self.auto_create_admin:
@@ -253,6 +347,21 @@ class Merchant(TenantMixin):
                     logger.error("Error creating admin user: %s", str(e))
                     raise
 
+    def create_schema(self, check_if_exists=False, sync_schema=True, verbosity=1):
+        """
+        Clone the pre-migrated template schema when one is configured instead
+        of running every tenant migration from scratch.
+        """
+        if not sync_schema or not template_is_available():
+            return super().create_schema(check_if_exists, sync_schema, verbosity)
+
+        if check_if_exists and schema_exists(self.schema_name):
+            return False
+
+        clone_template_schema(self.schema_name)
+        connection.set_schema_to_public()
+        return True
+
     def get_or_create_domain(self):
         Domain.objects.get_or_create(
             domain=self.domain_url,
@@ -281,6 +390,36 @@ class Domain(DomainMixin):
         super().clean()
 
 
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+def invalidate_domain_tenant_cache(sender, instance=None, **kwargs):
+    invalidate_tenant_cache(hostname=instance.domain, tenant_id=instance.tenant_id)
+
+
+@receiver(post_save, sender=TenantMembership)
+@receiver(post_delete, sender=TenantMembership)
+def invalidate_user_membership_map(sender, instance=None, **kwargs):
+    invalidate_membership_map(instance.user_id)
+    invalidate_tenant_summaries([instance.user_id])
+
+
+@receiver(post_save, sender=Merchant)
+def invalidate_member_tenant_summaries(sender, instance=None, created=False, **kwargs):
+    # Summaries copy the merchant's name, domain and schema; deletes cascade through TenantMembership
+    if not created:
+        invalidate_tenant_summaries(
+            TenantMembership.objects.filter(tenant=instance).values_list('user_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tenant_summary(sender, instance=None, created=False, update_fields=None, **kwargs):
+    # primary_tenant lives on the user row; skips last_login-only saves on every login
+    if created or (update_fields and 'primary_tenant' not in update_fields):
+        return
+    invalidate_tenant_summaries([instance.pk])
+
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     if created:
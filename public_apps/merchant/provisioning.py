@@ -0,0 +1,247 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.utils import ProgrammingError
+from django.utils import timezone
+from django_tenants.clone import CloneSchema
+from django_tenants.utils import schema_context, schema_exists
+
+from .schema_migrations import copy_migration_state, get_migration_fingerprint, record_migrated_schema
+
+logger = logging.getLogger(__name__)
+
+
+def get_template_schema():
+    """Pre-migrated schema new merchants are cloned from, or None to migrate from scratch."""
+    return getattr(settings, 'TENANT_TEMPLATE_SCHEMA', None)
+
+
+def _ensure_clone_function():
+    # CloneSchema commits when it has to install clone_schema(), which is not
+    # allowed inside Merchant.save()'s atomic block, so install it up front.
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("SELECT 'clone_schema'::regproc")
+            return
+        except ProgrammingError:
+            pass
+    CloneSchema()._create_clone_schema_function()
+
+
+def ensure_template_schema(verbosity=0):
+    """
+    Create the template schema if needed and bring it up to date with
+    every tenant migration. Run on deploy (or before bulk provisioning) so
+    clones never lag behind the code.
+    """
+    template = get_template_schema()
+    if not template:
+        return None
+
+    connection.set_schema_to_public()
+    _ensure_clone_function()
+    if not schema_exists(template):
+        logger.info("Creating tenant template schema %s", template)
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE SCHEMA "{template}"')
+
+    started = time.perf_counter()
+    call_command('migrate_schemas', tenant=True, schema_name=template, interactive=False, verbosity=verbosity)
+    elapsed = time.perf_counter() - started
+    logger.info("Tenant template schema %s migrated in %.2fs", template, elapsed)
+    connection.set_schema_to_public()
+    record_migrated_schema(template, get_migration_fingerprint(), elapsed)
+    return template
+
+
+def template_is_available():
+    template = get_template_schema()
+    return bool(template) and schema_exists(template)
+
+
+def clone_template_schema(schema_name):
+    """
+    Copy tables, sequences and rows (including django_migrations) from the
+    template into a new schema. No migrations run for the new tenant.
+    """
+    template = get_template_schema()
+    started = time.perf_counter()
+    _ensure_clone_function()
+    CloneSchema().clone_schema(template, schema_name)
+    copy_migration_state(template, schema_name)
+    logger.debug("Cloned %s into %s in %.2fs", template, schema_name, time.perf_counter() - started)
+
+
+def provision_merchant(**fields):
+    """Create one merchant (schema, domain and optional admin user). Returns (merchant, seconds)."""
+    from public_apps.merchant.models import Merchant
+
+    started = time.perf_counter()
+    merchant = Merchant(**fields)
+    merchant.save()
+    return merchant, time.perf_counter() - started
+
+
+def complete_merchant(merchant):
+    """
+    Finish a merchant whose provisioning stopped after its row was saved:
+    create whatever of the schema, domain and admin user is missing.
+    Returns seconds taken.
+    """
+    started = time.perf_counter()
+    merchant.create_schema(check_if_exists=True, verbosity=0)
+    merchant.get_or_create_domain()
+    if merchant.auto_create_admin:
+        with schema_context(merchant.schema_name):
+            has_admin = get_user_model().objects.filter(email=merchant.contact_email).exists()
+        if not has_admin:
+            merchant._create_admin_user()
+    return time.perf_counter() - started
+
+
+def init_provisioning_worker():
+    """Process pool initializer: every worker gets its own Django setup and DB connection."""
+    import django
+    django.setup()
+
+
+def provision_merchant_worker(fields):
+    """
+    Pool entry point for bulk provisioning. Never raises, so one failing
+    tenant does not abort the batch.
+    Returns (schema_name, seconds, error).
+    """
+    started = time.perf_counter()
+    try:
+        merchant, seconds = provision_merchant(**fields)
+        return merchant.schema_name, seconds, None
+    except Exception as e:
+        logger.exception("Failed to provision %s", fields.get('schema_name'))
+        return fields.get('schema_name'), time.perf_counter() - started, str(e)
+
+
+def provisioning_is_async():
+    return getattr(settings, 'MERCHANT_PROVISIONING_ASYNC', True)
+
+
+def get_max_attempts():
+    return getattr(settings, 'MERCHANT_PROVISIONING_MAX_ATTEMPTS', 5)
+
+
+def get_retry_delay(attempts):
+    """Seconds before a job that failed attempts times is tried again: doubles with every failure."""
+    return getattr(settings, 'MERCHANT_PROVISIONING_RETRY_DELAY', 30) * 2 ** (attempts - 1)
+
+
+def enqueue_merchant_provisioning(user, schema_name, **fields):
+    """
+    Record a signup as a pending ProvisioningJob. The worker (or
+    run_provisioning_job when MERCHANT_PROVISIONING_ASYNC is off) creates the
+    schema, domain, admin user and owner membership later.
+    """
+    from public_apps.merchant.models import ProvisioningJob
+
+    if fields.get('contact_phone') is not None:
+        fields['contact_phone'] = str(fields['contact_phone'])
+    return ProvisioningJob.objects.create(user=user, schema_name=schema_name, payload=fields)
+
+
+def _start_job(job):
+    job.status = 'running'
+    job.attempts += 1
+    job.started_at = timezone.now()
+    job.save(update_fields=['status', 'attempts', 'started_at'])
+
+
+def claim_provisioning_job():
+    """
+    Lock the oldest pending job that is due and mark it running. SKIP LOCKED
+    lets any number of workers poll the table without handing out the same
+    job twice.
+    """
+    from public_apps.merchant.models import ProvisioningJob
+
+    with transaction.atomic():
+        job = (
+            ProvisioningJob.objects.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=timezone.now()))
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        _start_job(job)
+    return job
+
+
+def requeue_stale_jobs(older_than):
+    """
+    Put jobs left running by a crashed worker back in the queue, or fail
+    them if that was their last attempt. Returns how many were requeued.
+    """
+    from public_apps.merchant.models import ProvisioningJob
+
+    now = timezone.now()
+    stale = ProvisioningJob.objects.filter(status='running', started_at__lt=now - timedelta(seconds=older_than))
+    stale.filter(attempts__gte=get_max_attempts()).update(
+        status='failed', error='Worker stopped during the last attempt', finished_at=now
+    )
+    return stale.update(status='pending', next_attempt_at=None)
+
+
+def run_provisioning_job(job):
+    """
+    Create the merchant for a job and record the outcome on it. Safe to run
+    again after a crash: a merchant already saved for the job's schema is
+    completed rather than created twice. Failed attempts go back in the
+    queue with a growing delay until MERCHANT_PROVISIONING_MAX_ATTEMPTS,
+    except when run inline (MERCHANT_PROVISIONING_ASYNC off), where no
+    worker is expected to pick them up and they fail straight away.
+    """
+    from public_apps.merchant.models import Merchant, TenantMembership
+
+    inline = job.status != 'running'
+    if inline:
+        # Run inline rather than claimed by a worker
+        _start_job(job)
+    user = job.user
+    try:
+        merchant = Merchant.objects.filter(schema_name=job.schema_name).first()
+        if merchant is None:
+            merchant, seconds = provision_merchant(schema_name=job.schema_name, **job.payload)
+        else:
+            seconds = complete_merchant(merchant)
+        with transaction.atomic():
+            TenantMembership.objects.get_or_create(
+                user=user,
+                tenant=merchant,
+                defaults={'role': 'merchant_admin', 'is_owner': True, 'is_active': True},
+            )
+            if not user.primary_tenant_id:
+                user.primary_tenant = merchant
+                user.save(update_fields=['primary_tenant'])
+    except Exception as e:
+        logger.exception("Provisioning job %s failed (attempt %d)", job.pk, job.attempts)
+        job.error = str(e)
+        job.merchant = Merchant.objects.filter(schema_name=job.schema_name).first()
+        if not inline and job.attempts < get_max_attempts():
+            job.status = 'pending'
+            job.next_attempt_at = timezone.now() + timedelta(seconds=get_retry_delay(job.attempts))
+        else:
+            job.status = 'failed'
+    else:
+        logger.info("Provisioned %s for job %s in %.2fs", job.schema_name, job.pk, seconds)
+        job.status = 'succeeded'
+        job.error = ''
+        job.merchant = merchant
+        job.next_attempt_at = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'merchant', 'next_attempt_at', 'finished_at'])
+    return job
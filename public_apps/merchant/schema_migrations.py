@@ -0,0 +1,97 @@
+import hashlib
+import io
+import logging
+import time
+from contextlib import redirect_stderr, redirect_stdout
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+
+logger = logging.getLogger(__name__)
+
+
+def get_migration_fingerprint():
+    """
+    Hash of every migration known to the code base. A schema last migrated
+    at this fingerprint has nothing left to apply.
+    """
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    nodes = sorted(f"{app}.{name}" for app, name in loader.graph.nodes)
+    return hashlib.sha256('\n'.join(nodes).encode()).hexdigest()
+
+
+def get_tenant_schemas(include_template=True):
+    """Every merchant schema, plus the provisioning template when it exists."""
+    from django_tenants.utils import get_public_schema_name
+    from public_apps.merchant.models import Merchant
+    from public_apps.merchant.provisioning import get_template_schema, template_is_available
+
+    schemas = list(
+        Merchant.objects.exclude(schema_name=get_public_schema_name())
+        .order_by('schema_name')
+        .values_list('schema_name', flat=True)
+    )
+    if include_template and template_is_available():
+        schemas.insert(0, get_template_schema())
+    return schemas
+
+
+def get_stale_schemas(schemas, fingerprint):
+    """Schemas whose recorded fingerprint differs from fingerprint, in one query."""
+    from public_apps.merchant.models import SchemaMigrationState
+
+    current = set(
+        SchemaMigrationState.objects.filter(schema_name__in=schemas, fingerprint=fingerprint)
+        .values_list('schema_name', flat=True)
+    )
+    return [schema for schema in schemas if schema not in current]
+
+
+def record_migrated_schema(schema_name, fingerprint, duration):
+    from public_apps.merchant.models import SchemaMigrationState
+
+    SchemaMigrationState.objects.update_or_create(
+        schema_name=schema_name,
+        defaults={'fingerprint': fingerprint, 'duration': duration},
+    )
+
+
+def copy_migration_state(source_schema, schema_name):
+    """A schema cloned from source_schema starts at source_schema's fingerprint."""
+    from public_apps.merchant.models import SchemaMigrationState
+
+    state = SchemaMigrationState.objects.filter(schema_name=source_schema).first()
+    if state is not None:
+        record_migrated_schema(schema_name, state.fingerprint, None)
+
+
+def init_migration_worker():
+    """Process pool initializer: every worker gets its own Django setup and DB connection."""
+    import django
+    django.setup()
+
+
+def migrate_schema_worker(task):
+    """
+    Pool entry point: migrate one schema. Never raises, so one broken tenant
+    does not stop the rollout. Output is captured rather than interleaved.
+    Returns (schema_name, seconds, error, output).
+    """
+    schema_name, verbosity = task
+    output = io.StringIO()
+    started = time.perf_counter()
+    try:
+        # django-tenants writes straight to sys.stdout, so redirect it
+        with redirect_stdout(output), redirect_stderr(output):
+            call_command(
+                'migrate_schemas', tenant=True, schema_name=schema_name,
+                interactive=False, verbosity=verbosity,
+            )
+        error = None
+    except Exception as e:
+        logger.exception("Migrating schema %s failed", schema_name)
+        error = str(e)
+    finally:
+        connection.set_schema_to_public()
+    return schema_name, time.perf_counter() - started, error, output.getvalue()
@@ -1,10 +1,12 @@
 
 from django.db import connection
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
 from django_tenants.utils import schema_context, get_tenant_model
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 
+from core.authentication.hashing import PasswordHashTimeout
+from core.serializers import RenderCacheMixin
 from public_apps.user.tokens import MerchantToken, TenantToken
 from .models import Merchant, Domain
 
@@ -15,7 +17,7 @@ class DomainSerializer(serializers.ModelSerializer):
         model = Domain
         fields = ['domain', 'is_primary', 'ssl_enabled']
 
-class MerchantSerializer(serializers.ModelSerializer):
+class MerchantSerializer(RenderCacheMixin, serializers.ModelSerializer):
     domains = DomainSerializer(many=True, required=False)
     password = serializers.CharField(write_only=True, required=False)  # For admin user
     name = serializers.CharField(max_length=255)
@@ -31,6 +33,11 @@ class MerchantSerializer(serializers.ModelSerializer):
             'status': {'read_only': True}
         }
 
+    def get_render_cache_version(self, instance):
+        # Domain rows have no timestamp of their own
+        domains = tuple((d.domain, d.is_primary, d.ssl_enabled) for d in instance.domains.all())
+        return (instance.updated_at, domains)
+
     def validate_schema_name(self, value):
         """Ensure schema name follows PostgreSQL naming rules"""
         if not value.replace('_', '').isalnum():
@@ -58,11 +65,14 @@ class MerchantSerializer(serializers.ModelSerializer):
         if password:
             with schema_context(merchant.schema_name):
                 User = get_user_model()
-                User.objects.create_superuser(
-                    email=merchant.contact_email,
-                    password=password,
-                    role='merchant_admin'
-                )
+                try:
+                    User.objects.create_superuser(
+                        email=merchant.contact_email,
+                        password=password,
+                        role='merchant_admin'
+                    )
+                except PasswordHashTimeout:
+                    raise exceptions.Throttled(detail="Too many passwords are being processed right now; try again shortly.")
         return merchant
 
 class MerchantRegistrationSerializer(serializers.ModelSerializer):
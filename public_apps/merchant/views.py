@@ -6,9 +6,11 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from core.pagination import CreatedAtKeysetPagination
+from public_apps.auth.views import CreateMerchantView
 from public_apps.merchant.serializers import MerchantTokenObtainPairSerializer
 from .models import Merchant
-from .serializers import MerchantRegistrationSerializer, MerchantSerializer
+from .serializers import MerchantSerializer
 
 from rest_framework_simplejwt.views import TokenObtainPairView
 
@@ -17,9 +19,10 @@ Merchant = get_tenant_model()
 
 
 class MerchantViewSet(viewsets.ModelViewSet):
-    queryset = Merchant.objects.all()
+    queryset = Merchant.objects.prefetch_related('domains')
     serializer_class = MerchantSerializer
     permission_classes = [permissions.IsAdminUser]  # Platform admins only
+    pagination_class = CreatedAtKeysetPagination
 
     @action(detail=True, methods=['post'])
     def activate(self, request, pk=None):
@@ -59,9 +62,11 @@ class MerchantProfileView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 
-class MerchantSignupView(APIView):
+class MerchantSignupView(CreateMerchantView):
     """
-    API view for merchant signup (creates a new tenant)
+    API view for merchant signup (creates a new tenant). Like
+    CreateMerchantView, the tenant is provisioned by a ProvisioningJob and
+    POST answers 202 with the job and its status_url.
     """
     permission_classes = [permissions.AllowAny]
     
@@ -72,23 +77,10 @@ class MerchantSignupView(APIView):
         return Response(
             {
                 "message": "Merchant signup form",
-                "fields": ["name", "contact_email", "password"],
+                "fields": ["name", "contact_email", "contact_phone", "user_data"],
             },
             status=status.HTTP_200_OK,
         )
-    def post(self, request):
-        serializer = MerchantRegistrationSerializer(data=request.data)
-        if serializer.is_valid():
-            merchant = serializer.save()
-            
-            # Return success response with tenant domain
-            return Response({
-                'message': 'Merchant created successfully',
-                'domain': merchant.domain_url,
-                'email': merchant.contact_email
-            }, status=status.HTTP_201_CREATED)
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 class MerchantTokenView(TokenObtainPairView):
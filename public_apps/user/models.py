@@ -1,7 +1,12 @@
 from django.db import models
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+from django.utils.timezone import now
 from django.contrib.auth.models import AbstractUser, Group, Permission, BaseUserManager
 
 from public_apps.merchant.models import Merchant
+from public_apps.merchant.memberships import get_membership_map
+from core.authentication.hashing import hash_password
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -17,7 +22,7 @@ class CustomUserManager(BaseUserManager):
             counter += 1
 
         user = self.model(email=email, username=username, **extra_fields)
-        user.set_password(password)
+        user.password = hash_password(password)
         user.save(using=self._db)
         return user
 
@@ -55,6 +60,7 @@ class User(AbstractUser):
     # User preferences
     timezone = models.CharField(max_length=50, default="UTC")
     language = models.CharField(max_length=10, default="en")
+    updated_at = models.DateTimeField(auto_now=True)
 
     # Multi-tenant relationships
     tenant_memberships = models.ManyToManyField(
@@ -78,16 +84,35 @@ class User(AbstractUser):
 
     objects = CustomUserManager()
 
+    _membership_map = None
+
     def __str__(self):
         return self.email
 
+    def get_membership_map(self):
+        """
+        Map of tenant_id -> role, permission_level, is_owner, is_active.
+        Kept on the instance for the rest of the request and in the shared cache.
+        """
+        if self._membership_map is None:
+            self._membership_map = get_membership_map(self.pk)
+        return self._membership_map
+
+    def _get_active_membership(self, tenant):
+        tenant_id = getattr(tenant, 'pk', tenant)
+        membership = self.get_membership_map().get(tenant_id)
+        if membership is None or not membership['is_active']:
+            return None
+        return membership
+
     def get_tenant_role(self, tenant):
         """Get user's role in a specific tenant"""
-        return self.tenantmembership_set.filter(tenant=tenant, is_active=True).values_list('role', flat=True).first()
+        membership = self._get_active_membership(tenant)
+        return membership['role'] if membership else None
 
     def can_access_tenant(self, tenant):
         """Check if user has access to a tenant"""
-        return self.tenantmembership_set.filter(tenant=tenant, is_active=True).exists()
+        return self._get_active_membership(tenant) is not None
 
     def get_accessible_tenants(self):
         """Get all tenants the user has access to"""
@@ -95,7 +120,10 @@ class User(AbstractUser):
 
     def is_merchant_admin(self):
         """Check if the user is a merchant admin in any tenant"""
-        return self.tenantmembership_set.filter(role='merchant_admin', is_active=True).exists()
+        return any(
+            membership['is_active'] and membership['role'] == 'merchant_admin'
+            for membership in self.get_membership_map().values()
+        )
 
     def get_primary_schema_name(self):
         """Return the schema_name of the user's primary tenant, if set"""
@@ -118,3 +146,22 @@ class User(AbstractUser):
         related_query_name='+'
     )
 
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def touch_user_on_access_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # Group/permission edits don't save the user, but they change its serialized form
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            User.objects.filter(pk=instance.pk).update(updated_at=now())
+        return
+
+    # From the group or permission side instance is that object; the users are in pk_set
+    if action == 'pre_clear':
+        instance._cleared_user_ids = list(
+            sender.objects.filter(**{instance._meta.model_name: instance}).values_list('user_id', flat=True)
+        )
+    elif action == 'post_clear':
+        pk_set = instance.__dict__.pop('_cleared_user_ids', [])
+    if action in ('post_add', 'post_remove', 'post_clear') and pk_set:
+        User.objects.filter(pk__in=pk_set).update(updated_at=now())
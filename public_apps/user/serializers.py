@@ -1,9 +1,11 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
 from django_tenants.utils import get_tenant_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from core.authentication.hashing import PasswordHashTimeout
+from core.serializers import RenderCacheMixin
 from public_apps.user.tokens import UserToken, MerchantToken
 
 User = get_user_model()
@@ -18,7 +20,7 @@ class PermissionSerializer(serializers.ModelSerializer):
         model = Permission
         fields = ['id', 'name', 'codename']
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(RenderCacheMixin, serializers.ModelSerializer):
     groups = GroupSerializer(many=True, read_only=True)
     user_permissions = PermissionSerializer(many=True, read_only=True)
     password = serializers.CharField(write_only=True, required=False, style={'input_type': 'password'})
@@ -50,6 +52,11 @@ class UserSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'is_platform_admin']
         extra_kwargs = {'password': {'write_only': True}}
+
+    def get_render_cache_version(self, instance):
+        # update_last_login saves with update_fields=['last_login'], which leaves updated_at alone
+        return (instance.updated_at, instance.last_login)
+
     def create(self, validated_data):
         password = validated_data.pop('password', None)
 
@@ -183,7 +190,10 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data.pop('password2')
-        user = User.objects.create_user(**validated_data)
+        try:
+            user = User.objects.create_user(**validated_data)
+        except PasswordHashTimeout:
+            raise exceptions.Throttled(detail="Too many passwords are being processed right now; try again shortly.")
         user.role = 'store_customer'
         tenant = get_tenant_model()
         if tenant:
@@ -1,3 +1,47 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed
 from django.test import TestCase
+from django.utils.timezone import now
+
+from .models import User
+
+
+class AccessChangeTouchTests(TestCase):
+
+    def setUp(self):
+        self.group = Group.objects.create(name='Editors')
+        self.member = User.objects.create_user(email='member@example.com', password='secret123')
+        self.bystander = User.objects.create_user(email='bystander@example.com', password='secret123')
+        self.long_ago = now() - timedelta(days=1)
+        User.objects.update(updated_at=self.long_ago)
+
+    def send_reverse(self, action, pk_set=None):
+        # What a group-side manager (group.user_set) sends; User.groups has no reverse accessor
+        m2m_changed.send(
+            sender=User.groups.through, instance=self.group, action=action, reverse=True,
+            model=User, pk_set=pk_set, using='default',
+        )
+
+    def updated_at(self, user):
+        return User.objects.values_list('updated_at', flat=True).get(pk=user.pk)
+
+    def test_forward_change_touches_user(self):
+        self.member.groups.add(self.group)
+        self.assertGreater(self.updated_at(self.member), self.long_ago)
+        self.assertEqual(self.updated_at(self.bystander), self.long_ago)
+
+    def test_reverse_add_touches_users_in_pk_set(self):
+        User.groups.through.objects.create(user=self.member, group=self.group)
+        self.send_reverse('post_add', {self.member.pk})
+        self.assertGreater(self.updated_at(self.member), self.long_ago)
+        self.assertEqual(self.updated_at(self.bystander), self.long_ago)
 
-# Create your tests here.
+    def test_reverse_clear_touches_former_members(self):
+        User.groups.through.objects.create(user=self.member, group=self.group)
+        self.send_reverse('pre_clear')
+        User.groups.through.objects.filter(group=self.group).delete()
+        self.send_reverse('post_clear')
+        self.assertGreater(self.updated_at(self.member), self.long_ago)
+        self.assertEqual(self.updated_at(self.bystander), self.long_ago)
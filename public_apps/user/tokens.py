@@ -6,6 +6,7 @@ from datetime import timedelta
 from django.conf import settings
 from django.db import connection
 from django.contrib.auth import get_user_model
+from public_apps.merchant.memberships import get_active_membership
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,17 +14,23 @@ User = get_user_model()
 
 class TenantAwareTokenMixin:
     @classmethod
-    def for_user_and_tenant(cls, user, tenant):
+    def for_user_and_tenant(cls, user, tenant, membership=None):
+        """
+        Build a token for user in tenant. Pass an already-loaded active
+        membership to avoid querying it again.
+        """
         token = cls()
         token.payload.update({
             'user_id': user.id,
             'email': user.email,
             'first_name': user.first_name,
             'last_name': user.last_name,
+            'is_platform_admin': user.is_platform_admin,
         })
         if tenant:
             try:
-                membership = user.memberships.get(tenant=tenant, is_active=True)  # Fix here
+                if membership is None:
+                    membership = user.memberships.get(tenant=tenant, is_active=True)
                 token.payload.update({
                     'tenant_id': tenant.id,
                     'tenant_schema': tenant.schema_name,
@@ -65,14 +72,16 @@ class TenantAwareTokenMixin:
         """
         Validate that the user still has access to the tenant
         """
-        user, tenant = self.get_user_and_tenant()
-        
-        if not user or not tenant:
+        user_id = self.payload.get('user_id')
+        tenant_id = self.payload.get('tenant_id')
+
+        if not user_id or not tenant_id:
             raise TokenError("Invalid token payload")
-        
-        if not user.can_access_tenant(tenant):
+
+        # Answered from the cached membership map; no User/Merchant rows needed
+        if get_active_membership(user_id, tenant_id) is None:
             raise TokenError("User no longer has access to this tenant")
-        
+
         return True
 
 
@@ -99,8 +108,8 @@ class MerchantToken(TenantToken):
     token_type = 'merchant'
     
     @classmethod
-    def for_user_and_tenant(cls, user, tenant):
-        token = super().for_user_and_tenant(user, tenant)
+    def for_user_and_tenant(cls, user, tenant, membership=None):
+        token = super().for_user_and_tenant(user, tenant, membership)
         
         # Add merchant-specific claims
         token.payload.update({
@@ -118,8 +127,8 @@ class CustomerToken(TenantToken):
     token_type = 'customer'
     
     @classmethod
-    def for_user_and_tenant(cls, user, tenant):
-        token = super().for_user_and_tenant(user, tenant)
+    def for_user_and_tenant(cls, user, tenant, membership=None):
+        token = super().for_user_and_tenant(user, tenant, membership)
         
         # Add customer-specific claims
         token.payload.update({
@@ -44,7 +44,7 @@ class UserProfileView(APIView):
     
     def get(self, request):
         user = request.user
-        serializer = UserSerializer(user)
+        serializer = UserSerializer(user, context={'request': request})
         return Response(serializer.data)
     
     def put(self, request):